@@ -0,0 +1,323 @@
+"""Performance benchmarks for the simulation, statistics, chart and PDF export paths.
+
+    python benchmark.py                                    # full matrix, print a table
+    python benchmark.py -o bench.json                      # also save the results as JSON
+    python benchmark.py --baseline bench.json --threshold 0.25
+    python benchmark.py --runs 1000 10000 --years 30 --repeat 5
+    python benchmark.py --cases simulate --runs 10000 --time-steps annual monthly
+
+Runs headless: the chart is drawn on an Agg canvas, so no display is needed.
+Each case is timed --repeat times and reports its fastest wall time, paths per
+second and the peak memory traced during one extra run. With --baseline, cases
+that got slower (or use more memory) by more than --threshold compared to a
+saved run are listed and the exit status is 1.
+
+Cases:
+    simulate     the app's simulation of one parameter set (run_monte_carlo with
+                 a path sample, streaming beyond max_in_memory_runs), once per
+                 --time-steps mode
+    percentiles  calculate_percentiles over a (runs x years) array, up to
+                 MAX_IN_MEMORY_RUNS runs
+    chart        a steady-state results chart update, once per horizon
+    export       the PDF report with its chart image, once per horizon
+    reference    the per-run Python loop the vectorized engine replaced, timed
+                 once and without tracing memory; compare it with the simulate
+                 case for the speedup:
+                 python benchmark.py --cases simulate reference --runs 100000 --years 47
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import replace
+from datetime import datetime
+from io import BytesIO
+
+import matplotlib
+matplotlib.use("Agg")
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from chart import CHART_PERCENTILES, ResultsChart
+from engine import ENGINE_VERSION, MAX_IN_MEMORY_RUNS, TIME_STEPS, SimulationParams, calculate_percentiles, simulate_scenario
+from report import write_pdf_report
+
+
+DEFAULT_RUNS = (1000, 10000, 100000, 1000000)
+DEFAULT_YEARS = (10, 30, 60)
+
+# Same path sample and storage dtype as the app's results
+SAMPLE_PATHS = 200
+RESULT_DTYPE = np.float32
+
+# Runs behind the results drawn by the chart and export cases
+CHART_RUNS = 10000
+
+BASE_PROFILE = {
+    "fixedMonthlyPension": 2500,
+    "currentAssets": 500000,
+    "capitalGainsTaxRate": 0.2625,
+    "annualSavings": 20000,
+    "averageROI": 0.07,
+    "averageInflation": 0.025,
+    "ROI_volatility": 0.15,
+    "inflation_volatility": 0.01,
+    "monthlyExpenses": {"health": 400, "food": 800, "entertainment": 300, "shopping": 300, "utilities": 400},
+    "annualExpenses": {"vacations": 5000, "repairs": 2000, "carMaintenance": 1500},
+    "simulationEndAge": 90,
+    "seed": 20250101,
+}
+
+
+def benchmark_params(runs, years, time_step="annual"):
+    """A fixed profile simulated over the given number of years, retiring a third of the way in"""
+    current_age = BASE_PROFILE["simulationEndAge"] - years + 1
+    retirement_age = current_age + years // 3
+    return SimulationParams.from_dict(dict(
+        BASE_PROFILE, simulationRuns=runs, currentAge=current_age,
+        intendedRetirementAge=retirement_age, legalRetirementAge=max(67, retirement_age), timeStep=time_step
+    ))
+
+
+def measure(function, repeat):
+    """Fastest wall time of repeat calls and the peak traced memory of one more, in MB"""
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        seconds.append(time.perf_counter() - start)
+
+    # Tracing slows allocations down, so peak memory gets its own call
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return min(seconds), peak / 2**20
+
+
+def case(name, runs, years, seconds, peak_memory_mb, paths=None, time_step="annual"):
+    return {
+        "name": name,
+        "runs": runs,
+        "years": years,
+        "time_step": time_step,
+        "seconds": seconds,
+        "paths_per_second": paths / seconds if paths and seconds > 0 else None,
+        "peak_memory_mb": peak_memory_mb,
+    }
+
+
+def benchmark_simulate(runs, years, repeat, time_step="annual"):
+    params = benchmark_params(runs, years, time_step)
+    seconds, peak = measure(lambda: simulate_scenario(params, None, CHART_PERCENTILES, SAMPLE_PATHS, RESULT_DTYPE), repeat)
+    return case("simulate", runs, years, seconds, peak, paths=runs, time_step=time_step)
+
+
+def reference_simulation(params):
+    """The original simulation: one run and one year at a time, one scalar draw per call"""
+    annual_expense = params.annual_expense
+    simulations = []
+    success_count = 0
+    for _ in range(params.simulation_runs):
+        asset = params.current_assets
+        assets, spendings = [], []
+        failed = False
+        for age in range(params.current_age, params.intended_retirement_age):
+            r = np.random.normal(params.average_roi, params.roi_volatility)
+            asset = asset * (1 + (r * (1 - params.capital_gains_tax_rate) if r > 0 else r)) + params.annual_savings
+            assets.append(asset)
+            spendings.append(0)
+
+        expense = annual_expense
+        for age in range(params.intended_retirement_age, params.simulation_end_age + 1):
+            income = params.fixed_monthly_pension * 12 if age >= params.legal_retirement_age else 0
+            r = np.random.normal(params.average_roi, params.roi_volatility)
+            asset = asset * (1 + (r * (1 - params.capital_gains_tax_rate) if r > 0 else r)) + income - expense
+            assets.append(asset)
+            spendings.append(expense / 12)
+            expense *= 1 + np.random.normal(params.average_inflation, params.inflation_volatility)
+            failed = failed or asset < 0
+
+        success_count += not failed
+        simulations.append({"assets": assets, "spendings": spendings})
+
+    # Percentiles by sorting each year's values in Python, as before
+    for key in ("assets", "spendings"):
+        for j in range(params.num_years):
+            sorted(run[key][j] for run in simulations)
+    return success_count / params.simulation_runs
+
+
+def benchmark_reference(runs, years):
+    params = benchmark_params(runs, years)
+    start = time.perf_counter()
+    reference_simulation(params)
+    return case("reference", runs, years, time.perf_counter() - start, 0.0, paths=runs)
+
+
+def benchmark_percentiles(runs, years, repeat):
+    values = np.asfortranarray(np.random.default_rng(0).lognormal(13, 1, size=(runs, years)))
+    seconds, peak = measure(lambda: calculate_percentiles(values, CHART_PERCENTILES), repeat)
+    return case("percentiles", runs, years, seconds, peak, paths=runs)
+
+
+def chart_results(years):
+    """Two results of the same profile with different seeds, for alternating chart updates"""
+    params = benchmark_params(CHART_RUNS, years)
+    return [
+        simulate_scenario(replace(params, seed=seed), None, CHART_PERCENTILES, SAMPLE_PATHS, RESULT_DTYPE)
+        for seed in (1, 2)
+    ], params
+
+
+def new_chart():
+    figure = Figure(figsize=(10, 6), dpi=100)
+    chart = ResultsChart(figure, FigureCanvasAgg(figure))
+    chart.show_paths = True
+    return chart
+
+
+def benchmark_chart(years, repeat):
+    results, params = chart_results(years)
+    chart = new_chart()
+
+    # The first update builds the chart and draws it in full; later ones only blit
+    chart.update(results[0], params.intended_retirement_age, params.legal_retirement_age)
+    updates = [0]
+
+    def update():
+        updates[0] += 1
+        chart.update(results[updates[0] % 2], params.intended_retirement_age, params.legal_retirement_age)
+
+    seconds, peak = measure(update, repeat)
+    return case("chart", CHART_RUNS, years, seconds, peak)
+
+
+def benchmark_export(years, repeat):
+    results, params = chart_results(years)
+    chart = new_chart()
+    chart.update(results[0], params.intended_retirement_age, params.legal_retirement_age)
+
+    parameters = [f"{key}: {value}" for key, value in params.to_dict().items()]
+    summary = [f"Success Probability: {results[0]['success_probability']:.1%}"]
+
+    with tempfile.TemporaryDirectory() as directory:
+        filepath = os.path.join(directory, "report.pdf")
+
+        def export():
+            image = BytesIO()
+            chart.save_image(image, format='png', dpi=150, bbox_inches='tight')
+            image.seek(0)
+            write_pdf_report(filepath, parameters, summary, image)
+
+        seconds, peak = measure(export, repeat)
+    return case("export", 0, years, seconds, peak)
+
+
+def run_benchmarks(runs_list, years_list, repeat, cases, report=None, time_steps=("annual",)):
+    """Run the selected cases over the matrix, calling report(result) as each finishes"""
+    results = []
+
+    def add(result):
+        results.append(result)
+        if report is not None:
+            report(result)
+
+    for years in years_list:
+        for runs in runs_list:
+            if "simulate" in cases:
+                for time_step in time_steps:
+                    add(benchmark_simulate(runs, years, repeat, time_step))
+            if "percentiles" in cases and runs <= MAX_IN_MEMORY_RUNS:
+                add(benchmark_percentiles(runs, years, repeat))
+            if "reference" in cases:
+                add(benchmark_reference(runs, years))
+        if "chart" in cases:
+            add(benchmark_chart(years, repeat))
+        if "export" in cases:
+            add(benchmark_export(years, repeat))
+
+    return results
+
+
+def format_result(result):
+    rate = f"{result['paths_per_second']:>14,.0f}" if result["paths_per_second"] else " " * 14
+    return (f"{result['name']:<12} {result['runs']:>9,} {result['years']:>5} {result['time_step']:<8} "
+            f"{result['seconds'] * 1000:>11.1f} {rate} {result['peak_memory_mb']:>9.1f}")
+
+
+def find_regressions(results, baseline, threshold):
+    """Cases whose time or peak memory grew by more than threshold (a fraction) against baseline"""
+    # Baselines from before the monthly mode only have annual cases
+    previous = {(r["name"], r["runs"], r["years"], r.get("time_step", "annual")): r for r in baseline["results"]}
+    regressions = []
+    for result in results:
+        before = previous.get((result["name"], result["runs"], result["years"], result["time_step"]))
+        if before is None:
+            continue
+        for metric in ("seconds", "peak_memory_mb"):
+            if before[metric] > 0 and result[metric] > before[metric] * (1 + threshold):
+                regressions.append((result, metric, before[metric]))
+    return regressions
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Benchmark the simulation, statistics, chart and PDF export paths")
+    parser.add_argument("--runs", type=int, nargs="+", default=list(DEFAULT_RUNS), help="Run counts (default: 1k to 1M)")
+    parser.add_argument("--years", type=int, nargs="+", default=list(DEFAULT_YEARS), help="Horizons in years (default: 10 30 60)")
+    parser.add_argument("--cases", nargs="+", choices=["simulate", "percentiles", "chart", "export", "reference"],
+                        default=["simulate", "percentiles", "chart", "export"], help="Cases to run (default: all)")
+    parser.add_argument("--time-steps", nargs="+", choices=list(TIME_STEPS), default=["annual"],
+                        help="Time step modes of the simulate case (default: annual)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed calls per case; the fastest counts (default: 3)")
+    parser.add_argument("-o", "--output", help="Save the results to this JSON file")
+    parser.add_argument("--baseline", help="JSON file of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Allowed slowdown or memory growth against the baseline as a fraction (default: 0.2)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    print(f"{'case':<12} {'runs':>9} {'years':>5} {'step':<8} {'time (ms)':>11} {'paths/s':>14} {'peak (MB)':>9}")
+    results = run_benchmarks(args.runs, args.years, args.repeat, args.cases,
+                             report=lambda result: print(format_result(result), flush=True), time_steps=args.time_steps)
+
+    document = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "engine": ENGINE_VERSION,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "repeat": args.repeat,
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(document, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+
+        regressions = find_regressions(results, baseline, args.threshold)
+        for result, metric, before in regressions:
+            print(f"REGRESSION {result['name']} runs={result['runs']} years={result['years']} step={result['time_step']}: "
+                  f"{metric} {before:.4g} -> {result[metric]:.4g} (+{result[metric] / before - 1:.0%})", file=sys.stderr)
+        if regressions:
+            raise SystemExit(1)
+        print(f"No regressions beyond {args.threshold:.0%} against {args.baseline}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
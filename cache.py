@@ -0,0 +1,235 @@
+"""Content-addressed cache for simulation results.
+
+Results are keyed by a hash of the canonical parameters (including the seed) and
+the engine version, and kept in two tiers: a bounded in-memory LRU and an on-disk store under
+~/.retirecalc/cache that is evicted by total size and age.
+
+AccumulationCache keeps the shocks and accumulation phase of recent runs in memory,
+so edits that only affect the years after retirement skip straight to them.
+"""
+import hashlib
+import json
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from engine import ENGINE_VERSION, accumulation_key, accumulation_state, draw_model_shocks
+from history import history_fingerprint
+
+
+DEFAULT_CACHE_DIR = os.path.expanduser("~/.retirecalc/cache")
+
+# Per-run arrays larger than this are only kept in memory; the disk tier stores
+# everything else (failure masks and sampled paths are well below it)
+DISK_MAX_ARRAY_BYTES = 4 * 2**20
+
+
+def cache_key(params, **options):
+    """Hash of the canonical parameters (seed included), engine version and any result options
+
+    A historical dataset is identified by its file's size and modification time
+    as well as its path, so results are not reused after it is replaced.
+    """
+    payload = {
+        "params": params.to_dict(),
+        "engine": ENGINE_VERSION,
+        "options": options,
+    }
+    if params.return_model != "normal":
+        payload["history"] = history_fingerprint(params.history_path)
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=list)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def result_size(results):
+    """Approximate memory held by a result dict, dominated by its arrays"""
+    arrays = results.get("simulations", {}).values()
+    return sum(value.nbytes for value in arrays if isinstance(value, np.ndarray)) + 64 * 1024
+
+
+class ResultCache:
+    """Two-tier (memory, disk) cache of simulation result dicts"""
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_memory_entries=32, max_memory_bytes=256 * 2**20,
+                 max_disk_bytes=256 * 2**20, max_age_days=30):
+        self.directory = directory
+        self.max_memory_entries = max_memory_entries
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.max_age_seconds = max_age_days * 24 * 3600
+
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached results for key or None
+
+        A key of None stands for results that must not be reused (see put).
+        """
+        if key is None:
+            return None
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key][0]
+
+        results = self._read_disk(key)
+        if results is not None:
+            self._remember(key, results)
+        return results
+
+    def put(self, key, results):
+        """Store results in both tiers; a key of None is not stored"""
+        if key is None:
+            return
+        self._remember(key, results)
+        self._write_disk(key, results)
+
+    def clear(self):
+        """Drop every cached result from memory and disk"""
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+
+        for path in self._disk_entries():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _remember(self, key, results):
+        size = result_size(results)
+        with self._lock:
+            if key in self._memory:
+                self._memory_bytes -= self._memory.pop(key)[1]
+            # Results larger than the whole memory tier are not kept in memory at all
+            if size > self.max_memory_bytes:
+                return
+            self._memory[key] = (results, size)
+            self._memory_bytes += size
+
+            # Evict least recently used entries, but always keep the newest one
+            while len(self._memory) > 1 and (
+                len(self._memory) > self.max_memory_entries or self._memory_bytes > self.max_memory_bytes
+            ):
+                _, (_, evicted_size) = self._memory.popitem(last=False)
+                self._memory_bytes -= evicted_size
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.pickle")
+
+    def _disk_entries(self):
+        if not os.path.isdir(self.directory):
+            return []
+        return [os.path.join(self.directory, name) for name in os.listdir(self.directory) if name.endswith(".pickle")]
+
+    def _read_disk(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                results = pickle.load(f)
+            # Touch the file so disk eviction is least-recently-used as well
+            os.utime(path)
+            return results
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Error reading cached results: {str(e)}")
+            return None
+
+    def _write_disk(self, key, results):
+        if self.max_disk_bytes <= 0:
+            return
+
+        stored = dict(results)
+        if "simulations" in stored:
+            stored["simulations"] = {
+                name: value for name, value in stored["simulations"].items() if value.nbytes <= DISK_MAX_ARRAY_BYTES
+            }
+
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+
+            # Write to a temporary file first so readers never see a partial entry
+            path = self._path(key)
+            temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_path, 'wb') as f:
+                pickle.dump(stored, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, path)
+
+            self._evict_disk()
+        except OSError as e:
+            print(f"Error writing cached results: {str(e)}")
+
+    def _evict_disk(self):
+        """Delete entries older than the age limit, then the oldest until under the size limit"""
+        now = time.time()
+        entries = []
+        for path in self._disk_entries():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if now - stat.st_mtime > self.max_age_seconds:
+                os.remove(path)
+            else:
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_disk_bytes:
+                break
+            os.remove(path)
+            total -= size
+
+
+class AccumulationCache:
+    """In-memory LRU of accumulation states (see engine.accumulation_state)
+
+    Keyed by seed, run range and the parameters that determine the accumulation
+    phase, so a state is reused by every parameter set that only differs after
+    retirement: expenses, pension, legal retirement age and inflation.
+    """
+
+    def __init__(self, max_bytes=256 * 2**20):
+        self.max_bytes = max_bytes
+        self._states = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, params, seed, start, runs):
+        """Return the state for runs start .. start + runs - 1 of the seed, simulating it on a miss"""
+        key = accumulation_key(params, seed, start, runs)
+        with self._lock:
+            if key in self._states:
+                self._states.move_to_end(key)
+                return self._states[key]
+
+        state = accumulation_state(params, draw_model_shocks(params, runs, seed, start))
+
+        # A state larger than the whole cache is used once and not kept
+        if state.nbytes > self.max_bytes:
+            return state
+
+        with self._lock:
+            if key not in self._states:
+                self._states[key] = state
+                self._bytes += state.nbytes
+
+            # Evict least recently used states, but always keep the newest one
+            while len(self._states) > 1 and self._bytes > self.max_bytes:
+                _, evicted = self._states.popitem(last=False)
+                self._bytes -= evicted.nbytes
+
+        return state
+
+    def clear(self):
+        """Drop every cached state"""
+        with self._lock:
+            self._states.clear()
+            self._bytes = 0
@@ -0,0 +1,268 @@
+"""Results chart: percentile fan, sample path overlay and spending bars.
+
+The chart's artists are built once and updated in place. The axes are only
+rescaled when the data no longer fits them well; until then an update redraws
+just the data over a cached background (blitting), so its cost does not grow
+with reruns. Works on any canvas that supports blitting, e.g. FigureCanvasTkAgg
+in the app or FigureCanvasAgg when run headless.
+"""
+import numpy as np
+from matplotlib.collections import LineCollection, PolyCollection
+from matplotlib.ticker import FuncFormatter
+
+
+# Percentiles the chart needs: fan bands p5-p95 and p25-p75 around the median,
+# plus the p10 and p90 lines
+CHART_PERCENTILES = (5, 10, 25, 50, 75, 90, 95)
+
+# The sample path overlay draws a point every ceil(years / OVERLAY_MAX_POINTS)
+# years, so long horizons don't cost more to draw than a 24-year one
+OVERLAY_MAX_POINTS = 24
+
+
+def fit_limits(limits, low, high, margin=0.05, min_fill=0.5):
+    """Axis limits for data spanning low..high
+
+    Keeps the current limits while the data fits inside them and fills at least
+    min_fill of them, so that small changes between updates don't rescale the axis.
+    """
+    if high <= low:
+        high = low + 1
+    current_low, current_high = limits
+    if current_low <= low and high <= current_high and high - low >= min_fill * (current_high - current_low):
+        return tuple(limits)
+    padding = margin * (high - low)
+    return (low - padding, high + padding)
+
+
+def band_vertices(x, low, high):
+    """Outline of the area between two curves, for a PolyCollection"""
+    return np.concatenate([np.column_stack([x, low]), np.column_stack([x, high])[::-1]])
+
+
+def bar_vertices(x, heights, width=0.8):
+    """(bars x 4 x 2) rectangles of a bar chart, for a PolyCollection"""
+    x = np.asarray(x, dtype=float)
+    heights = np.asarray(heights, dtype=float)
+    left = x - width / 2
+    right = x + width / 2
+    zeros = np.zeros_like(heights)
+    return np.stack([
+        np.column_stack([left, zeros]), np.column_stack([left, heights]),
+        np.column_stack([right, heights]), np.column_stack([right, zeros])
+    ], axis=1)
+
+
+def path_segments(x, paths, max_points=OVERLAY_MAX_POINTS):
+    """(paths x points x 2) segments for a LineCollection, keeping about max_points per path
+
+    Decimation keeps every step-th point plus the last one, with the step growing
+    with the horizon, so long horizons draw about as fast as short ones.
+    """
+    x = np.asarray(x, dtype=float)
+    paths = np.asarray(paths, dtype=float)
+    step = -(-len(x) // max_points)
+    index = np.arange(0, len(x), step)
+    if index[-1] != len(x) - 1:
+        index = np.append(index, len(x) - 1)
+
+    segments = np.empty((paths.shape[0], len(index), 2))
+    segments[:, :, 0] = x[index]
+    segments[:, :, 1] = paths[:, index]
+    return segments
+
+
+class ResultsChart:
+    """Asset percentiles, sample paths and median spending of a result dict on one figure"""
+
+    def __init__(self, figure, canvas, ax=None):
+        self.figure = figure
+        self.canvas = canvas
+        self.ax = ax if ax is not None else figure.add_subplot(111)
+        self.spending_ax = None
+        self.artists = None
+        self.vertex_buffers = {}
+        self.background = None
+        self.show_paths = False
+
+    def _create_artists(self):
+        """Build the chart once; later updates only change the data of its artists"""
+        ax = self.ax
+        self.spending_ax = ax.twinx()
+
+        # Data artists are animated: full redraws leave them out of the background
+        # that blit() redraws them on
+        artists = {
+            "outer_band": ax.add_collection(PolyCollection([], facecolor='blue', alpha=0.12, label='Assets 5th–95th Percentile')),
+            "inner_band": ax.add_collection(PolyCollection([], facecolor='blue', alpha=0.25, label='Assets 25th–75th Percentile')),
+            # All sample paths in one collection, so the overlay is a single artist
+            "paths": ax.add_collection(LineCollection([], colors='gray', linewidths=0.6, alpha=0.25)),
+            "p10": ax.plot([], [], color='red', label='Assets 10th Percentile', linewidth=2)[0],
+            "median": ax.plot([], [], color='blue', label='Assets Median', linewidth=2)[0],
+            "p90": ax.plot([], [], color='green', label='Assets 90th Percentile', linewidth=2)[0],
+            # Spending bars as one collection of rectangles, drawn in a single call
+            "spending": self.spending_ax.add_collection(PolyCollection([], facecolor='purple', alpha=0.3, label='Monthly Spending')),
+            "retirement_line": ax.axvline(x=0, color='orange', linestyle='--', alpha=0.7),
+            "pension_line": ax.axvline(x=0, color='purple', linestyle='--', alpha=0.7),
+            # Labels sit at a fixed height in axes coordinates, so they only move with their age
+            "retirement_text": ax.text(0, 0.95, '', color='orange', rotation=90, verticalalignment='top',
+                                       transform=ax.get_xaxis_transform()),
+            "pension_text": ax.text(0, 0.85, '', color='purple', rotation=90, verticalalignment='top',
+                                    transform=ax.get_xaxis_transform()),
+        }
+        self.artists = artists
+
+        # Format y-axes
+        ax.set_ylabel('Asset Value (€)')
+        ax.set_xlabel('Age')
+        self.spending_ax.set_ylabel('Monthly Spending (€)')
+        ax.yaxis.set_major_formatter(FuncFormatter(lambda x, _: f'€{x:,.0f}'))
+        self.spending_ax.yaxis.set_major_formatter(FuncFormatter(lambda x, _: f'€{x:,.0f}'))
+
+        # Set the title, a combined legend and a grid
+        ax.set_title('Retirement Simulation Results')
+        ax.legend([artists["p10"], artists["median"], artists["p90"], artists["outer_band"], artists["inner_band"], artists["spending"]],
+                  ['Assets 10th Percentile', 'Assets Median', 'Assets 90th Percentile',
+                   'Assets 5th–95th Percentile', 'Assets 25th–75th Percentile', 'Monthly Spending'],
+                  loc='upper left')
+        ax.grid(True, linestyle='--', alpha=0.7)
+
+        self.set_animated(True)
+        self.canvas.mpl_connect("draw_event", self._on_draw)
+
+    def _set_vertices(self, key, polygons, closed=True):
+        """Set the (count x points x 2) polygons or line segments of a collection artist
+
+        The collection's paths share one vertex array, so while the count and size
+        stay the same an update only copies the new vertices into it instead of
+        building new paths.
+        """
+        collection = self.artists[key]
+        polygons = np.asarray(polygons, dtype=float) if len(polygons) else np.empty((0, 0, 2))
+        count, points = polygons.shape[:2]
+        buffer = self.vertex_buffers.get(key)
+
+        if buffer is None or buffer.shape[:2] != (count, points + closed):
+            buffer = np.empty((count, points + closed, 2))
+            buffer[:, :points] = polygons
+            if closed:
+                buffer[:, points:] = polygons[:, :1]
+                collection.set_verts(polygons, closed=True)
+            else:
+                collection.set_segments(polygons)
+            for path, vertices in zip(collection.get_paths(), buffer):
+                path.vertices = vertices
+            self.vertex_buffers[key] = buffer
+            return
+
+        buffer[:, :points] = polygons
+        if closed:
+            buffer[:, points:] = polygons[:, :1]
+        collection.stale = True
+
+    def _data_artists(self):
+        """Artists that change with the results, spending bars and bands first so the lines stay on top"""
+        artists = self.artists
+        return [artists[key] for key in (
+            "spending", "outer_band", "inner_band", "paths", "retirement_line", "pension_line", "retirement_text", "pension_text", "p10", "median", "p90"
+        )]
+
+    def set_animated(self, animated):
+        """Animated artists are skipped by full draws, so exports switch animation off"""
+        if self.artists is not None:
+            for artist in self._data_artists():
+                artist.set_animated(animated)
+
+    def _on_draw(self, event):
+        """After a full redraw keep the static background, then draw the data on it"""
+        self.background = self.canvas.copy_from_bbox(self.figure.bbox)
+        for artist in self._data_artists():
+            # During an export the data is not animated and the full draw included it
+            if artist.get_animated():
+                self.figure.draw_artist(artist)
+
+    def blit(self):
+        """Redraw only the data artists over the saved background"""
+        self.canvas.restore_region(self.background)
+        for artist in self._data_artists():
+            self.figure.draw_artist(artist)
+        self.canvas.blit(self.figure.bbox)
+
+    def _redraw(self):
+        if self.background is None:
+            self.canvas.draw_idle()
+        else:
+            self.blit()
+
+    def set_show_paths(self, show):
+        """Show or hide the sample path overlay without touching the rest of the chart"""
+        self.show_paths = show
+        if self.artists is not None:
+            self.artists["paths"].set_visible(show)
+            self._redraw()
+
+    def update(self, results, retirement_age, legal_retirement_age):
+        """Show a result dict computed with CHART_PERCENTILES
+
+        Returns True if the update rescaled the axes and needs a full redraw, which
+        is requested with draw_idle(); otherwise the data has already been blitted.
+        """
+        if self.artists is None:
+            self._create_artists()
+        artists = self.artists
+
+        # Get data
+        ages = np.asarray(results["ages"])
+        asset_percentiles = results["asset_percentiles"]
+        spending_median = results["spending_percentiles"]["median"]
+
+        # Update assets, fan bands and spending
+        artists["p10"].set_data(ages, asset_percentiles["p10"])
+        artists["median"].set_data(ages, asset_percentiles["median"])
+        artists["p90"].set_data(ages, asset_percentiles["p90"])
+        self._set_vertices("outer_band", [band_vertices(ages, asset_percentiles["p5"], asset_percentiles["p95"])])
+        self._set_vertices("inner_band", [band_vertices(ages, asset_percentiles["p25"], asset_percentiles["p75"])])
+        self._set_vertices("spending", bar_vertices(ages, spending_median))
+
+        # Sample paths: only the stratified sample kept in the results is drawn
+        sampled = results.get("simulations", {}).get("assets")
+        self._set_vertices("paths", path_segments(ages, sampled) if sampled is not None and len(sampled) else [], closed=False)
+        artists["paths"].set_visible(self.show_paths)
+
+        # Vertical lines at the retirement and legal retirement ages
+        artists["retirement_line"].set_xdata([retirement_age, retirement_age])
+        artists["retirement_text"].set_x(retirement_age)
+        artists["retirement_text"].set_text(f'Retirement at {retirement_age}')
+        artists["pension_line"].set_xdata([legal_retirement_age, legal_retirement_age])
+        artists["pension_text"].set_x(legal_retirement_age)
+        artists["pension_text"].set_text(f'Pension at {legal_retirement_age}')
+
+        # Rescale only when needed; a rescale changes the ticks, so it needs a full redraw
+        x_limits = (ages[0] - 1, ages[-1] + 1)
+        asset_limits = fit_limits(self.ax.get_ylim(), min(np.min(asset_percentiles["p5"]), 0), np.max(asset_percentiles["p95"]))
+        spending_limits = fit_limits(self.spending_ax.get_ylim(), min(np.min(spending_median), 0), np.max(spending_median))
+        rescaled = (x_limits != self.ax.get_xlim() or asset_limits != self.ax.get_ylim()
+                    or spending_limits != self.spending_ax.get_ylim())
+
+        if rescaled or self.background is None:
+            self.ax.set_xlim(x_limits)
+            self.ax.set_ylim(asset_limits)
+            self.spending_ax.set_ylim(spending_limits)
+            self.figure.tight_layout()
+            self.canvas.draw_idle()
+            return True
+
+        self.blit()
+        return False
+
+    def save_image(self, target, **savefig_kwargs):
+        """Save the chart with its data, e.g. as PNG for a report"""
+        self.set_animated(False)
+        try:
+            self.figure.savefig(target, **savefig_kwargs)
+        finally:
+            # Printing redraws the figure at the export resolution, so the saved
+            # background no longer matches the screen
+            self.set_animated(True)
+            self.background = None
+            self.canvas.draw_idle()
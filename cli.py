@@ -0,0 +1,264 @@
+"""Command line interface for running simulations without the GUI.
+
+    python cli.py batch profiles/ -o summary.csv
+    python cli.py batch clients.jsonl -o summary.parquet --workers 8 --max-memory-mb 256
+    python cli.py sweep profile.json --axis intendedRetirementAge=58:66:9 --axis averageROI=0.05:0.09:5 -o grid.npz
+    python cli.py history returns.csv -o returns.npy
+
+Parameter sets use the same format as the files written by "Save Parameters".
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from engine import SimulationParams, bytes_per_run, summarize, sweep
+from history import convert_csv, describe_history
+
+
+SUMMARY_COLUMNS = [
+    "name", "runs", "seed", "success_probability",
+    "terminal_p10", "terminal_median", "terminal_p90", "terminal_mean",
+    "ruin_age_p10", "ruin_age_median", "ruin_age_p90",
+    "error"
+]
+
+
+class ProfileError(ValueError):
+    """A profile that could not be read; evaluate_profile reports it in the error column"""
+
+
+def read_profiles(source):
+    """Yield (name, params) pairs from a directory of JSON files, a JSONL file or "-" for stdin
+
+    JSONL lines may either be a parameter dict or {"name": ..., "params": {...}}.
+    A file or line that cannot be read or parsed yields a ProfileError in place
+    of its params, so one bad profile gives an error row instead of aborting the
+    batch.
+    """
+    if source != "-" and os.path.isdir(source):
+        for filename in sorted(os.listdir(source)):
+            if filename.endswith(".json"):
+                name = os.path.splitext(filename)[0]
+                try:
+                    with open(os.path.join(source, filename), 'r') as f:
+                        params = json.load(f)
+                except (OSError, json.JSONDecodeError) as e:
+                    params = ProfileError(f"Cannot read {filename}: {str(e)}")
+                yield name, params
+        return
+
+    stream = sys.stdin if source == "-" else open(source, 'r')
+    try:
+        if source.endswith(".json"):
+            try:
+                params = json.load(stream)
+            except json.JSONDecodeError as e:
+                params = ProfileError(f"Cannot read {source}: {str(e)}")
+            yield os.path.splitext(os.path.basename(source))[0], params
+            return
+
+        for line_number, line in enumerate(stream, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                profile = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield f"line {line_number}", ProfileError(f"Invalid JSON: {str(e)}")
+                continue
+            if not isinstance(profile, dict):
+                yield f"line {line_number}", ProfileError("Expected a JSON object")
+            elif "params" in profile:
+                yield profile.get("name", f"line {line_number}"), profile["params"]
+            else:
+                yield profile.get("name", f"line {line_number}"), profile
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+def evaluate_profile(task):
+    """Simulate one profile in a worker process and return its summary row"""
+    name, params, runs, seed, max_memory_mb = task
+    row = dict.fromkeys(SUMMARY_COLUMNS)
+    row["name"] = name
+
+    try:
+        if isinstance(params, ProfileError):
+            raise params
+        if runs is not None:
+            params = dict(params, simulationRuns=runs)
+        if seed is not None:
+            params = dict(params, seed=seed)
+        params = SimulationParams.from_dict(params)
+
+        chunk_runs = None
+        if max_memory_mb is not None:
+            chunk_runs = max_memory_mb * 2**20 // bytes_per_run(params)
+
+        summary = summarize(params, chunk_runs=chunk_runs)
+    except Exception as e:
+        row["error"] = str(e)
+        return row
+
+    terminal = summary["terminal_assets"]
+    ruin_age = summary["first_failure_age"]
+    row.update({
+        "runs": summary["runs"],
+        "seed": summary["seed"],
+        "success_probability": summary["success_probability"],
+        "terminal_p10": terminal["p10"],
+        "terminal_median": terminal["median"],
+        "terminal_p90": terminal["p90"],
+        "terminal_mean": terminal["mean"],
+        "ruin_age_p10": ruin_age["p10"],
+        "ruin_age_median": ruin_age["median"],
+        "ruin_age_p90": ruin_age["p90"],
+    })
+    return row
+
+
+def write_csv(rows, output):
+    """Write summary rows to a CSV file (or stdout for "-") as they arrive"""
+    f = sys.stdout if output == "-" else open(output, 'w', newline='')
+    try:
+        writer = csv.DictWriter(f, fieldnames=SUMMARY_COLUMNS)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+    finally:
+        if f is not sys.stdout:
+            f.close()
+
+
+def import_pyarrow():
+    """pyarrow and pyarrow.parquet, or exit with a hint if pyarrow is not installed"""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise SystemExit("Parquet output requires pyarrow (pip install pyarrow)")
+    return pa, pq
+
+
+def write_parquet(rows, output):
+    """Write summary rows to a Parquet file (requires pyarrow)"""
+    pa, pq = import_pyarrow()
+
+    columns = {column: [] for column in SUMMARY_COLUMNS}
+    for row in rows:
+        for column in SUMMARY_COLUMNS:
+            columns[column].append(row[column])
+
+    pq.write_table(pa.table(columns), output)
+
+
+def run_batch(args):
+    """Evaluate every profile across a process pool and write one summary row each"""
+    output_format = args.format
+    if output_format is None:
+        output_format = "parquet" if args.output.endswith(".parquet") else "csv"
+    if output_format == "parquet":
+        # Before simulating anything, so a missing pyarrow does not discard the batch
+        import_pyarrow()
+
+    tasks = [(name, params, args.runs, args.seed, args.max_memory_mb) for name, params in read_profiles(args.source)]
+    workers = args.workers or os.cpu_count() or 1
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # Hand out several profiles per round trip so that small profiles don't
+        # spend their time in inter-process overhead
+        chunksize = max(1, len(tasks) // (workers * 4))
+        rows = executor.map(evaluate_profile, tasks, chunksize=chunksize)
+
+        if output_format == "parquet":
+            write_parquet(rows, args.output)
+        else:
+            write_csv(rows, args.output)
+
+    print(f"Evaluated {len(tasks)} profiles", file=sys.stderr)
+
+
+def parse_axis(text):
+    """Parse a sweep axis of the form key=start:stop:steps"""
+    try:
+        key, value_range = text.split("=", 1)
+        start, stop, steps = value_range.split(":")
+        return key, np.linspace(float(start), float(stop), int(steps))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Expected key=start:stop:steps, got {text!r}")
+
+
+def run_sweep(args):
+    """Evaluate a parameter grid around one profile and save the N-dimensional results"""
+    with open(args.profile, 'r') as f:
+        params = json.load(f)
+    if args.runs is not None:
+        params["simulationRuns"] = args.runs
+    if args.seed is not None:
+        params["seed"] = args.seed
+
+    results = sweep(SimulationParams.from_dict(params), args.axis)
+
+    arrays = {"success_probability": results["success_probability"]}
+    for key, values in results["terminal_assets"].items():
+        arrays[f"terminal_{key}"] = values
+    for key, values in results["axes"]:
+        arrays[f"axis_{key}"] = np.asarray(values)
+    arrays["seed"] = np.asarray(results["seed"])
+    np.savez(args.output, **arrays)
+
+    print(f"Saved {results['success_probability'].shape} grid to {args.output} (seed {results['seed']})", file=sys.stderr)
+
+
+def run_history(args):
+    """Convert a CSV of yearly returns and inflation into a dataset for the bootstrap return models"""
+    path = convert_csv(args.csv, args.output)
+    stats = describe_history(path)
+    print(f"Saved {stats['years']} years to {path}: returns {stats['average_roi']:.2%} ± {stats['roi_volatility']:.2%}, "
+          f"inflation {stats['average_inflation']:.2%} ± {stats['inflation_volatility']:.2%}", file=sys.stderr)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="retirecalc", description="Early Retirement Monte Carlo Simulation")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    batch = subparsers.add_parser("batch", help="Summarize many parameter files across a process pool")
+    batch.add_argument("source", help="Directory of .json parameter files, a .jsonl file, or - for JSONL on stdin")
+    batch.add_argument("-o", "--output", default="-", help="Output file (.csv or .parquet), - for CSV on stdout")
+    batch.add_argument("--format", choices=["csv", "parquet"], help="Output format (default: from the file extension)")
+    batch.add_argument("--workers", type=int, help="Number of worker processes (default: CPU count)")
+    batch.add_argument("--runs", type=int, help="Override simulationRuns for every profile")
+    batch.add_argument("--seed", type=int, help="Seed for every profile (default: the profile's own seed, else random)")
+    batch.add_argument("--max-memory-mb", type=int, help="Bound the simulation memory per worker by running in chunks")
+    batch.set_defaults(func=run_batch)
+
+    grid = subparsers.add_parser("sweep", help="Evaluate success probability over a grid of parameter values")
+    grid.add_argument("profile", help="Base parameter file (.json)")
+    grid.add_argument("--axis", type=parse_axis, action="append", required=True,
+                      help="Swept parameter as key=start:stop:steps; repeat for each dimension")
+    grid.add_argument("-o", "--output", default="sweep.npz", help="Output .npz file")
+    grid.add_argument("--runs", type=int, help="Override simulationRuns (runs per grid cell)")
+    grid.add_argument("--seed", type=int, help="Override the profile's seed")
+    grid.set_defaults(func=run_sweep)
+
+    history = subparsers.add_parser("history", help="Convert a CSV of yearly returns and inflation for the bootstrap return models")
+    history.add_argument("csv", help="CSV with a return and an inflation column, one row per year")
+    history.add_argument("-o", "--output", help="Output .npy file (default: the CSV's name with .npy)")
+    history.set_defaults(func=run_history)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,1352 @@
+"""Headless Monte Carlo engine for the early retirement simulation.
+
+Only depends on NumPy, so it can be used from scripts, batch workers and tests
+without tkinter, matplotlib or reportlab. The Tk application in rc.py calls into
+this module for every simulation.
+"""
+import math
+from dataclasses import dataclass, replace
+
+import numpy as np
+
+from history import history_fingerprint, load_history
+from sketch import QuantileSketch, RunningMoments
+from timing import span
+
+
+# Bump whenever a change to the model changes results, so cached results are not reused
+ENGINE_VERSION = "2"
+
+DEFAULT_PERCENTILES = (10, 50, 90)
+
+# Runs per random stream. Run i always gets its shocks from block i // BLOCK_RUNS of
+# the seed, so results do not depend on how runs are split into chunks or workers.
+BLOCK_RUNS = 1024
+
+# Above this many runs (fewer in the monthly mode, see max_in_memory_runs), results
+# are computed by streaming chunks through quantile sketches instead of keeping
+# every path in memory
+MAX_IN_MEMORY_RUNS = 250000
+STREAMING_CHUNK_RUNS = 32 * BLOCK_RUNS
+SKETCH_CAPACITY = 4096
+
+# Bounds on the run count when simulating to a target standard error
+MIN_ADAPTIVE_RUNS = 4 * BLOCK_RUNS
+MAX_ADAPTIVE_RUNS = 2000 * BLOCK_RUNS
+
+# What run_monte_carlo keeps of the simulated paths in results["simulations"]: every
+# path, a stratified sample of representative paths, or none (statistics only)
+RETAIN_POLICIES = ("all", "sample", "none")
+DEFAULT_SAMPLE_PATHS = 100
+
+# Chunk size for interactive runs: small enough that a chunk takes a few
+# milliseconds, so progress updates are smooth and cancelling is immediate
+INTERACTIVE_CHUNK_RUNS = 4 * BLOCK_RUNS
+
+# Parameter dict keys (as used in saved JSON files and scenarios) by dataclass field
+PARAM_KEYS = {
+    "current_age": "currentAge",
+    "legal_retirement_age": "legalRetirementAge",
+    "fixed_monthly_pension": "fixedMonthlyPension",
+    "current_assets": "currentAssets",
+    "capital_gains_tax_rate": "capitalGainsTaxRate",
+    "annual_savings": "annualSavings",
+    "intended_retirement_age": "intendedRetirementAge",
+    "average_roi": "averageROI",
+    "average_inflation": "averageInflation",
+    "roi_volatility": "ROI_volatility",
+    "inflation_volatility": "inflation_volatility",
+    "monthly_expenses": "monthlyExpenses",
+    "annual_expenses": "annualExpenses",
+    "simulation_runs": "simulationRuns",
+    "simulation_end_age": "simulationEndAge",
+}
+
+INT_FIELDS = {"current_age", "legal_retirement_age", "intended_retirement_age", "simulation_runs", "simulation_end_age"}
+
+# Simulation steps per year by time step. Results always have one point per year;
+# the monthly mode steps returns, inflation and cash flows month by month.
+TIME_STEPS = {"annual": 1, "monthly": 12}
+
+# How ROI and inflation shocks are drawn: independent normals, or resampled years of
+# a historical dataset (see history.py) with a stationary or moving block bootstrap
+RETURN_MODELS = ("normal", "stationary", "moving")
+DEFAULT_BLOCK_LENGTH = 5.0
+
+
+def validate_params_structure(params):
+    """Validate the structure of a parameter dict"""
+    for field in PARAM_KEYS.values():
+        if field not in params:
+            raise ValueError(f"Missing required field: {field}")
+
+    for expense_type in ["monthlyExpenses", "annualExpenses"]:
+        if not isinstance(params[expense_type], dict):
+            raise ValueError(f"{expense_type} must be a dictionary")
+
+
+@dataclass(frozen=True)
+class SimulationParams:
+    """Simulation inputs; rates are fractions (0.08 for 8%), amounts are in €"""
+    current_age: int
+    legal_retirement_age: int
+    fixed_monthly_pension: float
+    current_assets: float
+    capital_gains_tax_rate: float
+    annual_savings: float
+    intended_retirement_age: int
+    average_roi: float
+    average_inflation: float
+    roi_volatility: float
+    inflation_volatility: float
+    monthly_expenses: dict
+    annual_expenses: dict
+    simulation_runs: int
+    simulation_end_age: int
+    seed: int = None
+    target_standard_error: float = None
+    time_step: str = "annual"
+    return_model: str = "normal"
+    history_path: str = None
+    block_length: float = DEFAULT_BLOCK_LENGTH
+    roi_inflation_correlation: float = 0.0
+
+    @classmethod
+    def from_dict(cls, params):
+        """Create from a parameter dict in the saved-file format"""
+        validate_params_structure(params)
+
+        # The seed is optional; without one every run draws fresh random numbers
+        seed = params.get("seed")
+        values = {"seed": int(seed) if seed not in (None, "") else None}
+
+        # Optional as well; when set, runs are added until the success probability
+        # reaches this standard error and simulationRuns is ignored
+        target = params.get("targetStandardError")
+        values["target_standard_error"] = float(target) if target not in (None, "") else None
+
+        # Files saved before the monthly mode existed simulate annually
+        time_step = params.get("timeStep") or "annual"
+        if time_step not in TIME_STEPS:
+            raise ValueError(f"Unknown time step: {time_step}")
+        values["time_step"] = time_step
+
+        # Likewise for the return model; the bootstrap models need a dataset
+        return_model = params.get("returnModel") or "normal"
+        if return_model not in RETURN_MODELS:
+            raise ValueError(f"Unknown return model: {return_model}")
+        values["return_model"] = return_model
+        values["history_path"] = params.get("historyPath") or None
+        values["block_length"] = float(params.get("blockLength") or DEFAULT_BLOCK_LENGTH)
+        if return_model != "normal" and values["history_path"] is None:
+            raise ValueError("The bootstrap return models need a historical dataset")
+        if values["block_length"] < 1:
+            raise ValueError("The block length must be at least one year")
+
+        # Independent ROI and inflation unless a correlation is given
+        values["roi_inflation_correlation"] = float(params.get("ROI_inflation_correlation") or 0.0)
+        if not -1 <= values["roi_inflation_correlation"] <= 1:
+            raise ValueError("The ROI/inflation correlation must be between -1 and 1")
+        for name, key in PARAM_KEYS.items():
+            value = params[key]
+            if name in INT_FIELDS:
+                value = int(value)
+            elif isinstance(value, dict):
+                value = {category: float(amount) for category, amount in value.items()}
+            else:
+                value = float(value)
+            values[name] = value
+
+        return cls(**values)
+
+    def to_dict(self):
+        """Convert to a parameter dict in the saved-file format"""
+        params = {}
+        for name, key in PARAM_KEYS.items():
+            value = getattr(self, name)
+            params[key] = dict(value) if isinstance(value, dict) else value
+        params["seed"] = self.seed
+        params["targetStandardError"] = self.target_standard_error
+        params["timeStep"] = self.time_step
+        params["returnModel"] = self.return_model
+        params["historyPath"] = self.history_path
+        params["blockLength"] = self.block_length
+        params["ROI_inflation_correlation"] = self.roi_inflation_correlation
+        return params
+
+    @property
+    def ages(self):
+        """Ages covered by the simulation, one per simulated year"""
+        return list(range(self.current_age, self.simulation_end_age + 1))
+
+    @property
+    def num_years(self):
+        return max(self.simulation_end_age - self.current_age + 1, 0)
+
+    @property
+    def steps_per_year(self):
+        return TIME_STEPS[self.time_step]
+
+    @property
+    def num_steps(self):
+        """Number of simulated steps (months in the monthly mode)"""
+        return self.num_years * self.steps_per_year
+
+    @property
+    def num_accumulation(self):
+        """Number of leading years before retirement"""
+        return min(max(self.intended_retirement_age - self.current_age, 0), self.num_years)
+
+    @property
+    def inflation_correlation(self):
+        """Correlation applied to the inflation shocks; bootstrapped years keep their historical one"""
+        return self.roi_inflation_correlation if self.return_model == "normal" else 0.0
+
+    @property
+    def annual_expense(self):
+        """Total expenses for the first year of retirement"""
+        return sum(self.monthly_expenses.values()) * 12 + sum(self.annual_expenses.values())
+
+
+@dataclass
+class Shocks:
+    """Standardized ROI and inflation shocks, (runs x steps) each
+
+    Standard normal, or standardized historical rates under a bootstrap return model.
+
+    Stored column-major so that one step's shocks across all runs are contiguous.
+    Column j is the shock for the j-th simulated step (a year, or a month in the
+    monthly mode), whatever phase it falls in.
+    """
+    roi: np.ndarray
+    inflation: np.ndarray
+    seed: int = None
+
+    @property
+    def runs(self):
+        return self.roi.shape[0]
+
+    @property
+    def steps(self):
+        return self.roi.shape[1]
+
+
+def resolve_seed(seed=None):
+    """Return seed, or a fresh random one if it is None, so every run can be reproduced"""
+    if seed is None:
+        return int(np.random.SeedSequence().generate_state(1)[0])
+    return int(seed)
+
+
+def block_generator(seed, block):
+    """Independent generator for one block of runs (the block-th child of SeedSequence(seed).spawn)"""
+    return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(block,)))
+
+
+def draw_shocks(runs, steps, seed, start=0):
+    """Draw standard normal ROI and inflation shocks for runs start .. start + runs - 1
+
+    Every block of BLOCK_RUNS runs is drawn in full from its own child stream of the
+    seed, so a run's shocks are bit-identical however the runs are chunked.
+    """
+    # Filled step-major and transposed, which makes the (runs x steps) result column-major
+    roi = np.empty((steps, runs))
+    inflation = np.empty((steps, runs))
+    # Every block is drawn into the same buffer, which stays in cache
+    draws = np.empty((2, steps, BLOCK_RUNS))
+
+    stop = start + runs
+    for block in range(start // BLOCK_RUNS, (stop - 1) // BLOCK_RUNS + 1 if runs else 0):
+        block_start = block * BLOCK_RUNS
+        first = max(start, block_start)
+        last = min(stop, block_start + BLOCK_RUNS)
+
+        block_generator(seed, block).standard_normal(out=draws)
+        roi[:, first - start:last - start] = draws[0, :, first - block_start:last - block_start]
+        inflation[:, first - start:last - start] = draws[1, :, first - block_start:last - block_start]
+
+    return Shocks(roi.T, inflation.T, seed)
+
+
+def bootstrap_indices(rng, periods, years, runs, method, block_length):
+    """(years x runs) row indices into a history of periods years, resampled in blocks
+
+    "stationary" is the stationary bootstrap of Politis and Romano: every year
+    starts a new block at a random year with probability 1 / block_length and
+    otherwise continues the current one, wrapping around the end of the history.
+    "moving" concatenates blocks of block_length consecutive years that start
+    anywhere they fit. Both keep runs of bad years and the co-movement of the two
+    series, and build each year's indices for all runs at once.
+    """
+    if method == "stationary":
+        # One uniform per year and run decides whether a block starts there (below
+        # 1 / block_length) and, scaled up, where: below the threshold it is uniform again
+        u = rng.random((years, runs))
+        starts = (u * (periods * block_length)).astype(np.intp)
+        np.minimum(starts, periods - 1, out=starts)
+
+        index = np.empty((years, runs), dtype=np.intp)
+        index[0] = u[0] * periods
+        for j in range(1, years):
+            following = index[j - 1] + 1
+            following[following == periods] = 0
+            index[j] = np.where(u[j] < 1 / block_length, starts[j], following)
+        return index
+
+    if method == "moving":
+        length = min(max(int(round(block_length)), 1), periods)
+        starts = rng.integers(0, periods - length + 1, (-(-years // length), runs))
+        offsets = np.arange(years) % length
+        return np.repeat(starts, length, axis=0)[:years] + offsets[:, np.newaxis]
+
+    raise ValueError(f"Unknown bootstrap method: {method}")
+
+
+def draw_bootstrap_shocks(history, method, block_length, runs, steps, seed, start=0, steps_per_year=1):
+    """Shocks for runs start .. start + runs - 1 from block-bootstrapped years of a history
+
+    history is a (years x 2) array of returns and inflation, typically memory-mapped
+    (see history.load_history): only the sampled rows are read. The rates are
+    standardized with the history's own mean and volatility, so the simulation keeps
+    their shape (crashes, runs of bad years, joint moves of returns and inflation)
+    at the parameters' mean and volatility. With several steps per year a sampled
+    year is split into steps by a Brownian bridge: the steps' shocks add up to the
+    year's and, like normal draws, have unit variance. Blocks of runs use the same
+    child streams as draw_shocks, so chunking does not change the result.
+    """
+    mean = history.mean(axis=0)
+    std = history.std(axis=0)
+    std[std == 0] = 1
+
+    years = -(-steps // steps_per_year)
+    roi = np.empty((steps, runs))
+    inflation = np.empty((steps, runs))
+    # Gathering from one column at a time reads the memory map much faster than whole rows
+    series = [(history[:, column], mean[column], std[column], shocks) for column, shocks in enumerate((roi, inflation))]
+
+    stop = start + runs
+    for block in range(start // BLOCK_RUNS, (stop - 1) // BLOCK_RUNS + 1 if runs else 0):
+        block_start = block * BLOCK_RUNS
+        first = max(start, block_start)
+        last = min(stop, block_start + BLOCK_RUNS)
+
+        rng = block_generator(seed, block)
+        index = bootstrap_indices(rng, len(history), years, BLOCK_RUNS, method, block_length)
+        index = index[:, first - block_start:last - block_start]
+
+        for values, series_mean, series_std, shocks in series:
+            sampled = values[index]
+            sampled -= series_mean
+            sampled /= series_std
+
+            if steps_per_year > 1:
+                # Zero-sum noise within each year on top of an even share of its shock
+                noise = rng.standard_normal((years, steps_per_year, BLOCK_RUNS))[:, :, first - block_start:last - block_start]
+                noise -= noise.mean(axis=1, keepdims=True)
+                noise += sampled[:, np.newaxis] / math.sqrt(steps_per_year)
+                sampled = noise.reshape(years * steps_per_year, last - first)[:steps]
+
+            shocks[:, first - start:last - start] = sampled
+
+    return Shocks(roi.T, inflation.T, seed)
+
+
+def draw_model_shocks(params, runs, seed, start=0, steps=None):
+    """Shocks for runs start .. start + runs - 1 under params' return model
+
+    steps defaults to the steps params simulates.
+    """
+    steps = params.num_steps if steps is None else steps
+    if params.return_model == "normal":
+        return draw_shocks(runs, steps, seed, start)
+    return draw_bootstrap_shocks(load_history(params.history_path), params.return_model, params.block_length,
+                                 runs, steps, seed, start, params.steps_per_year)
+
+
+def step_rates(average, volatility, steps_per_year):
+    """Mean and volatility per step of an annual rate with the given mean and volatility
+
+    The mean compounds to the annual one and the volatility scales with the square
+    root of time, as for independent steps.
+    """
+    if steps_per_year == 1:
+        return average, volatility
+    return (1 + average) ** (1 / steps_per_year) - 1, volatility / math.sqrt(steps_per_year)
+
+
+def correlated_shocks(roi, inflation, correlation):
+    """Inflation shocks with the given correlation to the ROI shocks
+
+    The second row of the Cholesky factor of [[1, rho], [rho, 1]] applied to the
+    independent (ROI, inflation) pairs, for whole arrays at once; the ROI shocks
+    (its first row) stay as they are. Returns inflation itself if rho is 0.
+    """
+    if not correlation:
+        return inflation
+    correlated = roi * correlation
+    correlated += inflation * math.sqrt(1 - correlation ** 2)
+    return correlated
+
+
+def inflation_factors(params, shocks, first_step):
+    """Inflation factors per step from first_step to the end of the simulation (runs x steps)
+
+    With the joint distribution of ROI and inflation given by their volatilities and
+    params.inflation_correlation.
+    """
+    average_inflation, inflation_volatility = step_rates(params.average_inflation, params.inflation_volatility, params.steps_per_year)
+    inflation = correlated_shocks(shocks.roi[:, first_step:params.num_steps], shocks.inflation[:, first_step:params.num_steps],
+                                  params.inflation_correlation) * inflation_volatility
+    inflation += 1 + average_inflation
+    return inflation
+
+
+def yearly_tax_factor(year_growth, keep_after_tax, steps_per_year):
+    """Factor on each step's growth that charges capital gains tax on the year's return
+
+    Like in the annual mode only a positive yearly return is taxed, so losing months
+    offset gaining ones; spreading the tax evenly keeps the shape of the year's path.
+    """
+    gained = year_growth > 1
+    taxed = np.where(gained, (1 + (year_growth - 1) * keep_after_tax) / np.where(gained, year_growth, 1), 1.0)
+    return taxed ** (1 / steps_per_year)
+
+
+def growth_factors(params, shocks):
+    """After-tax growth factors per step (runs x steps), column-major
+
+    Capital gains tax is only applied to positive returns (taxing a negative return
+    would make it larger, so the smaller one is right). In the monthly mode it is
+    charged on each year's compounded return (see yearly_tax_factor).
+    """
+    steps_per_year = params.steps_per_year
+    average_roi, roi_volatility = step_rates(params.average_roi, params.roi_volatility, steps_per_year)
+
+    if steps_per_year == 1:
+        # Step by step, so each column stays in cache through all of its passes
+        keep_after_tax = 1 - params.capital_gains_tax_rate
+        growth = np.empty((shocks.runs, params.num_steps), order="F")
+        taxed = np.empty(shocks.runs)
+        for step in range(params.num_steps):
+            column = growth[:, step]
+            np.multiply(shocks.roi[:, step], roi_volatility, out=column)
+            column += average_roi
+            np.multiply(column, keep_after_tax, out=taxed)
+            np.minimum(column, taxed, out=column)
+            column += 1
+        return growth
+
+    growth = shocks.roi[:, :params.num_steps] * roi_volatility
+    growth += average_roi
+    growth += 1
+    # (runs x steps per year x years) view of the column-major factors
+    by_year = growth.reshape((shocks.runs, steps_per_year, params.num_years), order="F")
+    by_year *= yearly_tax_factor(by_year.prod(axis=1), 1 - params.capital_gains_tax_rate, steps_per_year)[:, np.newaxis, :]
+    return growth
+
+
+def accumulate(params, growth, asset, start=0, stop=None, assets=None):
+    """Advance asset in place through accumulation years start .. stop - 1
+
+    stop defaults to the retirement year; each year's value is written to the
+    matching column of assets if given. Savings are paid in with every step.
+    """
+    steps_per_year = params.steps_per_year
+    savings = params.annual_savings / steps_per_year
+    for j in range(start, params.num_accumulation if stop is None else stop):
+        for step in range(j * steps_per_year, (j + 1) * steps_per_year):
+            asset *= growth[:, step]
+            asset += savings
+        if assets is not None:
+            assets[:, j] = asset
+
+
+def distribute(params, growth, shocks, asset, assets=None, spendings=None, failed=None):
+    """Advance asset in place from retirement to the end of the simulation
+
+    Writes each year's assets and monthly spending to assets and spendings if given,
+    and marks runs whose assets drop below zero in the boolean array failed.
+
+    Pension and expenses are paid and expenses inflate with every step. Runs are
+    advanced together one step at a time, which beats cumulative products over a
+    year's steps on memory traffic. A year in which a run's assets dropped below
+    zero at any step records its lowest value, so ruin within a year shows in the
+    yearly assets (and first_failure_index) even if the year ends above zero.
+    """
+    steps_per_year = params.steps_per_year
+    num_accumulation = params.num_accumulation
+    first_step = num_accumulation * steps_per_year
+    ages = params.ages
+
+    inflation = inflation_factors(params, shocks, first_step)
+
+    expense = np.full(len(asset), params.annual_expense / steps_per_year)
+    pension = params.fixed_monthly_pension * 12 / steps_per_year
+    spent = np.empty(len(asset))
+    lowest = np.empty(len(asset))
+
+    if steps_per_year == 1:
+        # One step per year: the year's spending is the step's expense and its
+        # lowest assets are its closing assets
+        for j in range(num_accumulation, params.num_years):
+            asset *= growth[:, j]
+            if ages[j] >= params.legal_retirement_age:
+                asset += pension
+            asset -= expense
+            if assets is not None:
+                np.copyto(assets[:, j], asset)
+            if spendings is not None:
+                np.divide(expense, 12, out=spendings[:, j])  # Monthly spending
+            if failed is not None:
+                failed |= asset < 0
+            expense *= inflation[:, j - first_step]
+        return
+
+    for j in range(num_accumulation, params.num_years):
+        income = pension if ages[j] >= params.legal_retirement_age else 0
+        spent[:] = 0
+        lowest[:] = np.inf
+        for step in range(j * steps_per_year, (j + 1) * steps_per_year):
+            asset *= growth[:, step]
+            asset += income
+            asset -= expense
+            np.minimum(lowest, asset, out=lowest)
+            spent += expense
+            expense *= inflation[:, step - first_step]
+        if assets is not None:
+            np.copyto(assets[:, j], asset)
+            np.copyto(assets[:, j], lowest, where=lowest < 0)
+        if spendings is not None:
+            np.divide(spent, 12, out=spendings[:, j])  # Monthly spending
+        if failed is not None:
+            failed |= lowest < 0
+
+
+# Fields that, with the seed and run range, determine everything up to retirement
+ACCUMULATION_FIELDS = (
+    "current_age", "simulation_end_age", "current_assets", "annual_savings", "intended_retirement_age",
+    "average_roi", "roi_volatility", "capital_gains_tax_rate", "time_step",
+    "return_model", "history_path", "block_length",
+)
+
+
+@dataclass
+class AccumulationState:
+    """Shocks, growth factors and accumulation-phase assets of a block of runs
+
+    Shared by all parameter sets that only differ after retirement; treat as read-only.
+    """
+    shocks: Shocks
+    growth: np.ndarray
+    assets: np.ndarray  # (runs x accumulation years)
+
+    @property
+    def nbytes(self):
+        return self.shocks.roi.nbytes + self.shocks.inflation.nbytes + self.growth.nbytes + self.assets.nbytes
+
+
+def accumulation_key(params, seed, start, runs):
+    """Hashable key of the accumulation state for runs start .. start + runs - 1"""
+    key = (seed, start, runs) + tuple(getattr(params, field) for field in ACCUMULATION_FIELDS)
+    if params.return_model != "normal":
+        key += (history_fingerprint(params.history_path),)
+    return key
+
+
+def accumulation_state(params, shocks):
+    """Simulate the accumulation phase for the given shocks"""
+    growth = growth_factors(params, shocks)
+    assets = np.empty((shocks.runs, params.num_accumulation), order="F")
+    accumulate(params, growth, np.full(shocks.runs, params.current_assets), assets=assets)
+    return AccumulationState(shocks, growth, assets)
+
+
+def load_accumulation(params, seed, start, runs, cache=None):
+    """Accumulation state for runs start .. start + runs - 1 of the seed, from cache if given"""
+    if cache is not None:
+        return cache.get(params, seed, start, runs)
+    return accumulation_state(params, draw_model_shocks(params, runs, seed, start))
+
+
+def simulate_from(params, state):
+    """Simulate the distribution phase on top of an accumulation state
+
+    Returns the (runs x years) asset and monthly spending arrays, column-major.
+    """
+    runs = state.shocks.runs
+    num_accumulation = params.num_accumulation
+
+    assets = np.empty((runs, params.num_years), order="F")
+    spendings = np.zeros((runs, params.num_years), order="F")
+    assets[:, :num_accumulation] = state.assets
+    asset = state.assets[:, -1].copy() if num_accumulation else np.full(runs, params.current_assets)
+
+    distribute(params, state.growth, state.shocks, asset, assets, spendings)
+    return assets, spendings
+
+
+def simulate(params, shocks):
+    """Advance every run together one step at a time
+
+    Returns the (runs x years) asset and monthly spending arrays, column-major.
+    """
+    return simulate_from(params, accumulation_state(params, shocks))
+
+
+def percentile_key(q):
+    """Result key for a percentile: "median" for the 50th, otherwise "p10", "p90", ..."""
+    return "median" if q == 50 else f"p{q:g}"
+
+
+def calculate_percentiles(values, percentiles=DEFAULT_PERCENTILES):
+    """Calculate the requested percentiles, mean and std for each year of a (runs x years) array"""
+    num_values = values.shape[0]
+
+    # Positions of the requested percentiles (linear interpolation between order statistics)
+    positions = np.asarray(percentiles, dtype=float) / 100 * (num_values - 1)
+    lower = np.floor(positions).astype(int)
+    upper = np.minimum(lower + 1, num_values - 1)
+    fraction = positions - lower
+    kth = np.union1d(lower, upper)
+
+    # Each year's values across runs are contiguous in the transposed view of a
+    # column-major array. Partial selection wins for one or two order statistics;
+    # beyond that NumPy's vectorized full sort is faster than a multi-kth partition.
+    by_year = values.T
+    if len(kth) <= 2:
+        ordered = np.partition(by_year, kth, axis=1)
+    else:
+        ordered = np.sort(by_year, axis=1)
+
+    quantiles = ordered[:, lower] + (ordered[:, upper] - ordered[:, lower]) * fraction
+
+    result = {percentile_key(q): quantiles[:, i].tolist() for i, q in enumerate(percentiles)}
+    # Year by year, so each year's values stay in cache for the passes over them
+    result["mean"] = [float(year.mean()) for year in by_year]
+    result["std"] = [float(year.std()) for year in by_year]
+
+    return result
+
+
+def summarize_values(values, percentiles=DEFAULT_PERCENTILES):
+    """Percentiles, mean and std of a 1-D array as plain floats (all None if it is empty)"""
+    if len(values) == 0:
+        return {key: None for key in [percentile_key(q) for q in percentiles] + ["mean", "std"]}
+
+    summary = calculate_percentiles(np.asarray(values, dtype=float)[:, np.newaxis], percentiles)
+    return {key: values_by_year[0] for key, values_by_year in summary.items()}
+
+
+def first_failure_index(assets, num_accumulation):
+    """Year index at which each run's assets first drop below zero after retirement, -1 if never"""
+    below_zero = assets[:, num_accumulation:] < 0
+    failed = below_zero.any(axis=1)
+
+    first_failure = np.full(assets.shape[0], -1)
+    first_failure[failed] = below_zero[failed].argmax(axis=1) + num_accumulation
+    return first_failure
+
+
+def calculate_statistics(assets, spendings, ages, num_accumulation, percentiles=DEFAULT_PERCENTILES, first_failure=None):
+    """Calculate per-year percentiles, mean and std of assets and spending plus ruin statistics
+
+    assets and spendings are (runs x years) arrays; num_accumulation is the number of
+    leading years before retirement, which do not count towards failure.
+    """
+    num_simulations = assets.shape[0]
+
+    # A run fails if its assets drop below zero at any point after retirement
+    if first_failure is None:
+        first_failure = first_failure_index(assets, num_accumulation)
+    first_failure = first_failure[first_failure >= 0]
+    failure_count = len(first_failure)
+
+    # Share of runs that have failed by each age
+    ruined_by_age = np.cumsum(np.bincount(first_failure, minlength=len(ages)))
+
+    return {
+        "ages": list(ages),
+        "success_probability": (num_simulations - failure_count) / num_simulations,
+        "asset_percentiles": calculate_percentiles(assets, percentiles),
+        "spending_percentiles": calculate_percentiles(spendings, percentiles),
+        "ruin_probability_by_age": (ruined_by_age / num_simulations).tolist(),
+        "first_failure_age": summarize_values(np.asarray(ages)[first_failure], percentiles)
+    }
+
+
+def stratified_sample(terminal_assets, count, weights=None):
+    """Indices of count runs spread evenly over the distribution of terminal assets
+
+    Picks the runs at the midpoints of count equal-probability strata, so the sample
+    ranges from the worst to the best outcomes in proportion. weights, if given, is
+    the number of runs each entry stands for.
+    """
+    order = np.argsort(terminal_assets, kind="stable")
+    if weights is None:
+        weights = np.ones(len(order))
+
+    cumulative = np.cumsum(np.asarray(weights, dtype=float)[order])
+    targets = (np.arange(count) + 0.5) / count * cumulative[-1]
+    positions = np.minimum(np.searchsorted(cumulative, targets), len(order) - 1)
+    return order[np.unique(positions)]
+
+
+def retained_paths(assets, spendings, failed, retain="all", sample_paths=DEFAULT_SAMPLE_PATHS, dtype=np.float64):
+    """The per-run arrays kept in results["simulations"] under a retention policy
+
+    The failure mask (one byte per run, needed for paired comparisons) is always
+    kept; paths are stored as contiguous arrays of the given dtype.
+    """
+    if retain not in RETAIN_POLICIES:
+        raise ValueError(f"Unknown retention policy: {retain}")
+
+    simulations = {"failed": failed}
+    if retain == "all":
+        simulations["assets"] = assets.astype(dtype, copy=False)
+        simulations["spendings"] = spendings.astype(dtype, copy=False)
+    elif retain == "sample":
+        index = stratified_sample(assets[:, -1], sample_paths)
+        simulations["run_index"] = index
+        simulations["assets"] = np.ascontiguousarray(assets[index], dtype=dtype)
+        simulations["spendings"] = np.ascontiguousarray(spendings[index], dtype=dtype)
+    return simulations
+
+
+def success_standard_error(successes, runs):
+    """Standard error of a success probability estimated from runs trials
+
+    Uses the Agresti-Coull estimate (two added successes and failures), which stays
+    positive when every run so far succeeded or failed.
+    """
+    p = (successes + 2) / (runs + 4)
+    return float(np.sqrt(p * (1 - p) / (runs + 4)))
+
+
+def run_monte_carlo(params, percentiles=DEFAULT_PERCENTILES, shocks=None, retain="all",
+                    sample_paths=DEFAULT_SAMPLE_PATHS, dtype=np.float64, accumulation_cache=None):
+    """Run a full simulation for a SimulationParams and return the result dict
+
+    Pass shocks to reuse an existing shock matrix (common random numbers); its run
+    count then takes the place of params.simulation_runs. retain, sample_paths and
+    dtype control which paths are kept in results["simulations"] (see retained_paths).
+    With an accumulation_cache (see cache.AccumulationCache), parameter sets that
+    only differ after retirement reuse the shocks and accumulation phase.
+    """
+    if shocks is None:
+        state = load_accumulation(params, resolve_seed(params.seed), 0, params.simulation_runs, accumulation_cache)
+        shocks = state.shocks
+    else:
+        state = accumulation_state(params, shocks)
+    assets, spendings = simulate_from(params, state)
+    first_failure = first_failure_index(assets, params.num_accumulation)
+
+    with span("stats"):
+        results = calculate_statistics(assets, spendings, params.ages, params.num_accumulation, percentiles, first_failure)
+    results["simulations"] = retained_paths(assets, spendings, first_failure >= 0, retain, sample_paths, dtype)
+    results["runs"] = shocks.runs
+    results["success_standard_error"] = success_standard_error(int(np.count_nonzero(first_failure < 0)), shocks.runs)
+    results["seed"] = shocks.seed
+
+    return results
+
+
+def shared_shock_spec(params_list, seed=None):
+    """(runs, steps, seed) of one shock matrix large enough to drive every given scenario
+
+    Uses the first scenario's seed unless one is given. draw_shocks(*spec) always
+    returns the same matrix, so worker processes can redraw it from the spec (with
+    draw_model_shocks for scenarios on a bootstrap return model).
+    """
+    runs = max(params.simulation_runs for params in params_list)
+    steps = max(params.num_steps for params in params_list)
+    return runs, steps, resolve_seed(seed if seed is not None else params_list[0].seed)
+
+
+def simulate_scenario(params, shared_spec=None, percentiles=DEFAULT_PERCENTILES, sample_paths=DEFAULT_SAMPLE_PATHS,
+                      dtype=np.float64):
+    """Results for one scenario of a comparison; a module-level function for process pools
+
+    With shared_spec (see shared_shock_spec) the scenario runs on the common random
+    numbers, which the worker redraws instead of receiving, and only the failure
+    mask is kept. Otherwise it runs on its own seed like an interactive simulation.
+    Either way it streams when it has too many runs to hold in memory (or, on its
+    own seed, a precision target).
+    """
+    if shared_spec is not None:
+        runs, steps, seed = shared_spec
+        if runs <= max_in_memory_runs(params):
+            return run_monte_carlo(params, percentiles, shocks=draw_model_shocks(params, runs, seed, steps=steps), retain="none")
+
+        params = replace(params, simulation_runs=runs, seed=seed, target_standard_error=None)
+        for run in iter_chunks(params, percentiles, sample_paths=0, shock_steps=steps, keep_failures=True):
+            pass
+        return run.results()
+
+    if params.target_standard_error or params.simulation_runs > max_in_memory_runs(params):
+        for run in iter_chunks(params, percentiles, target_standard_error=params.target_standard_error,
+                               sample_paths=sample_paths, dtype=dtype):
+            pass
+        return run.results()
+
+    return run_monte_carlo(params, percentiles, retain="sample", sample_paths=sample_paths, dtype=dtype)
+
+
+def success_difference(results, reference_results, paired, z=1.96):
+    """Difference in success probability to a reference scenario and its confidence half-width
+
+    With paired=True (both simulated from the same shocks) the standard error comes
+    from the per-run differences of the failure masks in results["simulations"];
+    otherwise the two samples are treated as independent.
+    """
+    p = results["success_probability"]
+    q = reference_results["success_probability"]
+
+    if paired:
+        differences = reference_results["simulations"]["failed"].astype(float) - results["simulations"]["failed"]
+        standard_error = differences.std(ddof=1) / np.sqrt(len(differences)) if len(differences) > 1 else 0.0
+    else:
+        standard_error = np.sqrt(p * (1 - p) / results["runs"] + q * (1 - q) / reference_results["runs"])
+
+    return float(p - q), float(z * standard_error)
+
+
+def bytes_per_run(params):
+    """Approximate peak memory needed per simulated run (shocks, growth factors and paths)"""
+    return (4 * params.num_steps + 2 * params.num_years) * np.dtype(float).itemsize
+
+
+def max_in_memory_runs(params):
+    """Run count above which params is simulated by streaming, scaled down for monthly steps"""
+    return MAX_IN_MEMORY_RUNS // params.steps_per_year
+
+
+def histogram_summary(values, counts, percentiles=DEFAULT_PERCENTILES):
+    """Percentiles (inverse CDF), mean and std of discrete values given their counts"""
+    total = counts.sum()
+    if total == 0:
+        return {key: None for key in [percentile_key(q) for q in percentiles] + ["mean", "std"]}
+
+    cumulative = np.cumsum(counts)
+    summary = {
+        percentile_key(q): float(values[min(np.searchsorted(cumulative, q / 100 * total), len(values) - 1)])
+        for q in percentiles
+    }
+    mean = (values * counts).sum() / total
+    summary["mean"] = float(mean)
+    summary["std"] = float(np.sqrt((counts * (values - mean) ** 2).sum() / total))
+    return summary
+
+
+def sketch_summary(sketch, moments, percentiles=DEFAULT_PERCENTILES):
+    """Per-year percentile lists from a QuantileSketch plus mean and std from RunningMoments"""
+    quantiles = sketch.quantile(percentiles)
+    summary = {percentile_key(q): quantiles[i].tolist() for i, q in enumerate(percentiles)}
+    summary["mean"] = moments.mean.tolist()
+    summary["std"] = moments.std.tolist()
+    return summary
+
+
+class StreamingRun:
+    """Chunk-by-chunk simulation of one parameter set in bounded memory
+
+    Each step() simulates the next runs of the seed's stream and folds them into
+    per-year quantile sketches plus exact moments and failure counts; results() can
+    be called at any point for the statistics of the runs so far. A stratified
+    sample of sample_paths paths (0 for none) is maintained across chunks.
+
+    shock_steps draws every chunk's shocks with that many steps, the way a shared
+    shock spec does, so the runs match those of the other scenarios it names.
+    keep_failures keeps the failure mask of every run for paired comparisons.
+    """
+
+    def __init__(self, params, percentiles=DEFAULT_PERCENTILES, sketch_capacity=SKETCH_CAPACITY,
+                 sample_paths=DEFAULT_SAMPLE_PATHS, dtype=np.float64, accumulation_cache=None,
+                 shock_steps=None, keep_failures=False):
+        self.params = params
+        self.accumulation_cache = accumulation_cache
+        self.shock_steps = shock_steps
+        self.failed = [] if keep_failures else None
+        self.percentiles = percentiles
+        self.seed = resolve_seed(params.seed)
+        self.runs = 0
+        self.sample_paths = sample_paths
+        self.dtype = dtype
+        self.sample = None
+
+        years = params.num_years
+        self.asset_sketch = QuantileSketch(years, sketch_capacity, self.seed)
+        self.spending_sketch = QuantileSketch(years, sketch_capacity, self.seed)
+        self.asset_moments = RunningMoments(years)
+        self.spending_moments = RunningMoments(years)
+        self.failures_by_year = np.zeros(years, dtype=np.int64)
+
+    def step(self, runs):
+        """Simulate the next runs paths"""
+        years = self.params.num_years
+        if self.shock_steps is None:
+            state = load_accumulation(self.params, self.seed, self.runs, runs, self.accumulation_cache)
+        else:
+            state = accumulation_state(self.params, draw_model_shocks(self.params, runs, self.seed, self.runs, self.shock_steps))
+        assets, spendings = simulate_from(self.params, state)
+        self.runs += runs
+
+        with span("stats"):
+            self.asset_sketch.update(assets)
+            self.spending_sketch.update(spendings)
+            self.asset_moments.update(assets)
+            self.spending_moments.update(spendings)
+
+            first_failure = first_failure_index(assets, self.params.num_accumulation)
+            self.failures_by_year += np.bincount(first_failure[first_failure >= 0], minlength=years)
+            if self.failed is not None:
+                self.failed.append(first_failure >= 0)
+
+            if self.sample_paths:
+                self._update_sample(assets, spendings, runs)
+
+    def _update_sample(self, assets, spendings, runs):
+        # Stratified sample of this chunk, pooled with the current sample; each path
+        # carries the number of runs it stands for, so the re-stratified pool stays
+        # representative of all runs so far
+        index = stratified_sample(assets[:, -1], self.sample_paths)
+        candidates = {
+            "run_index": index + (self.runs - runs),
+            "assets": assets[index],
+            "spendings": spendings[index],
+            "weights": np.full(len(index), runs / len(index)),
+        }
+        if self.sample is not None:
+            candidates = {key: np.concatenate([self.sample[key], values]) for key, values in candidates.items()}
+
+        keep = stratified_sample(candidates["assets"][:, -1], self.sample_paths, candidates["weights"])
+        self.sample = {key: values[keep] for key, values in candidates.items()}
+        self.sample["weights"] = np.full(len(keep), self.runs / len(keep))
+
+    @property
+    def successes(self):
+        return self.runs - int(self.failures_by_year.sum())
+
+    def standard_error(self):
+        return success_standard_error(self.successes, self.runs)
+
+    def results(self):
+        """Results of the runs so far, in the format of run_monte_carlo with retain="sample"
+
+        results["simulations"] holds the sampled paths, plus the failure mask with
+        keep_failures.
+        """
+        runs = self.runs
+        with span("stats"):
+            results = {
+                "ages": self.params.ages,
+                "runs": runs,
+                "seed": self.seed,
+                "success_probability": self.successes / runs,
+                "success_standard_error": self.standard_error(),
+                "asset_percentiles": sketch_summary(self.asset_sketch, self.asset_moments, self.percentiles),
+                "spending_percentiles": sketch_summary(self.spending_sketch, self.spending_moments, self.percentiles),
+                "percentile_rank_error": max(self.asset_sketch.rank_error(), self.spending_sketch.rank_error()),
+                "ruin_probability_by_age": (np.cumsum(self.failures_by_year) / runs).tolist(),
+                "first_failure_age": histogram_summary(np.asarray(self.params.ages), self.failures_by_year, self.percentiles)
+            }
+
+        if self.sample is not None:
+            results["simulations"] = {
+                "run_index": self.sample["run_index"],
+                "assets": np.ascontiguousarray(self.sample["assets"], dtype=self.dtype),
+                "spendings": np.ascontiguousarray(self.sample["spendings"], dtype=self.dtype),
+            }
+        if self.failed is not None:
+            results.setdefault("simulations", {})["failed"] = np.concatenate(self.failed)
+        return results
+
+
+def iter_chunks(params, percentiles=DEFAULT_PERCENTILES, chunk_runs=STREAMING_CHUNK_RUNS, target_standard_error=None,
+                sketch_capacity=SKETCH_CAPACITY, min_runs=MIN_ADAPTIVE_RUNS, max_runs=MAX_ADAPTIVE_RUNS,
+                sample_paths=DEFAULT_SAMPLE_PATHS, dtype=np.float64, accumulation_cache=None,
+                shock_steps=None, keep_failures=False):
+    """Simulate in chunks of at most chunk_runs, yielding the StreamingRun after each one
+
+    Stops after params.simulation_runs runs or, with a target standard error, once
+    the success probability is that precise (see run_adaptive). Callers can stop
+    iterating at any point to cancel, or call results() for progressive updates.
+    chunk_runs is in annual runs; monthly chunks hold proportionally fewer runs.
+    shock_steps and keep_failures are passed on to StreamingRun.
+    """
+    chunk_runs = max(int(chunk_runs) // params.steps_per_year, 1)
+    chunk_runs = -(-chunk_runs // BLOCK_RUNS) * BLOCK_RUNS
+    run = StreamingRun(params, percentiles, sketch_capacity, sample_paths, dtype, accumulation_cache,
+                       shock_steps, keep_failures)
+
+    if not target_standard_error:
+        while run.runs < params.simulation_runs:
+            run.step(min(chunk_runs, params.simulation_runs - run.runs))
+            yield run
+        return
+
+    while run.runs < min(min_runs, max_runs):
+        run.step(min(chunk_runs, min_runs - run.runs, max_runs - run.runs))
+        yield run
+
+    while run.runs < max_runs and run.standard_error() > target_standard_error:
+        # p(1 - p) / n = se^2, so the runs needed scale with (se / target)^2
+        needed = run.runs * (run.standard_error() / target_standard_error) ** 2 - run.runs
+        needed = -(-int(needed) // BLOCK_RUNS) * BLOCK_RUNS
+        run.step(min(max(needed, BLOCK_RUNS), chunk_runs, max_runs - run.runs))
+        yield run
+
+
+def run_streaming(params, percentiles=DEFAULT_PERCENTILES, chunk_runs=STREAMING_CHUNK_RUNS, sketch_capacity=SKETCH_CAPACITY):
+    """Bounded-memory version of run_monte_carlo for very large run counts
+
+    Runs are simulated chunk by chunk and folded into per-year quantile sketches and
+    exact moments and failure counts, so memory does not grow with the run count. The
+    success probability and ruin statistics are exact; percentiles are within
+    results["percentile_rank_error"] (a fraction of the runs) of the exact ones.
+    """
+    for run in iter_chunks(params, percentiles, chunk_runs, sketch_capacity=sketch_capacity):
+        pass
+    return run.results()
+
+
+def run_adaptive(params, target_standard_error=None, percentiles=DEFAULT_PERCENTILES,
+                 min_runs=MIN_ADAPTIVE_RUNS, max_runs=MAX_ADAPTIVE_RUNS):
+    """Simulate until the success probability reaches a target standard error
+
+    Starts with min_runs and then adds chunks sized from the current estimate of
+    the runs still needed, stopping once the standard error is at most the target
+    (params.target_standard_error by default) or max_runs is reached. results
+    ["runs"] is the run count actually used.
+    """
+    if target_standard_error is None:
+        target_standard_error = params.target_standard_error
+    if not target_standard_error or target_standard_error <= 0:
+        raise ValueError("Target standard error must be positive")
+
+    for run in iter_chunks(params, percentiles, target_standard_error=target_standard_error,
+                           min_runs=min_runs, max_runs=max_runs):
+        pass
+    return run.results()
+
+
+def summarize(params, chunk_runs=None, percentiles=DEFAULT_PERCENTILES, sketch_capacity=SKETCH_CAPACITY):
+    """Success probability plus terminal-asset and ruin-age percentiles
+
+    Simulates at most chunk_runs paths at a time and folds each chunk's terminal
+    assets into a quantile sketch and its failure ages into exact counts, so peak
+    memory is bounded by the chunk size whatever the run count.
+    """
+    runs = params.simulation_runs
+    seed = resolve_seed(params.seed)
+
+    # Whole RNG blocks per chunk, so no block is drawn twice
+    chunk_runs = runs if chunk_runs is None else max(int(chunk_runs), 1)
+    chunk_runs = -(-chunk_runs // BLOCK_RUNS) * BLOCK_RUNS
+
+    terminal_sketch = QuantileSketch(1, sketch_capacity, seed)
+    terminal_moments = RunningMoments(1)
+    failures_by_year = np.zeros(params.num_years, dtype=np.int64)
+
+    for start in range(0, runs, chunk_runs):
+        stop = min(start + chunk_runs, runs)
+        assets, _ = simulate(params, draw_model_shocks(params, stop - start, seed, start))
+
+        terminal_sketch.update(assets[:, -1])
+        terminal_moments.update(assets[:, -1])
+
+        first_failure = first_failure_index(assets, params.num_accumulation)
+        failures_by_year += np.bincount(first_failure[first_failure >= 0], minlength=params.num_years)
+
+    terminal = sketch_summary(terminal_sketch, terminal_moments, percentiles)
+
+    return {
+        "runs": runs,
+        "seed": seed,
+        "success_probability": (runs - failures_by_year.sum()) / runs,
+        "terminal_assets": {key: values[0] for key, values in terminal.items()},
+        "percentile_rank_error": terminal_sketch.rank_error(),
+        "first_failure_age": histogram_summary(np.asarray(params.ages), failures_by_year, percentiles)
+    }
+
+
+# Parameters that can be swept: every scalar that does not change the simulated years
+SWEEP_KEYS = [
+    key for name, key in PARAM_KEYS.items()
+    if name not in {"current_age", "simulation_end_age", "simulation_runs", "monthly_expenses", "annual_expenses"}
+]
+
+# Upper bound on cells x runs processed at once by sweep()
+SWEEP_BLOCK_SIZE = 2**21
+
+
+def simulate_cells(values, shocks, ages, steps_per_year=1):
+    """Simulate many parameter sets ("cells") against the same shocks at once
+
+    values maps SimulationParams field names to (cells x 1) arrays, so every array
+    operation advances all cells and runs together. Returns the (cells x runs)
+    failure mask and terminal assets.
+    """
+    cells = len(values["current_assets"])
+    runs = shocks.runs
+
+    asset = np.repeat(values["current_assets"], runs, axis=1)
+    expense = np.repeat(values["annual_expense"] / steps_per_year, runs, axis=1)
+    failed = np.zeros((cells, runs), dtype=bool)
+
+    keep_after_tax = 1 - values["capital_gains_tax_rate"]
+    pension = values["fixed_monthly_pension"] * 12 / steps_per_year
+    savings = values["annual_savings"] / steps_per_year
+    average_roi, roi_volatility = step_rates(values["average_roi"], values["roi_volatility"], steps_per_year)
+    average_inflation, inflation_volatility = step_rates(values["average_inflation"], values["inflation_volatility"], steps_per_year)
+    correlation = values["inflation_correlation"]
+    correlated = bool(np.any(correlation))
+
+    def step_growth(step):
+        growth = roi_volatility * shocks.roi[:, step]
+        growth += average_roi
+        return growth
+
+    for j, age in enumerate(ages):
+        steps = range(j * steps_per_year, (j + 1) * steps_per_year)
+        if steps_per_year > 1:
+            # The year's compounded growth first, to tax it like growth_factors()
+            year_growth = np.ones((cells, runs))
+            for step in steps:
+                year_growth *= step_growth(step) + 1
+            tax_factor = yearly_tax_factor(year_growth, keep_after_tax, steps_per_year)
+
+        # Savings before retirement, pension minus inflating expenses after
+        retired = age >= values["intended_retirement_age"]
+        income = np.where(age >= values["legal_retirement_age"], pension, 0)
+
+        for step in steps:
+            # Same growth rules as simulate(): tax only on positive returns
+            growth = step_growth(step)
+            if steps_per_year == 1:
+                np.minimum(growth, growth * keep_after_tax, out=growth)
+            growth += 1
+            if steps_per_year > 1:
+                growth *= tax_factor
+            asset *= growth
+
+            asset += np.where(retired, income - expense, savings)
+            failed |= retired & (asset < 0)
+
+            inflation_shock = shocks.inflation[:, step]
+            if correlated:
+                inflation_shock = correlation * shocks.roi[:, step] + np.sqrt(1 - correlation ** 2) * inflation_shock
+            inflation = inflation_volatility * inflation_shock
+            inflation += 1 + average_inflation
+            expense *= np.where(retired, inflation, 1)
+
+    return failed, asset
+
+
+def sweep(params, axes, percentiles=DEFAULT_PERCENTILES):
+    """Evaluate a grid of parameter values around a base SimulationParams
+
+    axes is a list of (key, values) pairs using parameter dict keys, e.g.
+    [("intendedRetirementAge", range(58, 67)), ("averageROI", [0.05, 0.06, 0.07])].
+    Every cell runs params.simulation_runs paths against one shared shock matrix, so
+    differences between neighbouring cells are not Monte Carlo noise. Returns
+    N-dimensional arrays with one axis per swept parameter.
+    """
+    names = {key: name for name, key in PARAM_KEYS.items()}
+    for key, _ in axes:
+        if key not in SWEEP_KEYS:
+            raise ValueError(f"Cannot sweep over {key}")
+
+    axis_values = [np.asarray(list(values), dtype=float) for _, values in axes]
+    shape = tuple(len(values) for values in axis_values)
+    grid = np.meshgrid(*axis_values, indexing="ij")
+
+    # One column vector per field: swept fields vary by cell, the rest are constant
+    cell_count = int(np.prod(shape))
+    values = {}
+    for key in SWEEP_KEYS:
+        values[names[key]] = np.full((cell_count, 1), float(getattr(params, names[key])))
+    for (key, _), cell_values in zip(axes, grid):
+        values[names[key]] = cell_values.reshape(cell_count, 1)
+    values["annual_expense"] = np.full((cell_count, 1), params.annual_expense)
+    values["inflation_correlation"] = np.full((cell_count, 1), params.inflation_correlation)
+
+    seed = resolve_seed(params.seed)
+    shocks = draw_model_shocks(params, params.simulation_runs, seed)
+    success = np.empty(cell_count)
+    terminal = {percentile_key(q): np.empty(cell_count) for q in percentiles}
+
+    block = max(SWEEP_BLOCK_SIZE // params.simulation_runs, 1)
+    for start in range(0, cell_count, block):
+        stop = min(start + block, cell_count)
+        failed, terminal_assets = simulate_cells(
+            {name: column[start:stop] for name, column in values.items()}, shocks, params.ages, params.steps_per_year
+        )
+        success[start:stop] = np.count_nonzero(~failed, axis=1) / params.simulation_runs
+        for q, value in zip(percentiles, np.percentile(terminal_assets, percentiles, axis=1)):
+            terminal[percentile_key(q)][start:stop] = value
+
+    return {
+        "axes": [(key, values.tolist()) for (key, _), values in zip(axes, axis_values)],
+        "runs": params.simulation_runs,
+        "seed": seed,
+        "success_probability": success.reshape(shape),
+        "terminal_assets": {key: value.reshape(shape) for key, value in terminal.items()}
+    }
+
+
+def success_confidence(success_probability, standard_error, target_success):
+    """Approximate probability that the true success probability is at least target_success"""
+    if standard_error <= 0:
+        return float(success_probability >= target_success)
+    return 0.5 * (1 + math.erf((success_probability - target_success) / (standard_error * math.sqrt(2))))
+
+
+def earliest_retirement_age(params, target_success=0.9, min_age=None, max_age=None, z=1.96):
+    """Earliest intended retirement age whose success probability reaches target_success
+
+    Every candidate age uses the same shock matrix, and the accumulation phase is
+    simulated once up to max_age with the assets at every age kept, so a candidate
+    only costs its own distribution phase. Success need not rise with the
+    retirement age (negative savings, or returns below inflation, can make working
+    longer worse), so the ages are scanned upwards from min_age until one meets
+    the target rather than bisected.
+
+    Returns the age (None if no age up to max_age meets the target), its success
+    probability with a z-confidence interval, the approximate probability that it
+    truly meets the target, the success one year earlier and every evaluated age.
+    """
+    min_age = params.current_age + 1 if min_age is None else int(min_age)
+    max_age = params.simulation_end_age if max_age is None else int(max_age)
+    if not params.current_age < min_age <= max_age:
+        raise ValueError("Retirement ages must be after the current age and min_age <= max_age")
+
+    runs = params.simulation_runs
+    seed = resolve_seed(params.seed)
+    shocks = draw_model_shocks(params, runs, seed)
+    growth = growth_factors(params, shocks)
+
+    # Assets after every accumulation year up to the latest candidate, in one pass
+    latest = replace(params, intended_retirement_age=max_age)
+    accumulated = np.empty((runs, latest.num_accumulation), order="F")
+    accumulate(latest, growth, np.full(runs, params.current_assets), assets=accumulated)
+
+    successes = {}
+
+    def evaluate(age):
+        if age not in successes:
+            candidate = replace(params, intended_retirement_age=age)
+            years = candidate.num_accumulation
+            asset = accumulated[:, years - 1].copy() if years else np.full(runs, params.current_assets)
+            failed = np.zeros(runs, dtype=bool)
+            distribute(candidate, growth, shocks, asset, failed=failed)
+            successes[age] = runs - int(np.count_nonzero(failed))
+        return successes[age] / runs >= target_success
+
+    age = next((candidate for candidate in range(min_age, max_age + 1) if evaluate(candidate)), None)
+
+    result = {
+        "age": age,
+        "target_success": target_success,
+        "runs": runs,
+        "seed": seed,
+        "success_by_age": {candidate: successes[candidate] / runs for candidate in sorted(successes)},
+    }
+
+    reported = max_age if age is None else age
+    success_probability = successes[reported] / runs
+    standard_error = success_standard_error(successes[reported], runs)
+    result.update({
+        "success_probability": success_probability,
+        "success_interval": (max(success_probability - z * standard_error, 0), min(success_probability + z * standard_error, 1)),
+        "confidence": success_confidence(success_probability, standard_error, target_success),
+        "earlier_success_probability": successes[age - 1] / runs if age is not None and age - 1 in successes else None,
+    })
+    return result
+
+
+def sustainable_expenses(params, state):
+    """Highest first-year annual expense each run can sustain without its assets dropping below zero
+
+    Assets are linear in the expense: after retirement they equal a path without
+    expenses minus the expense times a path of one unit of inflating expense, so a
+    run survives exactly up to the smallest ratio of the two over its steps. Same
+    growth and inflation rules as simulate(); state is the runs' AccumulationState.
+    """
+    shocks, growth = state.shocks, state.growth
+    runs = shocks.runs
+    steps_per_year = params.steps_per_year
+    num_accumulation = params.num_accumulation
+    first_step = num_accumulation * steps_per_year
+    ages = params.ages
+
+    asset = state.assets[:, -1].copy() if num_accumulation else np.full(runs, params.current_assets)
+
+    inflation = inflation_factors(params, shocks, first_step)
+
+    # One unit of annual expense, paid in equal parts per step
+    unit_expense = np.full(runs, 1 / steps_per_year)
+    unit_cost = np.zeros(runs)
+    pension = params.fixed_monthly_pension * 12 / steps_per_year
+    sustainable = np.full(runs, np.inf)
+
+    for step in range(first_step, params.num_steps):
+        income = pension if ages[step // steps_per_year] >= params.legal_retirement_age else 0
+        asset *= growth[:, step]
+        asset += income
+        unit_cost *= growth[:, step]
+        unit_cost += unit_expense
+
+        # Only a run whose costs have turned negative (growth factors below zero,
+        # practically never) can fail independently of the expense
+        with np.errstate(divide="ignore", invalid="ignore"):
+            limit = np.where(unit_cost > 0, asset / unit_cost, np.where(asset < 0, 0.0, np.inf))
+        np.minimum(sustainable, limit, out=sustainable)
+        unit_expense *= inflation[:, step - first_step]
+
+    return np.maximum(sustainable, 0)
+
+
+def max_sustainable_spending(params, target_success=0.9, chunk_runs=None, z=1.96, accumulation_cache=None):
+    """Highest total annual expense that still reaches target_success
+
+    All expense categories are scaled by the same factor. Every run's sustainable
+    expense is computed against one seeded shock stream (in chunks of chunk_runs
+    for bounded memory), and the answer is the (1 - target_success) quantile of
+    those: one simulation pass instead of a bisection over independent simulations.
+    The interval is the z-confidence interval of that quantile from order statistics.
+    """
+    if not 0 < target_success < 1:
+        raise ValueError("Target success probability must be between 0 and 1")
+
+    runs = params.simulation_runs
+    seed = resolve_seed(params.seed)
+    chunk_runs = runs if chunk_runs is None else -(-max(int(chunk_runs), 1) // BLOCK_RUNS) * BLOCK_RUNS
+
+    sustainable = np.empty(runs)
+    for start in range(0, runs, chunk_runs):
+        stop = min(start + chunk_runs, runs)
+        state = load_accumulation(params, seed, start, stop - start, accumulation_cache)
+        sustainable[start:stop] = sustainable_expenses(params, state)
+    sustainable.sort()
+
+    # A run succeeds at expense E if E <= its sustainable expense, so the largest E
+    # with at least target_success of the runs succeeding is this order statistic
+    rank = int(np.floor(runs * (1 - target_success)))
+    spread = z * np.sqrt(runs * target_success * (1 - target_success))
+    lower = sustainable[max(int(np.floor(rank - spread)), 0)]
+    upper = sustainable[min(int(np.ceil(rank + spread)), runs - 1)]
+    annual_expense = float(sustainable[min(rank, runs - 1)])
+
+    base_expense = params.annual_expense
+    scale = annual_expense / base_expense if base_expense > 0 else None
+    return {
+        "annual_expense": annual_expense,
+        "scale": scale,
+        "monthly_expenses": {key: value * scale for key, value in params.monthly_expenses.items()} if scale is not None else None,
+        "annual_expenses": {key: value * scale for key, value in params.annual_expenses.items()} if scale is not None else None,
+        "expense_interval": (float(lower), float(upper)),
+        "success_probability": float(np.count_nonzero(sustainable >= annual_expense) / runs),
+        "target_success": target_success,
+        "runs": runs,
+        "seed": seed,
+    }
@@ -0,0 +1,119 @@
+"""Historical return and inflation datasets for the bootstrap return models.
+
+A dataset is a CSV of yearly returns and inflation, converted once with
+convert_csv() (or "python cli.py history") into a .npy file holding a
+(years x 2) float64 array of [return, inflation] rows in chronological order.
+Simulations open the .npy memory-mapped and read-only, so every process that
+samples from it - the app, comparison and batch workers - shares the same
+pages of the OS file cache instead of holding its own copy.
+"""
+import csv
+import os
+from functools import lru_cache
+
+import numpy as np
+
+
+# Accepted CSV column names (case-insensitive) for the two series
+RETURN_COLUMNS = ("return", "returns", "roi")
+INFLATION_COLUMNS = ("inflation",)
+
+
+def parse_rate(text):
+    """A rate as a fraction: "0.07" and "7%" are both 0.07"""
+    text = text.strip()
+    if text.endswith("%"):
+        return float(text[:-1]) / 100
+    return float(text)
+
+
+def find_column(header, names):
+    for index, name in enumerate(header):
+        if name.strip().lower() in names:
+            return index
+    raise ValueError(f"The CSV needs a column named {' or '.join(names)}")
+
+
+def convert_csv(csv_path, npy_path=None):
+    """Convert a CSV of yearly returns and inflation into a dataset .npy file
+
+    The CSV needs a header with a return column ("return", "returns" or "roi")
+    and an "inflation" column, one row per year in chronological order; other
+    columns such as the year are ignored. Rates are fractions or percentages
+    with a "%" sign. Returns the path of the .npy file, by default the CSV's
+    path with the extension replaced.
+    """
+    if npy_path is None:
+        npy_path = os.path.splitext(csv_path)[0] + ".npy"
+
+    with open(csv_path, 'r', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            raise ValueError(f"{csv_path} is empty")
+        return_column = find_column(header, RETURN_COLUMNS)
+        inflation_column = find_column(header, INFLATION_COLUMNS)
+
+        rows = []
+        for line_number, row in enumerate(reader, 2):
+            if not any(cell.strip() for cell in row):
+                continue
+            try:
+                rows.append((parse_rate(row[return_column]), parse_rate(row[inflation_column])))
+            except (IndexError, ValueError):
+                raise ValueError(f"{csv_path}, line {line_number}: expected a return and an inflation rate")
+
+    data = np.asarray(rows, dtype=np.float64).reshape(-1, 2)
+    validate_history(data)
+    np.save(npy_path, data)
+    return npy_path
+
+
+def validate_history(data):
+    if data.ndim != 2 or data.shape[1] != 2:
+        raise ValueError("A historical dataset must be a (years x 2) array of returns and inflation")
+    if len(data) < 2:
+        raise ValueError("A historical dataset needs at least two years")
+    if not np.all(np.isfinite(data)):
+        raise ValueError("A historical dataset must not contain missing values")
+
+
+@lru_cache(maxsize=8)
+def _open_history(path, modified, size):
+    # Keyed by modification time and size too, so a rewritten file is reopened
+    data = np.load(path, mmap_mode="r")
+    validate_history(data)
+    return data
+
+
+def load_history(path):
+    """The dataset at path as a read-only memory-mapped (years x 2) array
+
+    Opened once per process and file version.
+    """
+    stat = os.stat(path)
+    return _open_history(os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+
+
+def history_fingerprint(path):
+    """Identifies the contents of a dataset file for result caching (path, size and modification time)"""
+    stat = os.stat(path)
+    return f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def describe_history(path):
+    """Years covered and the mean and volatility of the dataset's returns and inflation
+
+    Setting averageROI, ROI_volatility, averageInflation and inflation_volatility
+    to these values replays the historical rates as they were.
+    """
+    data = load_history(path)
+    mean = data.mean(axis=0)
+    std = data.std(axis=0)
+    return {
+        "years": len(data),
+        "average_roi": float(mean[0]),
+        "roi_volatility": float(std[0]),
+        "average_inflation": float(mean[1]),
+        "inflation_volatility": float(std[1]),
+    }
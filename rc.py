@@ -3,22 +3,64 @@ from tkinter import ttk, messagebox, filedialog, scrolledtext
 import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+import multiprocessing
 import threading
+import time
 import json
 import os
 from datetime import datetime
+from dataclasses import replace
 import locale
-import pickle
-from reportlab.lib.pagesizes import A4, landscape
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image, Table, TableStyle
-from reportlab.lib import colors
 from io import BytesIO
+from concurrent.futures import CancelledError, ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from cache import AccumulationCache, ResultCache, cache_key
+from chart import CHART_PERCENTILES, ResultsChart
+from report import write_pdf_report
+from scenarios import ScenarioStore
+from history import convert_csv, describe_history
+from timing import StageTimer, activate, configure_log, profile_run, span
+from engine import (
+    DEFAULT_BLOCK_LENGTH, INTERACTIVE_CHUNK_RUNS, RETURN_MODELS, STREAMING_CHUNK_RUNS, SimulationParams,
+    earliest_retirement_age, iter_chunks, max_in_memory_runs, max_sustainable_spending, run_monte_carlo, shared_shock_spec, simulate_scenario,
+    success_difference, sweep, validate_params_structure
+)
+
+# Minimum time between progressive chart updates of a running simulation (seconds)
+PROGRESS_INTERVAL = 0.25
+
+# Live updates start this long after the last keystroke, with a quick preview of
+# PREVIEW_RUNS runs that is then refined to the full run count
+LIVE_UPDATE_DELAY_MS = 300
+PREVIEW_RUNS = 500
+
+# Success rate the maximum sustainable spending in the summary is solved for, and
+# the most runs the solver uses (of annual steps; monthly runs are 12x larger, so
+# the cap is divided by the steps per year)
+SPENDING_TARGET_SUCCESS = 0.9
+MAX_SOLVER_RUNS = 100000
+
+# Results keep a stratified sample of this many paths, stored in RESULT_DTYPE,
+# instead of every path
+SAMPLE_PATHS = 200
+RESULT_DTYPE = np.float32
 
 # Set locale for number formatting
 locale.setlocale(locale.LC_ALL, '')
 
 
+class ChartCanvas(FigureCanvasTkAgg):
+    """Tk canvas whose full draws count as the "draw" stage of the job that requested them
+
+    Full draws run deferred from draw_idle(), outside the job's own spans.
+    """
+    timer = None
+    
+    def draw(self):
+        with activate(self.timer), span("draw"):
+            super().draw()
+
+
 class RetirementCalculator:
     def __init__(self, root):
         self.root = root
@@ -33,11 +75,16 @@ class RetirementCalculator:
         
         # Initialize variables
         self.language = "en"
-        self.simulation_running = False
+        self.simulation_job = None
+        self.last_run_params = None
+        self.live_update_timer = None
         self.chart = None
         self.canvas = None
         self.current_params = None
         self.simulation_results = None
+        self.result_cache = ResultCache()
+        self.accumulation_cache = AccumulationCache()
+        self.comparison_executor = None
         
         # Language translations
         self.translations = {
@@ -69,6 +116,8 @@ class RetirementCalculator:
                 "tooltip_ROI_volatility": "Standard deviation for annual ROI fluctuations (e.g., 0.15 for 15%).",
                 "label_inflation_volatility": "Inflation Volatility",
                 "tooltip_inflation_volatility": "Standard deviation for annual inflation fluctuations (e.g., 0.01 for 1%).",
+                "label_ROI_inflation_correlation": "ROI/Inflation Correlation",
+                "tooltip_ROI_inflation_correlation": "Correlation between the yearly return and inflation fluctuations, from -1 to 1 (0 for independent). The bootstrap models use the historical co-movement instead.",
                 "section_monthlyExpenses": "Monthly Expenses (€)",
                 "label_expenseHealth": "Health",
                 "tooltip_expenseHealth": "Monthly spending on health-related costs.",
@@ -89,12 +138,31 @@ class RetirementCalculator:
                 "tooltip_expenseCarMaintenance": "Annual spending on car maintenance.",
                 "label_simulationRuns": "Simulations",
                 "tooltip_simulationRuns": "The number of simulation runs to perform.",
+                "label_seed": "Random Seed",
+                "tooltip_seed": "Seed for the random numbers. The same seed and parameters always give the same results; leave empty for a fresh random seed.",
+                "label_targetError": "Target Std. Error (%)",
+                "tooltip_targetError": "Precision target for the success rate. When set, runs are added until its standard error is this small and the number of simulations is ignored; leave empty to use a fixed number of simulations.",
+                "label_monthlySteps": "Monthly time steps",
+                "tooltip_monthlySteps": "Simulate month by month: monthly returns, inflation, pension and expenses, with ruin detected in the month it happens. Results are still shown per year.",
+                "label_returnModel": "Return Model",
+                "tooltip_returnModel": "How returns and inflation are drawn: independent normal draws, or whole years resampled from a historical dataset in blocks, which keeps crashes, runs of bad years and the co-movement of returns and inflation.",
+                "returnModel_normal": "Normal distribution",
+                "returnModel_stationary": "Stationary bootstrap",
+                "returnModel_moving": "Moving block bootstrap",
+                "label_historyPath": "Historical Data",
+                "tooltip_historyPath": "Dataset for the bootstrap models: a CSV with a return and an inflation column, one row per year (converted to .npy once), or a converted .npy file. Its rates are rescaled to the average ROI, inflation and volatilities above.",
+                "label_blockLength": "Block Length (years)",
+                "tooltip_blockLength": "Average length of the resampled runs of consecutive historical years.",
+                "label_successInterval": "95% CI {low:.1f}–{high:.1f}% · {runs:,} runs",
                 "section_results": "Simulation Results",
+                "label_showPaths": "Show sample paths",
                 "successProbability": "Success Probability",
                 "section_summary": "Summary",
                 "label_successRate": "Success Rate",
                 "label_medianAssets": "Median Final Assets",
                 "label_worstCase": "10% Worst Case",
+                "label_maxSpending": "Max. Spending ({target:.0f}% Success)",
+                "label_spendingInterval": "€{monthly:,.0f}/month · 95% CI €{low:,.0f}–€{high:,.0f}",
                 "section_scenarios": "Scenarios",
                 "placeholder_scenarioName": "Scenario name",
                 "btn_saveScenario": "Save Scenario",
@@ -102,6 +170,7 @@ class RetirementCalculator:
                 "btn_loadScenario": "Load",
                 "btn_deleteScenario": "Delete",
                 "btn_runSimulation": "Run Simulation",
+                "btn_cancelSimulation": "Cancel",
                 "btn_exportResults": "Export Results",
                 "btn_darkMode": "Toggle Dark Mode",
                 "btn_save": "Save",
@@ -119,6 +188,8 @@ class RetirementCalculator:
                 "menu_scenarios_compare": "Compare Scenarios",
                 "menu_tools_settings": "Settings",
                 "menu_tools_darkMode": "Toggle Dark Mode",
+                "menu_tools_sweep": "Parameter Sweep",
+                "menu_tools_retirementAge": "Earliest Safe Retirement Age",
                 "menu_help_about": "About",
                 "explanation_simulation": "The simulation has two phases. In the accumulation phase (from your current age until your intended retirement), your assets grow with savings and investment returns. In the distribution phase (from retirement until age 90), your assets cover your living expenses—which increase with inflation—until your pension begins at the legal retirement age. The success probability shows the percentage of simulations in which your assets never drop below zero.",
                 "btn_exportPdf": "Export PDF",
@@ -151,6 +222,8 @@ class RetirementCalculator:
                 "tooltip_ROI_volatility": "Standardabweichung der jährlichen Renditeschwankungen (z. B. 0,15 für 15%).",
                 "label_inflation_volatility": "Inflations-Volatilität",
                 "tooltip_inflation_volatility": "Standardabweichung der jährlichen Inflationsschwankungen (z. B. 0,01 für 1%).",
+                "label_ROI_inflation_correlation": "Korrelation Rendite/Inflation",
+                "tooltip_ROI_inflation_correlation": "Korrelation zwischen den jährlichen Rendite- und Inflationsschwankungen, von -1 bis 1 (0 für unabhängig). Die Bootstrap-Modelle verwenden stattdessen den historischen Gleichlauf.",
                 "section_monthlyExpenses": "Monatliche Ausgaben (€)",
                 "label_expenseHealth": "Gesundheit",
                 "tooltip_expenseHealth": "Monatliche Ausgaben für Gesundheitskosten.",
@@ -171,12 +244,31 @@ class RetirementCalculator:
                 "tooltip_expenseCarMaintenance": "Jährliche Ausgaben für Autopflege.",
                 "label_simulationRuns": "Simulationen",
                 "tooltip_simulationRuns": "Die Anzahl der durchzuführenden Simulationen.",
+                "label_seed": "Zufalls-Seed",
+                "tooltip_seed": "Startwert für die Zufallszahlen. Gleicher Seed und gleiche Parameter ergeben immer dieselben Ergebnisse; leer lassen für einen neuen zufälligen Seed.",
+                "label_targetError": "Ziel-Standardfehler (%)",
+                "tooltip_targetError": "Genauigkeitsziel für die Erfolgsquote. Wenn gesetzt, werden so lange Läufe hinzugefügt, bis ihr Standardfehler so klein ist, und die Anzahl der Simulationen wird ignoriert; leer lassen für eine feste Anzahl.",
+                "label_monthlySteps": "Monatliche Zeitschritte",
+                "tooltip_monthlySteps": "Monat für Monat simulieren: monatliche Renditen, Inflation, Rente und Ausgaben, wobei ein Ruin im Monat seines Eintretens erkannt wird. Die Ergebnisse werden weiterhin pro Jahr angezeigt.",
+                "label_returnModel": "Renditemodell",
+                "tooltip_returnModel": "Wie Renditen und Inflation gezogen werden: unabhängig normalverteilt oder als ganze Jahre, die blockweise aus historischen Daten gezogen werden. Dabei bleiben Crashs, Folgen schlechter Jahre und der Gleichlauf von Renditen und Inflation erhalten.",
+                "returnModel_normal": "Normalverteilung",
+                "returnModel_stationary": "Stationärer Bootstrap",
+                "returnModel_moving": "Moving-Block-Bootstrap",
+                "label_historyPath": "Historische Daten",
+                "tooltip_historyPath": "Datensatz für die Bootstrap-Modelle: eine CSV-Datei mit einer Rendite- und einer Inflationsspalte, eine Zeile pro Jahr (wird einmalig in .npy umgewandelt), oder eine umgewandelte .npy-Datei. Die Raten werden auf die oben angegebenen Durchschnitte und Volatilitäten skaliert.",
+                "label_blockLength": "Blocklänge (Jahre)",
+                "tooltip_blockLength": "Durchschnittliche Länge der gezogenen Folgen aufeinanderfolgender historischer Jahre.",
+                "label_successInterval": "95%-KI {low:.1f}–{high:.1f}% · {runs:,} Läufe",
                 "section_results": "Simulationsergebnisse",
+                "label_showPaths": "Beispielpfade anzeigen",
                 "successProbability": "Erfolgswahrscheinlichkeit",
                 "section_summary": "Zusammenfassung",
                 "label_successRate": "Erfolgsrate",
                 "label_medianAssets": "Median Endvermögen",
                 "label_worstCase": "10% schlechtester Fall",
+                "label_maxSpending": "Max. Ausgaben ({target:.0f}% Erfolg)",
+                "label_spendingInterval": "€{monthly:,.0f}/Monat · 95%-KI €{low:,.0f}–€{high:,.0f}",
                 "section_scenarios": "Szenarien",
                 "placeholder_scenarioName": "Szenarioname",
                 "btn_saveScenario": "Szenario speichern",
@@ -184,6 +276,7 @@ class RetirementCalculator:
                 "btn_loadScenario": "Laden",
                 "btn_deleteScenario": "Löschen",
                 "btn_runSimulation": "Simulation starten",
+                "btn_cancelSimulation": "Abbrechen",
                 "btn_exportResults": "Ergebnisse exportieren",
                 "btn_darkMode": "Dunkelmodus",
                 "btn_save": "Speichern",
@@ -201,6 +294,8 @@ class RetirementCalculator:
                 "menu_scenarios_compare": "Szenarien vergleichen",
                 "menu_tools_settings": "Einstellungen",
                 "menu_tools_darkMode": "Dunkelmodus umschalten",
+                "menu_tools_sweep": "Parametervariation",
+                "menu_tools_retirementAge": "Frühestes sicheres Rentenalter",
                 "menu_help_about": "Über",
                 "explanation_simulation": "Die Simulation modelliert zwei Phasen. In der Ansparphase (von Ihrem aktuellen Alter bis zum geplanten Rentenalter) wachsen Ihre Vermögenswerte durch Ersparnisse und Renditen. In der Auszahlungsphase (vom Rentenbeginn bis zum Alter 90) decken Ihre Vermögenswerte Ihre Lebenshaltungskosten – die durch Inflation steigen – bis Ihre Rente einsetzt. Die Erfolgswahrscheinlichkeit gibt den Prozentsatz der Simulationen an, bei denen Ihre Vermögenswerte nie unter null fallen.",
                 "btn_exportPdf": "PDF exportieren",
@@ -220,6 +315,7 @@ class RetirementCalculator:
             "averageInflation": 2.5 / 100,
             "ROI_volatility": 0.15,
             "inflation_volatility": 0.01,
+            "ROI_inflation_correlation": 0.0,
             "monthlyExpenses": {
                 "health": 1500,
                 "food": 1500,
@@ -233,7 +329,13 @@ class RetirementCalculator:
                 "carMaintenance": 3000
             },
             "simulationRuns": 10000,
-            "simulationEndAge": 100
+            "simulationEndAge": 100,
+            "seed": 42,
+            "targetStandardError": None,
+            "timeStep": "annual",
+            "returnModel": "normal",
+            "historyPath": None,
+            "blockLength": DEFAULT_BLOCK_LENGTH
         }
         
         # Initialize UI
@@ -242,8 +344,8 @@ class RetirementCalculator:
         # Load default parameters
         self.load_parameters_to_ui(self.default_params)
         
-        # Load scenarios
-        self.load_scenarios()
+        # Open the scenario store
+        self.scenario_store = self.open_scenario_store()
         
         # Run initial simulation
         self.run_simulation()
@@ -309,11 +411,18 @@ class RetirementCalculator:
         
         # Create placeholder for chart
         self.figure = plt.Figure(figsize=(10, 6), dpi=100)
-        self.ax = self.figure.add_subplot(111)
-        self.canvas = FigureCanvasTkAgg(self.figure, master=self.chart_frame)
+        self.canvas = ChartCanvas(self.figure, master=self.chart_frame)
+        self.results_chart = ResultsChart(self.figure, self.canvas)
+        self.ax = self.results_chart.ax
         self.canvas.draw()
         self.canvas.get_tk_widget().pack(fill="both", expand=True)
         
+        # Sample path overlay toggle
+        self.show_paths_var = tk.BooleanVar(value=False)
+        self.show_paths_check = ttk.Checkbutton(self.chart_frame, text=self.get_text("label_showPaths"),
+                                                variable=self.show_paths_var, command=self.toggle_sample_paths)
+        self.show_paths_check.pack(anchor="w", padx=5)
+        
         # Explanation text
         self.explanation_var = tk.StringVar()
         self.explanation_var.set(self.get_text("explanation_simulation"))
@@ -352,6 +461,8 @@ class RetirementCalculator:
         self.tools_menu = tk.Menu(self.menu_bar, tearoff=0)
         self.menu_bar.add_cascade(label=self.get_text("menu_tools"), menu=self.tools_menu)
         self.tools_menu.add_command(label=self.get_text("menu_tools_darkMode"), command=self.toggle_dark_mode)
+        self.tools_menu.add_command(label=self.get_text("menu_tools_sweep"), command=self.parameter_sweep)
+        self.tools_menu.add_command(label=self.get_text("menu_tools_retirementAge"), command=self.solve_retirement_age)
         
         # Help menu
         self.help_menu = tk.Menu(self.menu_bar, tearoff=0)
@@ -454,6 +565,13 @@ class RetirementCalculator:
         self.inflation_volatility_entry = ttk.Entry(self.params_scrollable_frame, textvariable=self.inflation_volatility_var, width=10)
         self.inflation_volatility_entry.grid(row=row, column=1, sticky="w", padx=5, pady=2)
         
+        # Correlation of the ROI and inflation fluctuations
+        row += 1
+        ttk.Label(self.params_scrollable_frame, text=self.get_text("label_ROI_inflation_correlation")).grid(row=row, column=0, sticky="w", padx=5, pady=2)
+        self.correlation_var = tk.StringVar(value="0")
+        self.correlation_entry = ttk.Entry(self.params_scrollable_frame, textvariable=self.correlation_var, width=10)
+        self.correlation_entry.grid(row=row, column=1, sticky="w", padx=5, pady=2)
+        
         # Monthly Expenses section
         row += 1
         ttk.Label(self.params_scrollable_frame, text=self.get_text("section_monthlyExpenses"), font=("TkDefaultFont", 10, "bold")).grid(row=row, column=0, sticky="w", padx=5, pady=5)
@@ -529,10 +647,60 @@ class RetirementCalculator:
         self.simulation_runs_entry = ttk.Entry(self.params_scrollable_frame, textvariable=self.simulation_runs_var, width=10)
         self.simulation_runs_entry.grid(row=row, column=1, sticky="w", padx=5, pady=2)
         
+        # Random Seed
+        row += 1
+        ttk.Label(self.params_scrollable_frame, text=self.get_text("label_seed")).grid(row=row, column=0, sticky="w", padx=5, pady=2)
+        self.seed_var = tk.StringVar(value="42")
+        self.seed_entry = ttk.Entry(self.params_scrollable_frame, textvariable=self.seed_var, width=10)
+        self.seed_entry.grid(row=row, column=1, sticky="w", padx=5, pady=2)
+        
+        # Target standard error of the success rate (adaptive run count)
+        row += 1
+        ttk.Label(self.params_scrollable_frame, text=self.get_text("label_targetError")).grid(row=row, column=0, sticky="w", padx=5, pady=2)
+        self.target_error_var = tk.StringVar(value="")
+        self.target_error_entry = ttk.Entry(self.params_scrollable_frame, textvariable=self.target_error_var, width=10)
+        self.target_error_entry.grid(row=row, column=1, sticky="w", padx=5, pady=2)
+        
+        # Monthly instead of annual simulation steps
+        row += 1
+        self.monthly_steps_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(self.params_scrollable_frame, text=self.get_text("label_monthlySteps"), variable=self.monthly_steps_var,
+                        command=self.schedule_live_update).grid(row=row, column=0, columnspan=2, sticky="w", padx=5, pady=2)
+        
+        # Return model: normal draws or a block bootstrap of historical data
+        row += 1
+        ttk.Label(self.params_scrollable_frame, text=self.get_text("label_returnModel")).grid(row=row, column=0, sticky="w", padx=5, pady=2)
+        self.return_model_labels = {model: self.get_text(f"returnModel_{model}") for model in RETURN_MODELS}
+        self.return_model_var = tk.StringVar(value=self.return_model_labels["normal"])
+        self.return_model_combo = ttk.Combobox(self.params_scrollable_frame, textvariable=self.return_model_var,
+                                               values=list(self.return_model_labels.values()), state="readonly", width=20)
+        self.return_model_combo.grid(row=row, column=1, sticky="w", padx=5, pady=2)
+        self.return_model_combo.bind("<<ComboboxSelected>>", self.schedule_live_update)
+        
+        # Historical dataset for the bootstrap models
+        row += 1
+        ttk.Label(self.params_scrollable_frame, text=self.get_text("label_historyPath")).grid(row=row, column=0, sticky="w", padx=5, pady=2)
+        history_frame = ttk.Frame(self.params_scrollable_frame)
+        history_frame.grid(row=row, column=1, sticky="w", padx=5, pady=2)
+        self.history_path_var = tk.StringVar(value="")
+        self.history_path_entry = ttk.Entry(history_frame, textvariable=self.history_path_var, width=14)
+        self.history_path_entry.pack(side="left")
+        ttk.Button(history_frame, text="…", width=3, command=self.choose_history).pack(side="left", padx=(2, 0))
+        
+        # Mean block length of the bootstrap
+        row += 1
+        ttk.Label(self.params_scrollable_frame, text=self.get_text("label_blockLength")).grid(row=row, column=0, sticky="w", padx=5, pady=2)
+        self.block_length_var = tk.StringVar(value=f"{DEFAULT_BLOCK_LENGTH:g}")
+        self.block_length_entry = ttk.Entry(self.params_scrollable_frame, textvariable=self.block_length_var, width=10)
+        self.block_length_entry.grid(row=row, column=1, sticky="w", padx=5, pady=2)
+        
         # Run Simulation button
         row += 1
         self.run_button = ttk.Button(self.params_scrollable_frame, text=self.get_text("btn_runSimulation"), command=self.run_simulation)
-        self.run_button.grid(row=row, column=0, columnspan=2, pady=10, sticky="ew")
+        self.run_button.grid(row=row, column=0, pady=10, sticky="ew")
+        
+        self.cancel_button = ttk.Button(self.params_scrollable_frame, text=self.get_text("btn_cancelSimulation"), command=self.cancel_simulation, state="disabled")
+        self.cancel_button.grid(row=row, column=1, padx=5, pady=10, sticky="ew")
         
         # Scenarios section
         row += 1
@@ -564,6 +732,7 @@ class RetirementCalculator:
         self.summary_frame.columnconfigure(0, weight=1)
         self.summary_frame.columnconfigure(1, weight=1)
         self.summary_frame.columnconfigure(2, weight=1)
+        self.summary_frame.columnconfigure(3, weight=1)
         
         # Success Rate card
         self.success_rate_frame = ttk.Frame(self.summary_frame, relief="ridge", borderwidth=2)
@@ -575,6 +744,10 @@ class RetirementCalculator:
         self.success_rate_label = ttk.Label(self.success_rate_frame, textvariable=self.success_rate_var, font=("TkDefaultFont", 14))
         self.success_rate_label.pack(pady=5)
         
+        # Confidence interval and the number of runs it is based on
+        self.success_interval_var = tk.StringVar(value="")
+        ttk.Label(self.success_rate_frame, textvariable=self.success_interval_var, font=("TkDefaultFont", 8)).pack(pady=(0, 5))
+        
         # Median Assets card
         self.median_assets_frame = ttk.Frame(self.summary_frame, relief="ridge", borderwidth=2)
         self.median_assets_frame.grid(row=0, column=1, sticky="nsew", padx=5, pady=5)
@@ -594,6 +767,18 @@ class RetirementCalculator:
         self.worst_case_var = tk.StringVar(value="--")
         self.worst_case_label = ttk.Label(self.worst_case_frame, textvariable=self.worst_case_var, font=("TkDefaultFont", 14))
         self.worst_case_label.pack(pady=5)
+        
+        # Maximum sustainable spending card
+        self.max_spending_frame = ttk.Frame(self.summary_frame, relief="ridge", borderwidth=2)
+        self.max_spending_frame.grid(row=0, column=3, sticky="nsew", padx=5, pady=5)
+        
+        ttk.Label(self.max_spending_frame, text=self.get_text("label_maxSpending").format(target=SPENDING_TARGET_SUCCESS * 100), font=("TkDefaultFont", 10, "bold")).pack(pady=5)
+        
+        self.max_spending_var = tk.StringVar(value="--")
+        ttk.Label(self.max_spending_frame, textvariable=self.max_spending_var, font=("TkDefaultFont", 14)).pack(pady=5)
+        
+        self.max_spending_interval_var = tk.StringVar(value="")
+        ttk.Label(self.max_spending_frame, textvariable=self.max_spending_interval_var, font=("TkDefaultFont", 8)).pack(pady=(0, 5))
     
     def bind_parameter_changes(self):
         """Bind parameter changes to update simulation"""
@@ -601,15 +786,48 @@ class RetirementCalculator:
             self.current_age_entry, self.legal_retirement_age_entry, self.monthly_pension_entry,
             self.current_assets_entry, self.capital_gains_tax_entry, self.annual_savings_entry,
             self.retirement_age_entry, self.avg_roi_entry, self.avg_inflation_entry,
-            self.roi_volatility_entry, self.inflation_volatility_entry,
+            self.roi_volatility_entry, self.inflation_volatility_entry, self.correlation_entry,
             self.expense_health_entry, self.expense_food_entry, self.expense_entertainment_entry,
             self.expense_shopping_entry, self.expense_utilities_entry,
             self.expense_vacations_entry, self.expense_repairs_entry, self.expense_car_maintenance_entry,
-            self.simulation_runs_entry
+            self.simulation_runs_entry, self.seed_entry, self.target_error_entry,
+            self.history_path_entry, self.block_length_entry
         ]
         
         for entry in entries:
             entry.bind("<FocusOut>", self.validate_and_update)
+            entry.bind("<KeyRelease>", self.schedule_live_update)
+    
+    def check_parameters(self, params):
+        """Return an error message for parameters outside their valid ranges, or None"""
+        if params["intendedRetirementAge"] <= params["currentAge"]:
+            return "Retirement age must be greater than current age"
+        
+        if params["averageROI"] < -0.05 or params["averageROI"] > 0.3:
+            return "ROI should be between -5% and 30%"
+        
+        if params["averageInflation"] < 0 or params["averageInflation"] > 0.2:
+            return "Inflation should be between 0% and 20%"
+        
+        if params["ROI_volatility"] < 0 or params["ROI_volatility"] > 1:
+            return "ROI volatility should be between 0 and 1"
+        
+        if params["inflation_volatility"] < 0 or params["inflation_volatility"] > 1:
+            return "Inflation volatility should be between 0 and 1"
+        
+        if not -1 <= params["ROI_inflation_correlation"] <= 1:
+            return "ROI/inflation correlation should be between -1 and 1"
+        
+        if params["targetStandardError"] is not None and not 0 < params["targetStandardError"] <= 0.1:
+            return "Target standard error should be between 0% and 10%"
+        
+        if params["returnModel"] != "normal":
+            if not params["historyPath"] or not os.path.isfile(params["historyPath"]):
+                return "Choose a historical dataset for the bootstrap return model"
+            if params["blockLength"] < 1:
+                return "Block length should be at least 1 year"
+        
+        return None
     
     def validate_and_update(self, event=None):
         """Validate parameters and update simulation"""
@@ -617,32 +835,17 @@ class RetirementCalculator:
             # Get and validate parameters
             params = self.get_parameters_from_ui()
             
-            # Validate specific constraints
-            if params["intendedRetirementAge"] <= params["currentAge"]:
-                self.show_error("Retirement age must be greater than current age")
-                return
-            
-            if params["averageROI"] < -0.05 or params["averageROI"] > 0.3:
-                self.show_error("ROI should be between -5% and 30%")
-                return
-            
-            if params["averageInflation"] < 0 or params["averageInflation"] > 0.2:
-                self.show_error("Inflation should be between 0% and 20%")
-                return
-            
-            if params["ROI_volatility"] < 0 or params["ROI_volatility"] > 1:
-                self.show_error("ROI volatility should be between 0 and 1")
-                return
-            
-            if params["inflation_volatility"] < 0 or params["inflation_volatility"] > 1:
-                self.show_error("Inflation volatility should be between 0 and 1")
+            error = self.check_parameters(params)
+            if error:
+                self.show_error(error)
                 return
             
             # Store current parameters and update simulation if not during loading
             self.current_params = params
             
-            # Only run simulation if the change wasn't triggered programmatically during loading
-            if event and not hasattr(event, "loading"):
+            # Only run simulation if the change wasn't triggered programmatically during
+            # loading, and not again for inputs that live updates already simulated
+            if event and not hasattr(event, "loading") and params != self.last_run_params:
                 self.run_simulation()
                 
         except ValueError as e:
@@ -650,11 +853,38 @@ class RetirementCalculator:
         except Exception as e:
             self.show_error(f"Error: {str(e)}")
     
-    def run_simulation(self):
-        """Run the Monte Carlo simulation in a separate thread"""
-        if self.simulation_running:
+    def schedule_live_update(self, event=None):
+        """Recompute shortly after the last keystroke (debounced)"""
+        if self.live_update_timer is not None:
+            self.root.after_cancel(self.live_update_timer)
+        self.live_update_timer = self.root.after(LIVE_UPDATE_DELAY_MS, self.live_update)
+    
+    def live_update(self):
+        """Preview the simulation for the current inputs, without error dialogs for partial input"""
+        self.live_update_timer = None
+        try:
+            params = self.get_parameters_from_ui()
+        except ValueError:
+            self.status_var.set("Incomplete input")
             return
         
+        error = self.check_parameters(params)
+        if error:
+            self.status_var.set(error)
+            return
+        
+        # Keys like Tab or the arrows don't change anything
+        if params == self.last_run_params:
+            return
+        
+        self.current_params = params
+        self.run_simulation(preview=True)
+    
+    def run_simulation(self, preview=False):
+        """Run the Monte Carlo simulation in a separate thread, superseding any running one
+
+        With preview=True a quick PREVIEW_RUNS-run result is shown before the full run.
+        """
         # Get parameters
         if not self.current_params:
             try:
@@ -666,238 +896,263 @@ class RetirementCalculator:
                 self.show_error(f"Error: {str(e)}")
                 return
         
-        # Start simulation in separate thread
-        self.simulation_running = True
+        # A new request supersedes the running job instead of being dropped
+        if self.simulation_running:
+            self.simulation_job.set()
+        
+        # Each job is identified by its cancel event
+        job = threading.Event()
+        self.simulation_job = job
+        self.last_run_params = self.current_params
         self.status_var.set("Running simulation...")
-        self.run_button.configure(state="disabled")
+        self.max_spending_var.set("...")
+        self.max_spending_interval_var.set("")
+        self.cancel_button.configure(state="normal")
         
         # Start the simulation in a separate thread
-        threading.Thread(target=self._run_simulation_thread, daemon=True).start()
+        threading.Thread(target=self._run_simulation_thread, args=(dict(self.current_params), job, preview), daemon=True).start()
+    
+    @property
+    def simulation_running(self):
+        """Whether a simulation job is in progress; derived from simulation_job, so the two cannot disagree"""
+        return self.simulation_job is not None
+    
+    def cancel_simulation(self):
+        """Abort the running simulation; its worker stops at the next chunk boundary"""
+        if not self.simulation_running:
+            return
+        
+        self.simulation_job.set()
+        self.simulation_job = None
+        self.status_var.set("Simulation cancelled")
+        self.cancel_button.configure(state="disabled")
+    
+    def _post_to_job(self, job, callback, timer=None):
+        """Run callback in the main thread unless the job was cancelled or superseded by then
+        
+        With a timer, spans opened by the callback are recorded into it.
+        """
+        def run():
+            if job.is_set():
+                return
+            with activate(timer):
+                callback()
+        self.root.after(0, run)
     
-    def _run_simulation_thread(self):
-        """Run the simulation in a background thread"""
+    def _run_simulation_thread(self, params, job, preview=False):
+        """Run the simulation in a background thread, posting partial results as it goes
+        
+        Stage times of the job (simulation, statistics, solver, and the chart and UI
+        updates in the main thread) are collected in one StageTimer.
+        """
+        timer = StageTimer("simulation")
+        self.canvas.timer = timer
+        results = None
         try:
-            # Run simulation
-            results = self.monte_carlo_simulation(self.current_params)
-            
-            # Update UI in main thread
-            self.root.after(0, lambda: self.update_results(results))
+            with profile_run("simulation"), activate(timer):
+                # Quick preview on the first runs of the same seed; the full run below refines
+                # it within the same job, so new input supersedes both
+                if preview and (params.get("targetStandardError") or params["simulationRuns"] > PREVIEW_RUNS):
+                    preview_params = dict(params, simulationRuns=PREVIEW_RUNS, targetStandardError=None)
+                    with span("sim"):
+                        preview_results = self.monte_carlo_simulation(preview_params, cancel=job, cache=False)
+                    if preview_results is not None:
+                        self._post_to_job(job, lambda: self.simulation_progress(preview_results), timer)
+                
+                # Run simulation
+                with span("sim"):
+                    results = self.monte_carlo_simulation(
+                        params, progress=lambda partial: self._post_to_job(job, lambda: self.simulation_progress(partial), timer),
+                        cancel=job
+                    )
+                
+                # Update UI in main thread
+                if results is not None:
+                    self._post_to_job(job, lambda: self.update_results(results), timer)
+                    
+                    # Then goal-seek the spending for the summary panel on the same seed
+                    if not job.is_set():
+                        with span("solve"):
+                            spending = self.solve_max_spending(params, results)
+                        self._post_to_job(job, lambda: self.update_spending_summary(spending), timer)
         except Exception as e:
-            self.root.after(0, lambda: self.show_error(f"Simulation error: {str(e)}"))
+            message = f"Simulation error: {str(e)}"
+            self._post_to_job(job, lambda: self.show_error(message))
         finally:
-            self.root.after(0, lambda: self.simulation_complete())
+            self._post_to_job(job, lambda: self.simulation_complete(job, timer, results, preview))
+    
+    def solve_max_spending(self, params, results):
+        """Solve for the highest annual expense reaching SPENDING_TARGET_SUCCESS, using the results' seed"""
+        sim_params = SimulationParams.from_dict(dict(params, seed=results["seed"], targetStandardError=None))
+        sim_params = replace(sim_params, simulation_runs=min(results["runs"], MAX_SOLVER_RUNS // sim_params.steps_per_year))
+        
+        key = cache_key(sim_params, solver="max_sustainable_spending", target_success=SPENDING_TARGET_SUCCESS)
+        spending = self.result_cache.get(key)
+        if spending is None:
+            # Chunked like the streaming simulation, so memory stays bounded in the monthly mode too
+            spending = max_sustainable_spending(sim_params, SPENDING_TARGET_SUCCESS, chunk_runs=max_in_memory_runs(sim_params),
+                                                accumulation_cache=self.accumulation_cache)
+            self.result_cache.put(key, spending)
+        
+        return spending
+    
+    def update_spending_summary(self, spending):
+        """Show the maximum sustainable spending next to the success rate"""
+        low, high = spending["expense_interval"]
+        self.max_spending_var.set(f"€{spending['annual_expense']:,.0f}")
+        self.max_spending_interval_var.set(self.get_text("label_spendingInterval").format(
+            monthly=spending["annual_expense"] / 12, low=low, high=high
+        ))
     
-    def simulation_complete(self):
+    def simulation_progress(self, results):
+        """Show the partial results of a running simulation"""
+        self.status_var.set(f"Running simulation... {results['runs']:,} runs")
+        self.update_results(results)
+    
+    def simulation_complete(self, job, timer=None, results=None, preview=False):
         """Reset UI state after simulation completes"""
-        self.simulation_running = False
+        if job is not self.simulation_job:
+            return
+        
+        self.simulation_job = None
         self.status_var.set("Simulation complete")
-        self.run_button.configure(state="normal")
+        self.cancel_button.configure(state="disabled")
+        
+        # Idle callbacks run in order, so this runs after the chart's pending full redraw
+        if timer is not None:
+            self.root.after_idle(lambda: self.report_timing(timer, results, preview))
+    
+    def report_timing(self, timer, results, preview):
+        """Show the stage times of a finished simulation in the status bar and log them"""
+        if self.canvas.timer is timer:
+            self.canvas.timer = None
+        if not self.simulation_running:
+            self.status_var.set(f"Simulation complete · {timer.summary()}")
+        timer.log(
+            runs=results["runs"] if results else None, seed=results["seed"] if results else None, preview=preview
+        )
     
     def update_results(self, results):
         """Update the UI with simulation results"""
         try:
-            self.simulation_results = results
-            
-            # Update summary cards
-            success_rate = results["success_probability"] * 100
-            self.success_rate_var.set(f"{success_rate:.1f}%")
-            
-            # Set color based on success rate
-            if success_rate >= 80:
-                self.success_rate_label.configure(foreground="green")
-            elif success_rate >= 50:
-                self.success_rate_label.configure(foreground="orange")
-            else:
-                self.success_rate_label.configure(foreground="red")
-            
-            # Update median assets (last value of median)
-            median_final = results["asset_percentiles"]["median"][-1]
-            self.median_assets_var.set(f"€{median_final:,.0f}")
-            
-            # Update worst case (last value of 10th percentile)
-            worst_case = results["asset_percentiles"]["p10"][-1]
-            self.worst_case_var.set(f"€{worst_case:,.0f}")
-            
-            if worst_case <= 0:
-                self.worst_case_label.configure(foreground="red")
-            else:
-                self.worst_case_label.configure(foreground="black")
-            
-            # Update chart
-            self.update_chart(results)
+            # The chart update inside counts as its own "draw" stage
+            with span("ui"):
+                self.simulation_results = results
+                
+                # Update summary cards
+                success_rate = results["success_probability"] * 100
+                self.success_rate_var.set(f"{success_rate:.1f}%")
+                
+                # 95% confidence interval of the success rate
+                half_width = 1.96 * results["success_standard_error"] * 100
+                self.success_interval_var.set(self.get_text("label_successInterval").format(
+                    low=max(success_rate - half_width, 0), high=min(success_rate + half_width, 100), runs=results["runs"]
+                ))
+                
+                # Set color based on success rate
+                if success_rate >= 80:
+                    self.success_rate_label.configure(foreground="green")
+                elif success_rate >= 50:
+                    self.success_rate_label.configure(foreground="orange")
+                else:
+                    self.success_rate_label.configure(foreground="red")
+                
+                # Update median assets (last value of median)
+                median_final = results["asset_percentiles"]["median"][-1]
+                self.median_assets_var.set(f"€{median_final:,.0f}")
+                
+                # Update worst case (last value of 10th percentile)
+                worst_case = results["asset_percentiles"]["p10"][-1]
+                self.worst_case_var.set(f"€{worst_case:,.0f}")
+                
+                if worst_case <= 0:
+                    self.worst_case_label.configure(foreground="red")
+                else:
+                    self.worst_case_label.configure(foreground="black")
+                
+                # Update chart
+                self.update_chart(results)
         except Exception as e:
             self.show_error(f"Error updating results: {str(e)}")
     
+    def toggle_sample_paths(self):
+        """Show or hide the sample path overlay"""
+        self.results_chart.set_show_paths(self.show_paths_var.get())
+    
     def update_chart(self, results):
         """Update the chart with simulation results"""
         try:
-            # Clear the figure
-            self.ax.clear()
-            
-            # Get data
-            ages = results["ages"]
-            asset_p10 = results["asset_percentiles"]["p10"]
-            asset_median = results["asset_percentiles"]["median"]
-            asset_p90 = results["asset_percentiles"]["p90"]
-            spending_median = results["spending_percentiles"]["median"]
-            
-            # Plot assets
-            self.ax.plot(ages, asset_p10, color='red', label='Assets 10th Percentile', linewidth=2)
-            self.ax.plot(ages, asset_median, color='blue', label='Assets Median', linewidth=2)
-            self.ax.plot(ages, asset_p90, color='green', label='Assets 90th Percentile', linewidth=2)
-            
-            # Format y-axis for assets (left)
-            self.ax.set_ylabel('Asset Value (€)')
-            self.ax.set_xlabel('Age')
-            
-            # Create a second y-axis for spending
-            ax2 = self.ax.twinx()
-            ax2.bar(ages, spending_median, alpha=0.3, color='purple', label='Monthly Spending')
-            ax2.set_ylabel('Monthly Spending (€)')
-            
-            # Set the title and legend
-            self.ax.set_title('Retirement Simulation Results')
-            
-            # Create a combined legend
-            lines1, labels1 = self.ax.get_legend_handles_labels()
-            lines2, labels2 = ax2.get_legend_handles_labels()
-            self.ax.legend(lines1 + lines2, labels1 + labels2, loc='upper left')
-            
-            # Format ticks
-            self.ax.yaxis.set_major_formatter(plt.FuncFormatter(lambda x, _: f'€{x:,.0f}'))
-            ax2.yaxis.set_major_formatter(plt.FuncFormatter(lambda x, _: f'€{x:,.0f}'))
-            
-            # Add grid
-            self.ax.grid(True, linestyle='--', alpha=0.7)
-            
-            # Highlight retirement age
-            retirement_age = self.current_params["intendedRetirementAge"]
-            legal_retirement_age = self.current_params["legalRetirementAge"]
-            
-            # Add vertical line at retirement age
-            self.ax.axvline(x=retirement_age, color='orange', linestyle='--', alpha=0.7, 
-                            label=f'Retirement Age: {retirement_age}')
-            self.ax.text(retirement_age, max(asset_p90) * 0.9, f'Retirement at {retirement_age}', 
-                         color='orange', rotation=90, verticalalignment='top')
-            
-            # Add vertical line at legal retirement age
-            self.ax.axvline(x=legal_retirement_age, color='purple', linestyle='--', alpha=0.7, 
-                           label=f'Legal Retirement Age: {legal_retirement_age}')
-            self.ax.text(legal_retirement_age, max(asset_p90) * 0.8, f'Pension at {legal_retirement_age}', 
-                        color='purple', rotation=90, verticalalignment='top')
-            
-            # Adjust layout and redraw
-            self.figure.tight_layout()
-            self.canvas.draw()
-            
+            with span("draw"):
+                self.results_chart.update(
+                    results, self.current_params["intendedRetirementAge"], self.current_params["legalRetirementAge"]
+                )
         except Exception as e:
             self.show_error(f"Error updating chart: {str(e)}")
     
-    def monte_carlo_simulation(self, params):
-        """Run the Monte Carlo simulation"""
-        ages = []
-        for age in range(params["currentAge"], params["simulationEndAge"] + 1):
-            ages.append(age)
-        
-        simulations = []
-        success_count = 0
-        
-        num_simulations = params["simulationRuns"]
-        
-        for i in range(num_simulations):
-            assets = []
-            spendings = []
-            asset = params["currentAssets"]
-            failed = False
-            
-            # Accumulation phase
-            for age in range(params["currentAge"], params["intendedRetirementAge"]):
-                r = np.random.normal(params["averageROI"], params["ROI_volatility"])
-                effective_r = r * (1 - params["capitalGainsTaxRate"]) if r > 0 else r
-                asset = asset * (1 + effective_r) + params["annualSavings"]
-                assets.append(asset)
-                spendings.append(0)
-            
-            # Distribution phase
-            base_monthly_expenses = (
-                params["monthlyExpenses"]["health"] +
-                params["monthlyExpenses"]["food"] +
-                params["monthlyExpenses"]["entertainment"] +
-                params["monthlyExpenses"]["shopping"] +
-                params["monthlyExpenses"]["utilities"]
-            )
-            
-            base_annual_expenses = (
-                params["annualExpenses"]["vacations"] +
-                params["annualExpenses"]["repairs"] +
-                params["annualExpenses"]["carMaintenance"]
-            )
-            
-            annual_expense = base_monthly_expenses * 12 + base_annual_expenses
-            
-            for age in range(params["intendedRetirementAge"], params["simulationEndAge"] + 1):
-                income = params["fixedMonthlyPension"] * 12 if age >= params["legalRetirementAge"] else 0
-                r = np.random.normal(params["averageROI"], params["ROI_volatility"])
-                effective_r = r * (1 - params["capitalGainsTaxRate"]) if r > 0 else r
-                asset = asset * (1 + effective_r) + income - annual_expense
-                assets.append(asset)
-                spendings.append(annual_expense / 12)  # Monthly spending
-                
-                inflation_rate = np.random.normal(params["averageInflation"], params["inflation_volatility"])
-                annual_expense = annual_expense * (1 + inflation_rate)
-                
-                if asset < 0 and not failed:
-                    failed = True
-            
-            if not failed:
-                success_count += 1
-            
-            simulations.append({"assets": assets, "spendings": spendings})
-        
-        # Calculate percentiles
-        asset_percentiles = self.calculate_percentiles(simulations, "assets")
-        spending_percentiles = self.calculate_percentiles(simulations, "spendings")
-        
-        return {
-            "ages": ages,
-            "simulations": simulations,
-            "success_probability": success_count / num_simulations,
-            "asset_percentiles": asset_percentiles,
-            "spending_percentiles": spending_percentiles
-        }
+    def computation(self, sim_params, interactive=False):
+        """How monte_carlo_simulation computes sim_params: ("exact", None) in memory or ("chunked", chunk_runs)
+
+        Chunked results have sketched percentiles and chunk-sampled paths, so they
+        differ from exact ones. Non-interactive runs are computed like
+        simulate_scenario computes a comparison without common random numbers.
+        """
+        if not interactive and not sim_params.target_standard_error and sim_params.simulation_runs <= max_in_memory_runs(sim_params):
+            return "exact", None
+        return "chunked", INTERACTIVE_CHUNK_RUNS if interactive else STREAMING_CHUNK_RUNS
     
-    def calculate_percentiles(self, simulations, prop_name):
-        """Calculate 10th, 50th (median), and 90th percentiles for a property"""
-        num_years = len(simulations[0][prop_name])
-        median = []
-        p10 = []
-        p90 = []
-        
-        for j in range(num_years):
-            values = [run[prop_name][j] for run in simulations if run[prop_name][j] is not None]
-            
-            if not values:
-                median.append(None)
-                p10.append(None)
-                p90.append(None)
-                continue
-            
-            values.sort()
-            
-            med_idx = len(values) // 2
-            if len(values) % 2 == 0:
-                med_val = (values[med_idx - 1] + values[med_idx]) / 2
+    def result_key(self, sim_params, interactive=False):
+        """Result cache key of a simulation as run by monte_carlo_simulation
+
+        The key includes the computation, so exact and chunked results of the same
+        parameters are cached apart. None without a seed: an empty seed asks for
+        fresh random numbers, so an unseeded result must not be returned for a
+        later run.
+        """
+        if sim_params.seed is None:
+            return None
+        return cache_key(sim_params, percentiles=CHART_PERCENTILES, sample_paths=SAMPLE_PATHS, dtype=np.dtype(RESULT_DTYPE).name,
+                         computation=self.computation(sim_params, interactive))
+    
+    def monte_carlo_simulation(self, params, progress=None, cancel=None, cache=True):
+        """Run the Monte Carlo simulation
+
+        progress, if given, is called from the worker thread with partial results at
+        most every PROGRESS_INTERVAL seconds. Returns None if the cancel event is set
+        before the simulation finishes. cache=False neither reads nor stores the
+        result cache, for throwaway runs such as previews.
+        """
+        sim_params = SimulationParams.from_dict(params)
+        interactive = progress is not None or cancel is not None
+        
+        key = self.result_key(sim_params, interactive) if cache else None
+        results = self.result_cache.get(key)
+        if results is None:
+            mode, chunk_runs = self.computation(sim_params, interactive)
+            if mode == "exact":
+                results = run_monte_carlo(
+                    sim_params, CHART_PERCENTILES, retain="sample", sample_paths=SAMPLE_PATHS, dtype=RESULT_DTYPE,
+                    accumulation_cache=self.accumulation_cache
+                )
             else:
-                med_val = values[med_idx]
-            
-            idx10 = int(0.1 * len(values))
-            idx90 = int(0.9 * len(values))
-            
-            median.append(med_val)
-            p10.append(values[idx10])
-            p90.append(values[idx90])
+                # Simulate in chunks: memory stays bounded, the run count can adapt to a
+                # precision target, and between chunks the job can report or be cancelled
+                last_progress = None
+                chunks = iter_chunks(
+                    sim_params, CHART_PERCENTILES, chunk_runs=chunk_runs,
+                    target_standard_error=sim_params.target_standard_error, sample_paths=SAMPLE_PATHS, dtype=RESULT_DTYPE,
+                    accumulation_cache=self.accumulation_cache
+                )
+                for run in chunks:
+                    if cancel is not None and cancel.is_set():
+                        return None
+                    if progress is not None and (last_progress is None or time.perf_counter() - last_progress >= PROGRESS_INTERVAL):
+                        progress(run.results())
+                        last_progress = time.perf_counter()
+                
+                results = run.results()
+            self.result_cache.put(key, results)
         
-        return {"median": median, "p10": p10, "p90": p90}
+        return results
     
     def get_parameters_from_ui(self):
         """Get parameters from UI inputs"""
@@ -914,6 +1169,7 @@ class RetirementCalculator:
                 "averageInflation": float(self.avg_inflation_var.get()) / 100,
                 "ROI_volatility": float(self.roi_volatility_var.get()),
                 "inflation_volatility": float(self.inflation_volatility_var.get()),
+                "ROI_inflation_correlation": float(self.correlation_var.get()),
                 "monthlyExpenses": {
                     "health": float(self.expense_health_var.get()),
                     "food": float(self.expense_food_var.get()),
@@ -927,7 +1183,13 @@ class RetirementCalculator:
                     "carMaintenance": float(self.expense_car_maintenance_var.get())
                 },
                 "simulationRuns": int(self.simulation_runs_var.get()),
-                "simulationEndAge": 90
+                "simulationEndAge": 90,
+                "seed": int(self.seed_var.get()) if self.seed_var.get().strip() else None,
+                "targetStandardError": float(self.target_error_var.get()) / 100 if self.target_error_var.get().strip() else None,
+                "timeStep": "monthly" if self.monthly_steps_var.get() else "annual",
+                "returnModel": self.selected_return_model(),
+                "historyPath": self.history_path_var.get().strip() or None,
+                "blockLength": float(self.block_length_var.get())
             }
             
             return params
@@ -935,6 +1197,35 @@ class RetirementCalculator:
         except ValueError as e:
             raise ValueError(f"Invalid numeric input: {str(e)}")
     
+    def selected_return_model(self):
+        """Return model of the label selected in the return model box"""
+        labels = {label: model for model, label in self.return_model_labels.items()}
+        return labels.get(self.return_model_var.get(), "normal")
+    
+    def choose_history(self):
+        """Pick the historical dataset of the bootstrap models, converting a CSV to .npy once"""
+        file_path = filedialog.askopenfilename(
+            filetypes=[("Historical data", "*.csv *.npy"), ("All files", "*.*")],
+            title=self.get_text("label_historyPath")
+        )
+        if not file_path:
+            return
+        
+        try:
+            if file_path.lower().endswith(".csv"):
+                file_path = convert_csv(file_path)
+            stats = describe_history(file_path)
+        except Exception as e:
+            self.show_error(f"Error loading historical data: {str(e)}")
+            return
+        
+        self.history_path_var.set(file_path)
+        self.status_var.set(
+            f"{stats['years']} years of history: returns {stats['average_roi']:.1%} ± {stats['roi_volatility']:.1%}, "
+            f"inflation {stats['average_inflation']:.1%} ± {stats['inflation_volatility']:.1%}"
+        )
+        self.schedule_live_update()
+    
     def load_parameters_to_ui(self, params):
         """Load parameters to UI inputs"""
         try:
@@ -953,6 +1244,7 @@ class RetirementCalculator:
             self.avg_inflation_var.set(str(params["averageInflation"] * 100))
             self.roi_volatility_var.set(str(params["ROI_volatility"]))
             self.inflation_volatility_var.set(str(params["inflation_volatility"]))
+            self.correlation_var.set(str(params.get("ROI_inflation_correlation") or 0))
             
             self.expense_health_var.set(str(params["monthlyExpenses"]["health"]))
             self.expense_food_var.set(str(params["monthlyExpenses"]["food"]))
@@ -965,6 +1257,13 @@ class RetirementCalculator:
             self.expense_car_maintenance_var.set(str(params["annualExpenses"]["carMaintenance"]))
             
             self.simulation_runs_var.set(str(params["simulationRuns"]))
+            self.seed_var.set("" if params.get("seed") is None else str(params["seed"]))
+            target = params.get("targetStandardError")
+            self.target_error_var.set("" if target is None else str(target * 100))
+            self.monthly_steps_var.set(params.get("timeStep") == "monthly")
+            self.return_model_var.set(self.return_model_labels[params.get("returnModel") or "normal"])
+            self.history_path_var.set(params.get("historyPath") or "")
+            self.block_length_var.set(f"{params.get('blockLength') or DEFAULT_BLOCK_LENGTH:g}")
             
             # Validate params but don't trigger simulation
             self.validate_and_update(loading_event)
@@ -1014,7 +1313,7 @@ class RetirementCalculator:
                 params = json.load(f)
             
             # Validate parameters
-            self.validate_params_structure(params)
+            validate_params_structure(params)
             
             # Load parameters to UI
             self.load_parameters_to_ui(params)
@@ -1027,23 +1326,6 @@ class RetirementCalculator:
         except Exception as e:
             self.show_error(f"Error loading parameters: {str(e)}")
     
-    def validate_params_structure(self, params):
-        """Validate the structure of loaded parameters"""
-        required_fields = [
-            "currentAge", "legalRetirementAge", "fixedMonthlyPension", "currentAssets",
-            "capitalGainsTaxRate", "annualSavings", "intendedRetirementAge", "averageROI",
-            "averageInflation", "ROI_volatility", "inflation_volatility", "monthlyExpenses",
-            "annualExpenses", "simulationRuns", "simulationEndAge"
-        ]
-        
-        for field in required_fields:
-            if field not in params:
-                raise ValueError(f"Missing required field: {field}")
-        
-        for expense_type in ["monthlyExpenses", "annualExpenses"]:
-            if not isinstance(params[expense_type], dict):
-                raise ValueError(f"{expense_type} must be a dictionary")
-    
     def save_scenario(self):
         """Save current parameters as a scenario"""
         try:
@@ -1057,17 +1339,9 @@ class RetirementCalculator:
             # Get current parameters
             params = self.get_parameters_from_ui()
             
-            # Get existing scenarios
-            scenarios = self.load_scenarios_from_file()
-            
-            # Add new scenario
-            scenarios[scenario_name] = {
-                "params": params,
-                "created": datetime.now().isoformat()
-            }
-            
-            # Save scenarios
-            self.save_scenarios_to_file(scenarios)
+            # Save scenario
+            self.scenario_store.save(scenario_name, params)
+            self.store_current_metrics(scenario_name, params)
             
             # Clear scenario name
             self.scenario_name_var.set("")
@@ -1081,7 +1355,7 @@ class RetirementCalculator:
         """Show dialog to save scenario"""
         dialog = tk.Toplevel(self.root)
         dialog.title("Save Scenario")
-        dialog.geometry("300x120")
+        dialog.geometry("300x170")
         dialog.resizable(False, False)
         dialog.transient(self.root)
         dialog.grab_set()
@@ -1092,6 +1366,11 @@ class RetirementCalculator:
         name_entry = ttk.Entry(dialog, textvariable=name_var, width=30)
         name_entry.pack(pady=5, padx=10, fill="x")
         
+        ttk.Label(dialog, text="Tag (optional):").pack(pady=(5, 0))
+        
+        tag_var = tk.StringVar()
+        ttk.Combobox(dialog, textvariable=tag_var, values=self.scenario_store.tags(), width=28).pack(pady=5, padx=10, fill="x")
+        
         def save():
             name = name_var.get().strip()
             if not name:
@@ -1102,22 +1381,14 @@ class RetirementCalculator:
                 # Get current parameters
                 params = self.get_parameters_from_ui()
                 
-                # Get existing scenarios
-                scenarios = self.load_scenarios_from_file()
-                
                 # Ask for confirmation if scenario exists
-                if name in scenarios:
+                if self.scenario_store.exists(name):
                     if not messagebox.askyesno("Confirm", f"Scenario '{name}' already exists. Overwrite?", parent=dialog):
                         return
                 
-                # Add new scenario
-                scenarios[name] = {
-                    "params": params,
-                    "created": datetime.now().isoformat()
-                }
-                
-                # Save scenarios
-                self.save_scenarios_to_file(scenarios)
+                # Save scenario
+                self.scenario_store.save(name, params, tag=tag_var.get().strip() or None)
+                self.store_current_metrics(name, params)
                 
                 self.status_var.set(f"Scenario '{name}' saved")
                 dialog.destroy()
@@ -1140,98 +1411,134 @@ class RetirementCalculator:
         y = self.root.winfo_y() + (self.root.winfo_height() // 2) - (dialog.winfo_height() // 2)
         dialog.geometry(f"+{x}+{y}")
     
-    def load_scenarios(self):
-        """Load scenarios from file"""
+    def open_scenario_store(self):
+        """Open the scenario database, importing scenarios.pickle on first use"""
         try:
-            return self.load_scenarios_from_file()
+            return ScenarioStore()
         except Exception as e:
-            self.show_error(f"Error loading scenarios: {str(e)}")
-            return {}
+            self.show_error(f"Error opening scenarios: {str(e)}")
+            return None
     
-    def load_scenarios_from_file(self):
-        """Load scenarios from file"""
-        try:
-            # Create scenarios directory if it doesn't exist
-            scenarios_dir = os.path.expanduser("~/.retirecalc")
-            if not os.path.exists(scenarios_dir):
-                os.makedirs(scenarios_dir)
-            
-            scenarios_file = os.path.join(scenarios_dir, "scenarios.pickle")
-            
-            if not os.path.exists(scenarios_file):
-                return {}
-            
-            with open(scenarios_file, 'rb') as f:
-                return pickle.load(f)
-            
-        except Exception as e:
-            print(f"Error loading scenarios: {str(e)}")
-            return {}
+    def comparison_pool(self):
+        """Worker pool for scenario comparisons, started on first use and kept for the session
+
+        Workers are spawned rather than forked, so they never inherit the Tk
+        interpreter or the threads of this process.
+        """
+        if self.comparison_executor is None:
+            self.comparison_executor = ProcessPoolExecutor(
+                max_workers=os.cpu_count() or 1, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self.comparison_executor
+    
+    def shutdown(self):
+        """Stop the comparison workers, dropping queued scenarios"""
+        if self.comparison_executor is not None:
+            self.comparison_executor.shutdown(wait=False, cancel_futures=True)
+            self.comparison_executor = None
+    
+    def store_scenario_metrics(self, name, params, results, interactive=False):
+        """Cache a scenario's summary metrics so scenario lists can show them without resimulating
+
+        The metrics are stored under the result key of the run they came from
+        (interactive for the displayed results), so lists can tell when they no
+        longer match what the scenario would produce.
+        """
+        self.scenario_store.update_metrics(
+            name, self.result_key(SimulationParams.from_dict(params), interactive), results["success_probability"],
+            results["asset_percentiles"]["median"][-1], results["asset_percentiles"]["p10"][-1]
+        )
+    
+    def store_current_metrics(self, name, params):
+        """Cache the displayed results as a scenario's metrics if they belong to its parameters"""
+        if self.simulation_results is not None and not self.simulation_running and params == self.last_run_params:
+            self.store_scenario_metrics(name, params, self.simulation_results, interactive=True)
     
-    def save_scenarios_to_file(self, scenarios):
-        """Save scenarios to file"""
+    def metrics_stale(self, row):
+        """Whether a scenario row's cached metrics came from a different run than its parameters would give now
+
+        That happens after an engine or dataset change. Metrics of unseeded
+        scenarios have no key and cannot be checked.
+        """
+        if row["metrics_key"] is None:
+            return False
         try:
-            # Create scenarios directory if it doesn't exist
-            scenarios_dir = os.path.expanduser("~/.retirecalc")
-            if not os.path.exists(scenarios_dir):
-                os.makedirs(scenarios_dir)
-            
-            scenarios_file = os.path.join(scenarios_dir, "scenarios.pickle")
-            
-            with open(scenarios_file, 'wb') as f:
-                pickle.dump(scenarios, f)
-            
-        except Exception as e:
-            self.show_error(f"Error saving scenarios: {str(e)}")
+            sim_params = SimulationParams.from_dict(row["params"])
+            return row["metrics_key"] not in (self.result_key(sim_params), self.result_key(sim_params, interactive=True))
+        except (OSError, ValueError, KeyError):
+            # Parameters that no longer simulate (e.g. a missing dataset) cannot reproduce the metrics
+            return True
+    
+    def create_scenario_tree(self, parent, selectmode="browse"):
+        """Sortable scenario list with cached metrics; returns the tree and a function to refresh it"""
+        columns = [
+            ("name", "Name", 160), ("tag", "Tag", 80), ("created", "Created", 110),
+            ("success_probability", "Success", 70), ("final_median", "Median Final", 100),
+        ]
+        
+        frame = ttk.Frame(parent)
+        frame.pack(fill="both", expand=True)
+        
+        tree = ttk.Treeview(frame, columns=[key for key, _, _ in columns], show="headings", selectmode=selectmode)
+        scrollbar = ttk.Scrollbar(frame, orient="vertical", command=tree.yview)
+        tree.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side="right", fill="y")
+        tree.pack(side="left", fill="both", expand=True)
+        
+        sort = {"order_by": "name", "descending": False}
+        
+        def refresh():
+            # Sorting happens in SQLite on indexed columns, so this stays instant for thousands of rows
+            tree.delete(*tree.get_children())
+            for row in self.scenario_store.list(sort["order_by"], sort["descending"], with_params=True):
+                success = "--" if row["success_probability"] is None else f"{row['success_probability'] * 100:.1f}%"
+                median = "--" if row["final_median"] is None else f"€{row['final_median']:,.0f}"
+                if row["success_probability"] is not None and self.metrics_stale(row):
+                    success, median = f"{success} (stale)", f"{median} (stale)"
+                created = datetime.fromisoformat(row["created"]).strftime('%Y-%m-%d %H:%M')
+                tree.insert("", "end", iid=row["name"], values=(row["name"], row["tag"] or "", created, success, median))
+        
+        def sort_by(key):
+            sort["descending"] = not sort["descending"] if sort["order_by"] == key else key != "name"
+            sort["order_by"] = key
+            refresh()
+        
+        for key, heading, width in columns:
+            tree.heading(key, text=heading, command=lambda key=key: sort_by(key))
+            tree.column(key, width=width, anchor="w")
+        
+        refresh()
+        return tree, refresh
     
     def manage_scenarios(self):
         """Show dialog to manage scenarios"""
         dialog = tk.Toplevel(self.root)
         dialog.title("Manage Scenarios")
-        dialog.geometry("500x400")
+        dialog.geometry("600x400")
         dialog.transient(self.root)
         dialog.grab_set()
         
-        # Load scenarios
-        scenarios = self.load_scenarios_from_file()
-        
-        # Create listbox with scenarios
+        # List of scenarios
         ttk.Label(dialog, text="Saved Scenarios:").pack(pady=(10, 5), padx=10, anchor="w")
         
         frame = ttk.Frame(dialog)
         frame.pack(fill="both", expand=True, padx=10, pady=5)
-        
-        # Scrollbar
-        scrollbar = ttk.Scrollbar(frame)
-        scrollbar.pack(side="right", fill="y")
-        
-        # Listbox
-        listbox = tk.Listbox(frame, yscrollcommand=scrollbar.set, height=15, selectmode="single")
-        listbox.pack(side="left", fill="both", expand=True)
-        
-        scrollbar.config(command=listbox.yview)
-        
-        # Populate listbox
-        scenario_names = sorted(scenarios.keys())
-        for name in scenario_names:
-            created = datetime.fromisoformat(scenarios[name]["created"])
-            listbox.insert("end", f"{name} ({created.strftime('%Y-%m-%d %H:%M')})")
+        tree, refresh = self.create_scenario_tree(frame)
         
         # Buttons
         button_frame = ttk.Frame(dialog)
         button_frame.pack(pady=10, fill="x")
         
         def load_selected():
-            if not listbox.curselection():
+            if not tree.selection():
                 messagebox.showinfo("Info", "Please select a scenario", parent=dialog)
                 return
             
-            index = listbox.curselection()[0]
-            name = scenario_names[index]
+            name = tree.selection()[0]
             
             try:
                 # Load scenario parameters
-                params = scenarios[name]["params"]
+                params = self.scenario_store.load(name)
                 
                 # Load parameters to UI
                 self.load_parameters_to_ui(params)
@@ -1246,26 +1553,19 @@ class RetirementCalculator:
                 messagebox.showerror("Error", f"Error loading scenario: {str(e)}", parent=dialog)
         
         def delete_selected():
-            if not listbox.curselection():
+            if not tree.selection():
                 messagebox.showinfo("Info", "Please select a scenario", parent=dialog)
                 return
             
-            index = listbox.curselection()[0]
-            name = scenario_names[index]
+            name = tree.selection()[0]
             
             if not messagebox.askyesno("Confirm", f"Delete scenario '{name}'?", parent=dialog):
                 return
             
             try:
                 # Delete scenario
-                del scenarios[name]
-                
-                # Save scenarios
-                self.save_scenarios_to_file(scenarios)
-                
-                # Update listbox
-                listbox.delete(index)
-                scenario_names.pop(index)
+                self.scenario_store.delete(name)
+                tree.delete(name)
                 
                 self.status_var.set(f"Scenario '{name}' deleted")
                 
@@ -1286,15 +1586,12 @@ class RetirementCalculator:
         """Show dialog to compare scenarios"""
         dialog = tk.Toplevel(self.root)
         dialog.title("Compare Scenarios")
-        dialog.geometry("800x600")
+        dialog.geometry("1100x600")
         dialog.transient(self.root)
         dialog.grab_set()
         
-        # Load scenarios
-        scenarios = self.load_scenarios_from_file()
-        
         # Check if there are at least 2 scenarios
-        if len(scenarios) < 2:
+        if self.scenario_store.count() < 2:
             messagebox.showinfo("Info", "You need at least two scenarios to compare", parent=dialog)
             dialog.destroy()
             return
@@ -1309,12 +1606,10 @@ class RetirementCalculator:
         
         ttk.Label(left_frame, text="Select Scenarios:").pack(pady=(0, 5), anchor="w")
         
-        # Checkbuttons for scenarios
-        scenario_vars = {}
-        for name in sorted(scenarios.keys()):
-            var = tk.BooleanVar(value=False)
-            scenario_vars[name] = var
-            ttk.Checkbutton(left_frame, text=name, variable=var).pack(anchor="w", pady=2)
+        # Sortable scenario list; select several with Ctrl/Shift-click
+        tree_frame = ttk.Frame(left_frame)
+        tree_frame.pack(fill="both", expand=True)
+        tree, _ = self.create_scenario_tree(tree_frame, selectmode="extended")
         
         # Right panel: comparison chart
         right_frame = ttk.Frame(main_frame)
@@ -1327,49 +1622,171 @@ class RetirementCalculator:
         canvas.draw()
         canvas.get_tk_widget().pack(fill="both", expand=True)
         
+        # Progress of a running comparison
+        progress_var = tk.DoubleVar(value=0)
+        progress_label_var = tk.StringVar(value="")
+        
+        # State of the running comparison, if any
+        comparison = {"cancel": None, "futures": None}
+        
+        def comparison_rows(scenarios, finished, selected, paired):
+            """Chart rows for the scenarios finished so far, with deltas once the reference is in"""
+            reference_results = finished.get(selected[0])
+            rows = []
+            for name in selected:
+                if name not in finished:
+                    continue
+                params = scenarios[name]
+                sim_results = finished[name]
+                
+                # Success rate difference to the first selected scenario
+                success_delta = success_delta_ci = None
+                if reference_results is not None:
+                    success_delta, success_delta_ci = success_difference(sim_results, reference_results, paired=paired)
+                    success_delta, success_delta_ci = success_delta * 100, success_delta_ci * 100
+                
+                rows.append({
+                    "name": name,
+                    "success_rate": sim_results["success_probability"] * 100,
+                    "final_median": sim_results["asset_percentiles"]["median"][-1],
+                    "final_p10": sim_results["asset_percentiles"]["p10"][-1],
+                    "retirement_age": params["intendedRetirementAge"],
+                    "avg_roi": params["averageROI"] * 100,
+                    "avg_inflation": params["averageInflation"] * 100,
+                    "correlation": params.get("ROI_inflation_correlation") or 0.0,
+                    "is_reference": name == selected[0],
+                    "success_delta": success_delta,
+                    "success_delta_ci": success_delta_ci
+                })
+            return rows
+        
+        def finish_comparison(status):
+            comparison["cancel"] = comparison["futures"] = None
+            compare_button.config(state="normal")
+            cancel_button.config(state="disabled")
+            self.status_var.set(status)
+        
         # Compare button
         def compare():
             # Get selected scenarios
-            selected = [name for name, var in scenario_vars.items() if var.get()]
+            selected = list(tree.selection())
             
             if len(selected) < 2:
                 messagebox.showinfo("Info", "Please select at least two scenarios to compare", parent=dialog)
                 return
             
-            # Run comparison
-            results = []
-            for name in selected:
-                params = scenarios[name]["params"]
+            scenarios = {name: self.scenario_store.load(name) for name in selected}
+            sim_params = {name: SimulationParams.from_dict(params) for name, params in scenarios.items()}
+            
+            # With common random numbers all scenarios are driven by one shared shock
+            # matrix, which each worker redraws from its (runs, years, seed) spec
+            shared_spec = None
+            if common_random_numbers_var.get():
+                shared_spec = shared_shock_spec([sim_params[name] for name in selected])
+            
+            # Independent runs are each scenario's own results, so earlier runs may be cached
+            finished = {}
+            keys = {}
+            if shared_spec is None:
+                for name in selected:
+                    keys[name] = self.result_key(sim_params[name])
+                    cached = self.result_cache.get(keys[name])
+                    if cached is not None:
+                        finished[name] = cached
+            pending = [name for name in selected if name not in finished]
+            
+            cancel = threading.Event()
+            comparison["cancel"] = cancel
+            compare_button.config(state="disabled")
+            cancel_button.config(state="normal" if pending else "disabled")
+            
+            def show_progress():
+                self.create_comparison_chart(comparison_rows(scenarios, finished, selected, shared_spec is not None), ax, canvas)
+                progress_var.set(100 * len(finished) / len(selected))
+                progress_label_var.set(f"{len(finished)} / {len(selected)} scenarios")
+            
+            def add_result(name, sim_results):
+                # Results that arrive after a cancel or after the dialog closed are dropped
+                if cancel.is_set() or not dialog.winfo_exists():
+                    return
                 
-                # Set status
-                self.status_var.set(f"Simulating scenario '{name}'...")
-                dialog.update()
-                
-                # Run simulation
-                sim_results = self.monte_carlo_simulation(params)
+                finished[name] = sim_results
+                if shared_spec is None:
+                    self.result_cache.put(keys[name], sim_results)
+                    self.store_scenario_metrics(name, scenarios[name], sim_results)
                 
-                # Calculate key metrics
-                success_rate = sim_results["success_probability"] * 100
-                final_median = sim_results["asset_percentiles"]["median"][-1]
-                final_p10 = sim_results["asset_percentiles"]["p10"][-1]
-                
-                results.append({
-                    "name": name,
-                    "success_rate": success_rate,
-                    "final_median": final_median,
-                    "final_p10": final_p10,
-                    "retirement_age": params["intendedRetirementAge"],
-                    "avg_roi": params["averageROI"] * 100,
-                    "avg_inflation": params["averageInflation"] * 100
-                })
-            
-            # Create comparison chart
-            self.create_comparison_chart(results, ax, canvas)
+                show_progress()
+                if len(finished) == len(selected):
+                    finish_comparison("Comparison complete")
+            
+            def comparison_failed(message):
+                if cancel.is_set() or not dialog.winfo_exists():
+                    return
+                finish_comparison("Comparison failed")
+                messagebox.showerror("Error", f"Comparison failed: {message}", parent=dialog)
+            
+            show_progress()
+            if not pending:
+                finish_comparison("Comparison complete")
+                return
             
-            # Reset status
-            self.status_var.set("Comparison complete")
+            # One scenario per task on the session's worker pool, one worker per core
+            executor = self.comparison_pool()
+            futures = {
+                executor.submit(simulate_scenario, sim_params[name], shared_spec, CHART_PERCENTILES, SAMPLE_PATHS, RESULT_DTYPE): name
+                for name in pending
+            }
+            comparison["futures"] = futures
+            
+            def collect_results():
+                # Post results to the dialog in the order they finish
+                try:
+                    for future in as_completed(futures):
+                        if cancel.is_set():
+                            return
+                        self.root.after(0, lambda name=futures[future], sim_results=future.result(): add_result(name, sim_results))
+                except CancelledError:
+                    pass
+                except Exception as e:
+                    if isinstance(e, BrokenProcessPool):
+                        # A worker died; the next comparison starts a fresh pool
+                        self.root.after(0, self.shutdown)
+                    message = str(e)
+                    self.root.after(0, lambda: comparison_failed(message))
+                finally:
+                    for future in futures:
+                        future.cancel()
+            
+            self.status_var.set(f"Simulating {len(pending)} scenarios...")
+            threading.Thread(target=collect_results, daemon=True).start()
+        
+        def cancel_comparison():
+            # Scenarios that have not started are dropped; running ones finish in the
+            # background and their results are ignored
+            if comparison["cancel"] is not None:
+                comparison["cancel"].set()
+                for future in comparison["futures"]:
+                    future.cancel()
+                finish_comparison("Comparison cancelled")
+        
+        def close_dialog():
+            cancel_comparison()
+            dialog.destroy()
             
-        ttk.Button(left_frame, text="Compare", command=compare).pack(pady=10)
+        common_random_numbers_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(left_frame, text="Common random numbers", variable=common_random_numbers_var).pack(anchor="w", pady=(10, 2))
+        
+        button_frame = ttk.Frame(left_frame)
+        button_frame.pack(pady=10)
+        compare_button = ttk.Button(button_frame, text="Compare", command=compare)
+        compare_button.pack(side="left", padx=(0, 5))
+        cancel_button = ttk.Button(button_frame, text="Cancel", command=cancel_comparison, state="disabled")
+        cancel_button.pack(side="left")
+        
+        ttk.Progressbar(left_frame, variable=progress_var, maximum=100).pack(fill="x")
+        ttk.Label(left_frame, textvariable=progress_label_var).pack(anchor="w")
+        
+        dialog.protocol("WM_DELETE_WINDOW", close_dialog)
         
         # Center dialog on parent
         dialog.update_idletasks()
@@ -1378,9 +1795,12 @@ class RetirementCalculator:
         dialog.geometry(f"+{x}+{y}")
     
     def create_comparison_chart(self, results, ax, canvas):
-        """Create chart comparing scenarios"""
-        # Clear axis
+        """Create chart comparing scenarios; called again as each scenario of a comparison finishes"""
+        # Clear axis, and drop the retirement age axis of the previous draw
         ax.clear()
+        for other_ax in ax.figure.axes:
+            if other_ax is not ax:
+                other_ax.remove()
         
         # Sort results by success rate
         results.sort(key=lambda x: x["success_rate"], reverse=True)
@@ -1420,11 +1840,18 @@ class RetirementCalculator:
         for i, v in enumerate(success_rates):
             ax.text(i - width, v + 1, f"{v:.1f}%", ha='center', fontweight='bold')
         
+        # Success rate difference to the reference scenario with its 95% confidence
+        # interval, pending until the reference scenario has finished
+        deltas = [
+            "ref" if r["is_reference"] else "…" if r["success_delta"] is None else f"{r['success_delta']:+.1f} ± {r['success_delta_ci']:.1f}"
+            for r in results
+        ]
+        
         # Add details table below chart
         ax.table(
-            cellText=[[f"{r['name']}", f"{r['retirement_age']}", f"{r['avg_roi']:.1f}%", 
-                       f"{r['success_rate']:.1f}%", f"€{r['final_median']:,.0f}"] for r in results],
-            colLabels=["Scenario", "Ret. Age", "ROI", "Success", "Median Assets"],
+            cellText=[[f"{r['name']}", f"{r['retirement_age']}", f"{r['avg_roi']:.1f}%", f"{r['correlation']:+.2f}",
+                       f"{r['success_rate']:.1f}%", delta, f"€{r['final_median']:,.0f}"] for r, delta in zip(results, deltas)],
+            colLabels=["Scenario", "Ret. Age", "ROI", "ROI/Infl. ρ", "Success", "Δ Success (pp)", "Median Assets"],
             loc='bottom',
             cellLoc='center',
             bbox=[0, -0.35, 1, 0.25]
@@ -1438,6 +1865,257 @@ class RetirementCalculator:
         # Redraw canvas
         canvas.draw()
     
+    def parameter_sweep(self):
+        """Show dialog to sweep two parameters and chart the success probability as a heatmap"""
+        try:
+            base_params = self.get_parameters_from_ui()
+        except ValueError as e:
+            self.show_error(f"Invalid input: {str(e)}")
+            return
+        
+        dialog = tk.Toplevel(self.root)
+        dialog.title(self.get_text("menu_tools_sweep"))
+        dialog.geometry("950x650")
+        dialog.transient(self.root)
+        
+        # Sweepable parameters: (parameter key, label, factor from parameter value to UI value)
+        sweep_parameters = [
+            ("intendedRetirementAge", self.get_text("label_retirementAge"), 1),
+            ("legalRetirementAge", self.get_text("label_legalRetirementAge"), 1),
+            ("averageROI", self.get_text("label_averageROI"), 100),
+            ("averageInflation", self.get_text("label_averageInflation"), 100),
+            ("ROI_volatility", self.get_text("label_ROI_volatility"), 1),
+            ("inflation_volatility", self.get_text("label_inflation_volatility"), 1),
+            ("currentAssets", self.get_text("label_currentAssets"), 1),
+            ("annualSavings", self.get_text("label_annualSavings"), 1),
+            ("fixedMonthlyPension", self.get_text("label_fixedMonthlyPension"), 1),
+            ("capitalGainsTaxRate", self.get_text("label_capitalGainsTaxRate"), 100),
+        ]
+        labels = [label for _, label, _ in sweep_parameters]
+        
+        # Create main frame
+        main_frame = ttk.Frame(dialog)
+        main_frame.pack(fill="both", expand=True, padx=10, pady=10)
+        
+        # Left panel: sweep settings
+        left_frame = ttk.Frame(main_frame, width=250)
+        left_frame.pack(side="left", fill="y", padx=(0, 10))
+        
+        axis_vars = []
+        for row, (title, default_index, default_range) in enumerate([
+            ("Vertical axis:", 0, ("55", "66", "12")),
+            ("Horizontal axis:", 2, ("5", "11", "13")),
+        ]):
+            frame = ttk.LabelFrame(left_frame, text=title)
+            frame.pack(fill="x", pady=5)
+            
+            parameter_var = tk.StringVar(value=labels[default_index])
+            ttk.Combobox(frame, textvariable=parameter_var, values=labels, state="readonly", width=28).grid(row=0, column=0, columnspan=2, padx=5, pady=2)
+            
+            range_vars = []
+            for i, (text, value) in enumerate(zip(["From", "To", "Steps"], default_range)):
+                ttk.Label(frame, text=text).grid(row=i + 1, column=0, sticky="w", padx=5, pady=2)
+                var = tk.StringVar(value=value)
+                ttk.Entry(frame, textvariable=var, width=10).grid(row=i + 1, column=1, sticky="w", padx=5, pady=2)
+                range_vars.append(var)
+            
+            axis_vars.append((parameter_var, range_vars))
+        
+        runs_frame = ttk.Frame(left_frame)
+        runs_frame.pack(fill="x", pady=5)
+        ttk.Label(runs_frame, text="Runs per cell").pack(side="left", padx=5)
+        runs_var = tk.StringVar(value="10000")
+        ttk.Entry(runs_frame, textvariable=runs_var, width=10).pack(side="left", padx=5)
+        
+        # Right panel: heatmap
+        right_frame = ttk.Frame(main_frame)
+        right_frame.pack(side="right", fill="both", expand=True)
+        
+        figure = plt.Figure(figsize=(8, 6), dpi=100)
+        canvas = FigureCanvasTkAgg(figure, master=right_frame)
+        canvas.draw()
+        canvas.get_tk_widget().pack(fill="both", expand=True)
+        
+        def show(results, axis_parameters):
+            if not dialog.winfo_exists():
+                return
+            
+            (y_key, y_label, y_factor), (x_key, x_label, x_factor) = axis_parameters
+            y_values = np.asarray(results["axes"][0][1]) * y_factor
+            x_values = np.asarray(results["axes"][1][1]) * x_factor
+            success = results["success_probability"] * 100
+            
+            figure.clf()
+            ax = figure.add_subplot(111)
+            mesh = ax.pcolormesh(x_values, y_values, success, shading="nearest", cmap="RdYlGn", vmin=0, vmax=100)
+            figure.colorbar(mesh, ax=ax, label=f"{self.get_text('successProbability')} (%)")
+            
+            # Contour lines at the usual decision thresholds
+            if len(x_values) > 1 and len(y_values) > 1:
+                contours = ax.contour(x_values, y_values, success, levels=[50, 80, 90], colors="black", linewidths=1)
+                ax.clabel(contours, fmt="%d%%")
+            
+            ax.set_xlabel(x_label)
+            ax.set_ylabel(y_label)
+            ax.set_title(f"{self.get_text('successProbability')} ({results['runs']:,} runs per cell)")
+            
+            figure.tight_layout()
+            canvas.draw()
+            
+            run_button.configure(state="normal")
+            self.status_var.set("Parameter sweep complete")
+        
+        def run():
+            try:
+                axes = []
+                axis_parameters = []
+                for parameter_var, (from_var, to_var, steps_var) in axis_vars:
+                    key, label, factor = sweep_parameters[labels.index(parameter_var.get())]
+                    values = np.linspace(float(from_var.get()), float(to_var.get()), int(steps_var.get())) / factor
+                    axes.append((key, values))
+                    axis_parameters.append((key, label, factor))
+                
+                if axes[0][0] == axes[1][0]:
+                    messagebox.showerror("Error", "Please choose two different parameters", parent=dialog)
+                    return
+                
+                params = SimulationParams.from_dict(dict(base_params, simulationRuns=int(runs_var.get())))
+            except ValueError as e:
+                messagebox.showerror("Error", f"Invalid input: {str(e)}", parent=dialog)
+                return
+            
+            def sweep_failed(message):
+                if dialog.winfo_exists():
+                    run_button.configure(state="normal")
+                self.show_error(message)
+            
+            def sweep_thread():
+                try:
+                    results = sweep(params, axes)
+                    self.root.after(0, lambda: show(results, axis_parameters))
+                except Exception as e:
+                    # e is cleared when the except block ends, so bind the message now
+                    message = f"Sweep error: {str(e)}"
+                    self.root.after(0, lambda: sweep_failed(message))
+            
+            run_button.configure(state="disabled")
+            self.status_var.set("Running parameter sweep...")
+            threading.Thread(target=sweep_thread, daemon=True).start()
+        
+        run_button = ttk.Button(left_frame, text="Run Sweep", command=run)
+        run_button.pack(pady=10)
+        
+        # Center dialog on parent
+        dialog.update_idletasks()
+        x = self.root.winfo_x() + (self.root.winfo_width() // 2) - (dialog.winfo_width() // 2)
+        y = self.root.winfo_y() + (self.root.winfo_height() // 2) - (dialog.winfo_height() // 2)
+        dialog.geometry(f"+{x}+{y}")
+    
+    def solve_retirement_age(self):
+        """Show dialog to find the earliest retirement age that reaches a target success rate"""
+        try:
+            base_params = self.get_parameters_from_ui()
+        except ValueError as e:
+            self.show_error(f"Invalid input: {str(e)}")
+            return
+        
+        dialog = tk.Toplevel(self.root)
+        dialog.title(self.get_text("menu_tools_retirementAge"))
+        dialog.transient(self.root)
+        
+        main_frame = ttk.Frame(dialog)
+        main_frame.pack(fill="both", expand=True, padx=10, pady=10)
+        
+        ttk.Label(main_frame, text="Target success rate (%)").grid(row=0, column=0, sticky="w", padx=5, pady=2)
+        target_var = tk.StringVar(value="90")
+        ttk.Entry(main_frame, textvariable=target_var, width=10).grid(row=0, column=1, sticky="w", padx=5, pady=2)
+        
+        ttk.Label(main_frame, text="Search ages").grid(row=1, column=0, sticky="w", padx=5, pady=2)
+        age_frame = ttk.Frame(main_frame)
+        age_frame.grid(row=1, column=1, sticky="w")
+        min_age_var = tk.StringVar(value=str(base_params["currentAge"] + 1))
+        max_age_var = tk.StringVar(value=str(base_params["legalRetirementAge"]))
+        ttk.Entry(age_frame, textvariable=min_age_var, width=5).pack(side="left", padx=5, pady=2)
+        ttk.Label(age_frame, text="–").pack(side="left")
+        ttk.Entry(age_frame, textvariable=max_age_var, width=5).pack(side="left", padx=5, pady=2)
+        
+        result_var = tk.StringVar(value="")
+        ttk.Label(main_frame, textvariable=result_var, wraplength=420, justify="left").grid(row=3, column=0, columnspan=2, sticky="w", padx=5, pady=10)
+        
+        solution = {}
+        
+        def show(result):
+            if not dialog.winfo_exists():
+                return
+            
+            solve_button.configure(state="normal")
+            self.status_var.set("Retirement age search complete")
+            
+            target = result["target_success"] * 100
+            low, high = (value * 100 for value in result["success_interval"])
+            if result["age"] is None:
+                result_var.set(
+                    f"No age up to {max(result['success_by_age'])} reaches {target:.0f}% success "
+                    f"(best: {result['success_probability'] * 100:.1f}%, 95% CI {low:.1f}–{high:.1f}%)."
+                )
+                return
+            
+            text = (
+                f"Earliest safe retirement age: {result['age']}\n"
+                f"Success at {result['age']}: {result['success_probability'] * 100:.1f}% (95% CI {low:.1f}–{high:.1f}%), "
+                f"{result['confidence'] * 100:.0f}% confident of meeting the {target:.0f}% target."
+            )
+            if result["earlier_success_probability"] is not None:
+                text += f"\nRetiring at {result['age'] - 1} instead: {result['earlier_success_probability'] * 100:.1f}% success."
+            text += f"\n({result['runs']:,} runs, seed {result['seed']})"
+            result_var.set(text)
+            
+            solution["age"] = result["age"]
+            apply_button.configure(state="normal")
+        
+        def solve():
+            try:
+                target = float(target_var.get()) / 100
+                min_age, max_age = int(min_age_var.get()), int(max_age_var.get())
+                params = SimulationParams.from_dict(base_params)
+            except ValueError as e:
+                messagebox.showerror("Error", f"Invalid input: {str(e)}", parent=dialog)
+                return
+            
+            def solve_thread():
+                try:
+                    result = earliest_retirement_age(params, target, min_age, max_age)
+                    self.root.after(0, lambda: show(result))
+                except Exception as e:
+                    message = f"Retirement age search error: {str(e)}"
+                    self.root.after(0, lambda: self.show_error(message))
+                    self.root.after(0, lambda: solve_button.configure(state="normal") if dialog.winfo_exists() else None)
+            
+            solve_button.configure(state="disabled")
+            apply_button.configure(state="disabled")
+            result_var.set("Searching...")
+            self.status_var.set("Searching retirement ages...")
+            threading.Thread(target=solve_thread, daemon=True).start()
+        
+        def apply():
+            # Take the age over into the main form and rerun the simulation
+            self.retirement_age_var.set(str(solution["age"]))
+            self.validate_and_update(event=True)
+            dialog.destroy()
+        
+        button_frame = ttk.Frame(main_frame)
+        button_frame.grid(row=2, column=0, columnspan=2, pady=10)
+        solve_button = ttk.Button(button_frame, text="Find Age", command=solve)
+        solve_button.pack(side="left", padx=5)
+        apply_button = ttk.Button(button_frame, text="Use This Age", command=apply, state="disabled")
+        apply_button.pack(side="left", padx=5)
+        
+        # Center dialog on parent
+        dialog.update_idletasks()
+        x = self.root.winfo_x() + (self.root.winfo_width() // 2) - (dialog.winfo_width() // 2)
+        y = self.root.winfo_y() + (self.root.winfo_height() // 2) - (dialog.winfo_height() // 2)
+        dialog.geometry(f"+{x}+{y}")
+    
     def export_results(self):
         """Export simulation results to a file"""
         if not self.simulation_results:
@@ -1457,7 +2135,9 @@ class RetirementCalculator:
             
             # Export results
             with open(file_path, 'w', newline='') as f:
-                f.write("Age,AssetP10,AssetMedian,AssetP90,SpendingMedian\n")
+                f.write("Age,AssetP10,AssetMedian,AssetP90,SpendingMedian,Seed\n")
+                
+                seed = self.simulation_results.get("seed", "")
                 
                 for i, age in enumerate(self.simulation_results["ages"]):
                     asset_p10 = self.simulation_results["asset_percentiles"]["p10"][i]
@@ -1465,7 +2145,7 @@ class RetirementCalculator:
                     asset_p90 = self.simulation_results["asset_percentiles"]["p90"][i]
                     spending_median = self.simulation_results["spending_percentiles"]["median"][i]
                     
-                    f.write(f"{age},{asset_p10},{asset_median},{asset_p90},{spending_median}\n")
+                    f.write(f"{age},{asset_p10},{asset_median},{asset_p90},{spending_median},{seed}\n")
             
             self.status_var.set(f"Results exported to {file_path}")
             
@@ -1484,25 +2164,6 @@ class RetirementCalculator:
         filepath = os.path.join(os.path.dirname(__file__), filename)
         
         try:
-            # Create PDF document
-            doc = SimpleDocTemplate(filepath, pagesize=A4, rightMargin=20, leftMargin=20, topMargin=20, bottomMargin=20)
-            story = []
-            styles = getSampleStyleSheet()
-            
-            # Add title
-            title = Paragraph("Retirement Simulation Results", styles["Title"])
-            story.append(title)
-            story.append(Spacer(1, 20))
-            
-            # Add date
-            date_str = f"Generated on: {now.strftime('%Y-%m-%d %H:%M')}"
-            story.append(Paragraph(date_str, styles["Normal"]))
-            story.append(Spacer(1, 20))
-            
-            # Add parameters section
-            story.append(Paragraph("Parameters:", styles["Heading2"]))
-            story.append(Spacer(1, 10))
-            
             # Format parameters - use the correct variable names from your class
             params = [
                 f"Current Age: {self.current_age_var.get()}",
@@ -1512,45 +2173,31 @@ class RetirementCalculator:
                 f"Monthly Pension: {self.monthly_pension_var.get()}",
                 f"Average ROI: {self.avg_roi_var.get()}%",
                 f"Average Inflation: {self.avg_inflation_var.get()}%",
-                f"Simulation Runs: {self.simulation_runs_var.get()}"
+                f"ROI/Inflation Correlation: {self.correlation_var.get()}",
+                f"Simulation Runs: {self.simulation_results.get('runs', self.simulation_runs_var.get())}",
+                f"Random Seed: {self.simulation_results.get('seed')}"
             ]
             
-            for param in params:
-                story.append(Paragraph(param, styles["Normal"]))
-            
-            story.append(Spacer(1, 20))
-            
-            # Add detailed simulation results
-            story.append(Paragraph("Simulation Results:", styles["Heading2"]))
-            story.append(Spacer(1, 10))
-            
-            # Add success rate
-            success_rate = self.success_rate_var.get()
-            story.append(Paragraph(f"Success Probability: {success_rate}", styles["Normal"]))
-            
-            # Add median assets at legal retirement
-            median_assets = self.median_assets_var.get()
-            story.append(Paragraph(f"Median Assets at Legal Retirement: {median_assets}", styles["Normal"]))
-            
-            # Add worst case scenario
-            worst_case = self.worst_case_var.get()
-            story.append(Paragraph(f"10th Percentile Assets: {worst_case}", styles["Normal"]))
-            
-            story.append(Spacer(1, 20))
-            
-            # Capture the chart from the UI
-            img_data = BytesIO()
-            self.figure.savefig(img_data, format='png', dpi=150, bbox_inches='tight')
-            img_data.seek(0)
-            
-            # Create an Image object with the saved figure
-            img = Image(img_data, width=500, height=300)
-            story.append(img)
+            # Summary results as shown in the summary cards
+            results = [
+                f"Success Probability: {self.success_rate_var.get()}",
+                f"Median Assets at Legal Retirement: {self.median_assets_var.get()}",
+                f"10th Percentile Assets: {self.worst_case_var.get()}"
+            ]
             
-            # Build PDF document
-            doc.build(story)
+            timer = StageTimer("export")
+            with profile_run("export"), activate(timer):
+                # Capture the chart from the UI
+                img_data = BytesIO()
+                with span("draw"):
+                    self.results_chart.save_image(img_data, format='png', dpi=150, bbox_inches='tight')
+                img_data.seek(0)
+                
+                with span("pdf"):
+                    write_pdf_report(filepath, params, results, img_data, generated=now)
             
-            self.status_var.set(f"PDF exported to {filepath}")
+            timer.log(path=filepath)
+            self.status_var.set(f"PDF exported to {filepath} · {timer.summary()}")
             messagebox.showinfo("Export Complete", f"Results exported to:\n{filepath}")
         
         except Exception as e:
@@ -1621,11 +2268,8 @@ class RetirementCalculator:
             else:
                 self.worst_case_label.configure(foreground="white")
         
-        # Clear the axes before redrawing to prevent doubling
-        self.ax.clear()
-        
         # Redraw the chart
-        self.canvas.draw()
+        self.canvas.draw_idle()
     
     def show_error(self, message):
         """Show error message"""
@@ -1667,6 +2311,8 @@ class RetirementCalculator:
         self.scenarios_menu.entryconfigure(2, label=self.get_text("menu_scenarios_compare"))
         
         self.tools_menu.entryconfigure(0, label=self.get_text("menu_tools_darkMode"))
+        self.tools_menu.entryconfigure(1, label=self.get_text("menu_tools_sweep"))
+        self.tools_menu.entryconfigure(2, label=self.get_text("menu_tools_retirementAge"))
         
         self.help_menu.entryconfigure(0, label=self.get_text("menu_help_about"))
         
@@ -1684,6 +2330,8 @@ class RetirementCalculator:
         # Update chart frame
         self.chart_frame.configure(text=self.get_text("section_results"))
         
+        self.show_paths_check.configure(text=self.get_text("label_showPaths"))
+        
         # Update explanation text
         self.explanation_var.set(self.get_text("explanation_simulation"))
         
@@ -1691,13 +2339,26 @@ class RetirementCalculator:
         
         # Update buttons
         self.run_button.configure(text=self.get_text("btn_runSimulation"))
+        self.cancel_button.configure(text=self.get_text("btn_cancelSimulation"))
         self.save_scenario_button.configure(text=self.get_text("btn_saveScenario"))
 
 
 def main():
+    # Comparisons run in worker processes, which a frozen executable has to dispatch
+    multiprocessing.freeze_support()
+    
+    # Per-stage timings of every simulation and export go to ~/.retirecalc/timing.log
+    try:
+        configure_log()
+    except OSError as e:
+        print(f"Timing log disabled: {str(e)}")
+    
     root = tk.Tk()
     app = RetirementCalculator(root)
-    root.mainloop()
+    try:
+        root.mainloop()
+    finally:
+        app.shutdown()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
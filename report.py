@@ -0,0 +1,50 @@
+"""PDF report of a simulation: parameters, summary results and the results chart."""
+from datetime import datetime
+
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image
+
+
+def write_pdf_report(filepath, parameters, results, chart_image, generated=None):
+    """Write the report to filepath
+
+    parameters and results are lists of "Label: value" lines, chart_image a
+    file-like PNG of the results chart.
+    """
+    generated = generated or datetime.now()
+
+    # Create PDF document
+    doc = SimpleDocTemplate(filepath, pagesize=A4, rightMargin=20, leftMargin=20, topMargin=20, bottomMargin=20)
+    story = []
+    styles = getSampleStyleSheet()
+
+    # Add title
+    title = Paragraph("Retirement Simulation Results", styles["Title"])
+    story.append(title)
+    story.append(Spacer(1, 20))
+
+    # Add date
+    date_str = f"Generated on: {generated.strftime('%Y-%m-%d %H:%M')}"
+    story.append(Paragraph(date_str, styles["Normal"]))
+    story.append(Spacer(1, 20))
+
+    # Add parameters section
+    story.append(Paragraph("Parameters:", styles["Heading2"]))
+    story.append(Spacer(1, 10))
+    for line in parameters:
+        story.append(Paragraph(line, styles["Normal"]))
+    story.append(Spacer(1, 20))
+
+    # Add detailed simulation results
+    story.append(Paragraph("Simulation Results:", styles["Heading2"]))
+    story.append(Spacer(1, 10))
+    for line in results:
+        story.append(Paragraph(line, styles["Normal"]))
+    story.append(Spacer(1, 20))
+
+    # Create an Image object with the saved chart
+    story.append(Image(chart_image, width=500, height=300))
+
+    # Build PDF document
+    doc.build(story)
@@ -0,0 +1,166 @@
+"""SQLite-backed scenario store.
+
+One row per scenario in ~/.retirecalc/scenarios.db, with indexed name, created
+and tag columns and the scenario's summary metrics cached alongside its
+parameters, so scenario lists can be filtered and sorted without unpickling or
+resimulating anything. Every change is a single-row statement in its own
+transaction. Scenarios from the old scenarios.pickle are imported on first use.
+"""
+import json
+import os
+import pickle
+import sqlite3
+import threading
+from datetime import datetime
+
+
+DEFAULT_SCENARIO_DIR = os.path.expanduser("~/.retirecalc")
+
+# Columns that scenario lists can be sorted by
+SORT_COLUMNS = ("name", "created", "updated", "tag", "success_probability", "final_median", "final_p10")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scenarios (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    created TEXT NOT NULL,
+    updated TEXT NOT NULL,
+    tag TEXT,
+    params TEXT NOT NULL,
+    metrics_key TEXT,
+    success_probability REAL,
+    final_median REAL,
+    final_p10 REAL
+);
+CREATE INDEX IF NOT EXISTS scenarios_created ON scenarios (created);
+CREATE INDEX IF NOT EXISTS scenarios_tag ON scenarios (tag);
+CREATE INDEX IF NOT EXISTS scenarios_success ON scenarios (success_probability);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+LIST_COLUMNS = "name, created, updated, tag, metrics_key, success_probability, final_median, final_p10"
+
+
+class ScenarioStore:
+    """Named parameter sets with cached summary metrics"""
+
+    def __init__(self, directory=DEFAULT_SCENARIO_DIR):
+        self.path = os.path.join(directory, "scenarios.db")
+        self._lock = threading.Lock()
+
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as connection:
+            connection.executescript(SCHEMA)
+
+        self._import_pickle(os.path.join(directory, "scenarios.pickle"))
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=10)
+        connection.row_factory = sqlite3.Row
+        connection.execute("PRAGMA journal_mode=WAL")
+        return connection
+
+    def _execute(self, sql, parameters=()):
+        # The connection context manager commits on success and rolls back on error
+        with self._lock:
+            connection = self._connect()
+            try:
+                with connection:
+                    return connection.execute(sql, parameters).fetchall()
+            finally:
+                connection.close()
+
+    def _import_pickle(self, pickle_path):
+        """One-time import of the scenarios.pickle written by earlier versions
+
+        The import is recorded in the meta table, so scenarios deleted afterwards
+        are not imported again. Databases that got their scenarios before the
+        marker existed count as imported.
+        """
+        if self._execute("SELECT 1 FROM meta WHERE key = 'pickle_imported'"):
+            return
+        if os.path.exists(pickle_path) and self.count() == 0:
+            try:
+                with open(pickle_path, 'rb') as f:
+                    scenarios = pickle.load(f)
+            except Exception as e:
+                print(f"Error importing scenarios: {str(e)}")
+                return
+
+            for name, scenario in scenarios.items():
+                self.save(name, scenario["params"], created=scenario.get("created"))
+
+        self._execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('pickle_imported', ?)", (datetime.now().isoformat(),))
+
+    def count(self):
+        return self._execute("SELECT COUNT(*) FROM scenarios")[0][0]
+
+    def exists(self, name):
+        return bool(self._execute("SELECT 1 FROM scenarios WHERE name = ?", (name,)))
+
+    def save(self, name, params, tag=None, created=None):
+        """Insert or replace the parameters of a scenario; replacing clears its cached metrics
+
+        Replacing without a tag keeps the scenario's current tag.
+        """
+        now = datetime.now().isoformat()
+        self._execute(
+            """
+            INSERT INTO scenarios (name, created, updated, tag, params) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (name) DO UPDATE SET
+                updated = excluded.updated, tag = COALESCE(excluded.tag, scenarios.tag), params = excluded.params,
+                metrics_key = NULL, success_probability = NULL, final_median = NULL, final_p10 = NULL
+            """,
+            (name, created or now, now, tag, json.dumps(params))
+        )
+
+    def load(self, name):
+        """Parameters of a scenario, or None if there is no such scenario"""
+        rows = self._execute("SELECT params FROM scenarios WHERE name = ?", (name,))
+        return json.loads(rows[0]["params"]) if rows else None
+
+    def delete(self, name):
+        self._execute("DELETE FROM scenarios WHERE name = ?", (name,))
+
+    def update_metrics(self, name, metrics_key, success_probability, final_median, final_p10):
+        """Cache summary metrics for a scenario; metrics_key identifies the results they came from"""
+        self._execute(
+            """
+            UPDATE scenarios SET metrics_key = ?, success_probability = ?, final_median = ?, final_p10 = ?
+            WHERE name = ?
+            """,
+            (metrics_key, success_probability, final_median, final_p10, name)
+        )
+
+    def list(self, order_by="name", descending=False, tag=None, limit=None, with_params=False):
+        """Scenario rows sorted by one of SORT_COLUMNS
+
+        Each row is a dict with the name, created and updated timestamps, tag and
+        cached metrics (None until computed), plus the parsed parameters with
+        with_params.
+        """
+        if order_by not in SORT_COLUMNS:
+            raise ValueError(f"Cannot sort scenarios by {order_by}")
+
+        sql = f"SELECT {LIST_COLUMNS}{', params' if with_params else ''} FROM scenarios"
+        parameters = []
+        if tag is not None:
+            sql += " WHERE tag = ?"
+            parameters.append(tag)
+        # Scenarios without metrics sort last either way
+        sql += f" ORDER BY {order_by} IS NULL, {order_by} {'DESC' if descending else 'ASC'}, name"
+        if limit is not None:
+            sql += " LIMIT ?"
+            parameters.append(int(limit))
+
+        rows = [dict(row) for row in self._execute(sql, parameters)]
+        if with_params:
+            for row in rows:
+                row["params"] = json.loads(row["params"])
+        return rows
+
+    def tags(self):
+        return [row[0] for row in self._execute("SELECT DISTINCT tag FROM scenarios WHERE tag IS NOT NULL ORDER BY tag")]
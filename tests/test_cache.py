@@ -0,0 +1,124 @@
+"""Tests for the result cache: key stability, the disk tier and eviction"""
+import os
+import time
+from dataclasses import replace
+
+import numpy as np
+
+import cache
+from cache import ResultCache, cache_key
+from engine import SimulationParams
+
+
+PROFILE = {
+    "currentAge": 50,
+    "legalRetirementAge": 67,
+    "fixedMonthlyPension": 1500.0,
+    "currentAssets": 600000.0,
+    "capitalGainsTaxRate": 0.2625,
+    "annualSavings": 20000.0,
+    "intendedRetirementAge": 60,
+    "averageROI": 0.06,
+    "averageInflation": 0.025,
+    "ROI_volatility": 0.15,
+    "inflation_volatility": 0.01,
+    "monthlyExpenses": {"living": 2500.0},
+    "annualExpenses": {},
+    "simulationRuns": 500,
+    "simulationEndAge": 90,
+    "seed": 3,
+}
+
+
+def results(size=10):
+    return {"success_probability": 0.9, "simulations": {"failed": np.zeros(size, dtype=bool)}}
+
+
+def test_key_depends_on_parameters_seed_and_options(monkeypatch):
+    params = SimulationParams.from_dict(PROFILE)
+    key = cache_key(params, percentiles=(5, 50, 95), computation=("exact", None))
+
+    # Equal parameters hash the same however they were built, and options in any order
+    assert cache_key(SimulationParams.from_dict(dict(PROFILE)), computation=("exact", None), percentiles=(5, 50, 95)) == key
+
+    assert cache_key(replace(params, seed=4), percentiles=(5, 50, 95), computation=("exact", None)) != key
+    assert cache_key(replace(params, average_roi=0.05), percentiles=(5, 50, 95), computation=("exact", None)) != key
+    assert cache_key(params, percentiles=(5, 50, 95), computation=("chunked", 4096)) != key
+
+    monkeypatch.setattr(cache, "ENGINE_VERSION", "test")
+    assert cache_key(params, percentiles=(5, 50, 95), computation=("exact", None)) != key
+
+
+def test_key_changes_when_the_history_file_is_rewritten(tmp_path):
+    path = tmp_path / "history.npy"
+    np.save(path, np.full((30, 2), 0.03))
+    params = SimulationParams.from_dict(dict(PROFILE, returnModel="stationary", historyPath=str(path)))
+    key = cache_key(params)
+
+    np.save(path, np.full((31, 2), 0.03))
+    assert cache_key(params) != key
+
+
+def test_disk_tier_survives_a_new_cache(tmp_path):
+    ResultCache(str(tmp_path)).put("key", results())
+
+    cached = ResultCache(str(tmp_path)).get("key")
+    assert cached["success_probability"] == 0.9
+    assert np.array_equal(cached["simulations"]["failed"], np.zeros(10, dtype=bool))
+    assert ResultCache(str(tmp_path)).get("other") is None
+
+
+def test_disk_tier_leaves_out_large_arrays(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "DISK_MAX_ARRAY_BYTES", 100)
+    stored = results()
+    stored["simulations"]["assets"] = np.zeros((10, 10))
+    ResultCache(str(tmp_path)).put("key", stored)
+
+    assert list(ResultCache(str(tmp_path)).get("key")["simulations"]) == ["failed"]
+
+
+def test_none_key_is_never_stored(tmp_path):
+    store = ResultCache(str(tmp_path))
+    store.put(None, results())
+    assert store.get(None) is None
+    assert os.listdir(tmp_path) == []
+
+
+def test_memory_tier_evicts_least_recently_used(tmp_path):
+    store = ResultCache(str(tmp_path), max_memory_entries=2, max_disk_bytes=0)
+    store.put("a", results())
+    store.put("b", results())
+    store.get("a")
+    store.put("c", results())
+
+    assert store.get("a") is not None and store.get("c") is not None
+    assert store.get("b") is None
+
+
+def test_memory_tier_skips_results_larger_than_it(tmp_path):
+    store = ResultCache(str(tmp_path), max_memory_bytes=2**20, max_disk_bytes=0)
+    store.put("small", results())
+    store.put("large", results(2 * 2**20))
+
+    assert store.get("large") is None
+    assert store.get("small") is not None
+
+
+def test_disk_tier_evicts_oldest_entries_by_size_and_age(tmp_path):
+    store = ResultCache(str(tmp_path), max_memory_entries=1, max_age_days=1)
+    now = time.time()
+    for age, key in enumerate(["old", "middle", "new"]):
+        store.put(key, results())
+        os.utime(store._path(key), (now - 60 + age, now - 60 + age))
+    size = os.path.getsize(store._path("new"))
+
+    # Over the size limit, the least recently used entries go first
+    store.max_disk_bytes = 2 * size
+    store._evict_disk()
+    assert sorted(os.listdir(tmp_path)) == ["middle.pickle", "new.pickle"]
+
+    # Entries past the age limit go whatever the total size
+    store.max_disk_bytes = 10 * size
+    os.utime(store._path("middle"), (now - 2 * 24 * 3600, now - 2 * 24 * 3600))
+    store.put("fresh", results())
+    assert sorted(os.listdir(tmp_path)) == ["fresh.pickle", "new.pickle"]
@@ -0,0 +1,76 @@
+"""Tests for the batch command line interface"""
+import json
+import sys
+
+import pytest
+
+import cli
+
+
+PROFILE = {
+    "currentAge": 50,
+    "legalRetirementAge": 67,
+    "fixedMonthlyPension": 1500.0,
+    "currentAssets": 600000.0,
+    "capitalGainsTaxRate": 0.2625,
+    "annualSavings": 20000.0,
+    "intendedRetirementAge": 60,
+    "averageROI": 0.06,
+    "averageInflation": 0.025,
+    "ROI_volatility": 0.15,
+    "inflation_volatility": 0.01,
+    "monthlyExpenses": {"living": 2500.0},
+    "annualExpenses": {},
+    "simulationRuns": 500,
+    "simulationEndAge": 90,
+    "seed": 3,
+}
+
+
+def test_unreadable_profiles_become_error_rows(tmp_path):
+    (tmp_path / "good.json").write_text(json.dumps(PROFILE))
+    (tmp_path / "bad.json").write_text('{"currentAge": ')
+
+    profiles = dict(cli.read_profiles(str(tmp_path)))
+    assert profiles["good"] == PROFILE
+    assert isinstance(profiles["bad"], cli.ProfileError)
+
+    rows = {name: cli.evaluate_profile((name, params, None, None, None)) for name, params in profiles.items()}
+    assert rows["good"]["error"] is None and rows["good"]["runs"] == 500
+    assert "bad.json" in rows["bad"]["error"] and rows["bad"]["success_probability"] is None
+
+
+def test_jsonl_lines_are_read_independently(tmp_path):
+    source = tmp_path / "profiles.jsonl"
+    source.write_text("\n".join([
+        json.dumps({"name": "first", "params": PROFILE}),
+        "{not json",
+        "[1, 2]",
+        "",
+        json.dumps(PROFILE),
+    ]))
+
+    names = [name for name, _ in cli.read_profiles(str(source))]
+    errors = [name for name, params in cli.read_profiles(str(source)) if isinstance(params, cli.ProfileError)]
+    assert names == ["first", "line 2", "line 3", "line 5"]
+    assert errors == ["line 2", "line 3"]
+
+
+def test_batch_writes_a_row_per_profile(tmp_path):
+    (tmp_path / "a.json").write_text(json.dumps(PROFILE))
+    (tmp_path / "b.json").write_text("oops")
+    output = tmp_path / "summary.csv"
+
+    cli.main(["batch", str(tmp_path), "-o", str(output), "--workers", "1"])
+    lines = output.read_text().splitlines()
+    assert lines[0].split(",") == cli.SUMMARY_COLUMNS
+    assert [line.split(",")[0] for line in lines[1:]] == ["a", "b"]
+
+
+def test_parquet_without_pyarrow_fails_before_simulating(tmp_path, monkeypatch):
+    monkeypatch.setitem(sys.modules, "pyarrow", None)
+    monkeypatch.setattr(cli, "ProcessPoolExecutor", None)
+    (tmp_path / "a.json").write_text(json.dumps(PROFILE))
+
+    with pytest.raises(SystemExit, match="pyarrow"):
+        cli.main(["batch", str(tmp_path), "-o", str(tmp_path / "summary.parquet")])
@@ -0,0 +1,193 @@
+"""Tests for the headless engine: chunk invariance, the solvers, correlated shocks and the quantile sketch"""
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+from engine import (
+    BLOCK_RUNS, SimulationParams, draw_model_shocks, earliest_retirement_age, inflation_factors, iter_chunks,
+    max_sustainable_spending, run_monte_carlo, shared_shock_spec, simulate_scenario, summarize
+)
+from sketch import QuantileSketch
+
+
+PROFILE = {
+    "currentAge": 40,
+    "legalRetirementAge": 67,
+    "fixedMonthlyPension": 1500.0,
+    "currentAssets": 400000.0,
+    "capitalGainsTaxRate": 0.2625,
+    "annualSavings": 25000.0,
+    "intendedRetirementAge": 55,
+    "averageROI": 0.06,
+    "averageInflation": 0.025,
+    "ROI_volatility": 0.15,
+    "inflation_volatility": 0.01,
+    "monthlyExpenses": {"living": 2500.0},
+    "annualExpenses": {"travel": 4000.0},
+    "simulationRuns": 3000,
+    "simulationEndAge": 90,
+    "seed": 7,
+}
+
+
+@pytest.fixture
+def history_path(tmp_path):
+    rng = np.random.default_rng(0)
+    data = np.column_stack([rng.normal(0.07, 0.17, 60), rng.normal(0.03, 0.02, 60)])
+    path = tmp_path / "history.npy"
+    np.save(path, data)
+    return str(path)
+
+
+@pytest.fixture(params=["annual", "monthly", "stationary"])
+def params(request, history_path):
+    profile = dict(PROFILE)
+    if request.param == "monthly":
+        profile.update(timeStep="monthly", simulationRuns=1500)
+    elif request.param == "stationary":
+        profile.update(returnModel="stationary", historyPath=history_path)
+    return SimulationParams.from_dict(profile)
+
+
+def test_shocks_do_not_depend_on_chunking(params):
+    runs = params.simulation_runs
+    whole = draw_model_shocks(params, runs, params.seed)
+    for chunk in (BLOCK_RUNS // 2, BLOCK_RUNS, 3 * BLOCK_RUNS // 2):
+        parts = [draw_model_shocks(params, min(chunk, runs - start), params.seed, start) for start in range(0, runs, chunk)]
+        assert np.array_equal(whole.roi, np.concatenate([part.roi for part in parts]))
+        assert np.array_equal(whole.inflation, np.concatenate([part.inflation for part in parts]))
+
+
+def test_results_do_not_depend_on_chunking(params):
+    results = run_monte_carlo(params)
+    failed = results["simulations"]["failed"]
+
+    for run in iter_chunks(params, chunk_runs=BLOCK_RUNS * params.steps_per_year, sample_paths=0, keep_failures=True):
+        pass
+    assert run.runs == params.simulation_runs
+    assert np.array_equal(run.results()["simulations"]["failed"], failed)
+    assert run.results()["success_probability"] == results["success_probability"]
+
+    assert summarize(params, chunk_runs=BLOCK_RUNS)["success_probability"] == results["success_probability"]
+
+    whole = max_sustainable_spending(params)
+    chunked = max_sustainable_spending(params, chunk_runs=BLOCK_RUNS)
+    assert chunked["annual_expense"] == whole["annual_expense"]
+    assert chunked["expense_interval"] == whole["expense_interval"]
+
+
+def test_streamed_comparison_matches_in_memory(params, monkeypatch):
+    other = replace(params, intended_retirement_age=params.intended_retirement_age + 3, simulation_end_age=85)
+    spec = shared_shock_spec([params, other])
+    in_memory = simulate_scenario(other, spec)
+
+    monkeypatch.setattr("engine.MAX_IN_MEMORY_RUNS", BLOCK_RUNS)
+    streamed = simulate_scenario(other, spec)
+    assert np.array_equal(streamed["simulations"]["failed"], in_memory["simulations"]["failed"])
+    assert streamed["success_probability"] == in_memory["success_probability"]
+
+
+def with_expense(params, annual_expense):
+    scale = annual_expense / params.annual_expense
+    return replace(
+        params,
+        monthly_expenses={key: value * scale for key, value in params.monthly_expenses.items()},
+        annual_expenses={key: value * scale for key, value in params.annual_expenses.items()},
+    )
+
+
+def test_max_sustainable_spending_matches_simulation(params):
+    target = 0.85
+    result = max_sustainable_spending(params, target)
+    expense = result["annual_expense"]
+    lower, upper = result["expense_interval"]
+    assert lower <= expense <= upper
+
+    # Just below the solved expense the full simulation meets the target; well above it, it does not
+    assert run_monte_carlo(with_expense(params, expense * (1 - 1e-9)), retain="none")["success_probability"] >= target
+    assert run_monte_carlo(with_expense(params, expense * 1.05), retain="none")["success_probability"] < target
+
+
+def test_earliest_retirement_age_matches_simulation(params):
+    target = 0.8
+    result = earliest_retirement_age(params, target, min_age=45, max_age=65)
+
+    success = {
+        age: run_monte_carlo(replace(params, intended_retirement_age=age), retain="none")["success_probability"]
+        for age in range(45, 66)
+    }
+    for age, probability in result["success_by_age"].items():
+        assert probability == pytest.approx(success[age], abs=1e-12)
+
+    assert result["age"] == next((age for age in sorted(success) if success[age] >= target), None)
+
+
+def test_earliest_retirement_age_when_working_longer_hurts():
+    # Working costs more than retirement, so success falls with the retirement age
+    params = SimulationParams.from_dict(
+        dict(PROFILE, annualSavings=-30000.0, monthlyExpenses={"living": 800.0}, annualExpenses={})
+    )
+    success = {
+        age: run_monte_carlo(replace(params, intended_retirement_age=age), retain="none")["success_probability"]
+        for age in (45, 46, 70)
+    }
+    assert success[70] < 0.6 <= success[45]
+
+    result = earliest_retirement_age(params, 0.6, min_age=45, max_age=70)
+    assert result["age"] == 45
+    assert result["success_probability"] == pytest.approx(success[45], abs=1e-12)
+
+
+@pytest.mark.parametrize("correlation", [-0.6, 0.3, 0.9])
+def test_inflation_follows_the_requested_correlation(correlation):
+    params = SimulationParams.from_dict(dict(PROFILE, simulationRuns=20000, ROI_inflation_correlation=correlation))
+    shocks = draw_model_shocks(params, params.simulation_runs, params.seed)
+    inflation = inflation_factors(params, shocks, 0)
+
+    sample = np.corrcoef(shocks.roi.ravel(), inflation.ravel())[0, 1]
+    assert sample == pytest.approx(correlation, abs=0.01)
+    assert inflation.std() == pytest.approx(params.inflation_volatility, rel=0.01)
+
+
+def test_zero_correlation_keeps_independent_shocks():
+    params = SimulationParams.from_dict(dict(PROFILE, ROI_inflation_correlation=0.0))
+    shocks = draw_model_shocks(params, params.simulation_runs, params.seed)
+    independent = 1 + params.average_inflation + params.inflation_volatility * shocks.inflation
+    assert np.array_equal(inflation_factors(params, shocks, 0), independent)
+
+    independent = run_monte_carlo(params)
+    correlated = run_monte_carlo(replace(params, roi_inflation_correlation=-0.5))
+    assert not np.array_equal(correlated["simulations"]["assets"], independent["simulations"]["assets"])
+
+
+def test_correlation_is_validated_and_ignored_by_bootstrap_models(history_path):
+    with pytest.raises(ValueError, match="correlation"):
+        SimulationParams.from_dict(dict(PROFILE, ROI_inflation_correlation=1.5))
+
+    params = SimulationParams.from_dict(
+        dict(PROFILE, ROI_inflation_correlation=0.5, returnModel="stationary", historyPath=history_path)
+    )
+    assert params.to_dict()["ROI_inflation_correlation"] == 0.5
+    assert params.inflation_correlation == 0.0
+
+
+@pytest.mark.parametrize("capacity", [64, 256])
+def test_sketch_quantiles_within_rank_error(capacity):
+    rng = np.random.default_rng(3)
+    values = rng.lognormal(size=(50000, 3))
+
+    sketch = QuantileSketch(3, capacity, seed=1)
+    for start in range(0, len(values), 777):
+        sketch.update(values[start:start + 777])
+
+    error = sketch.rank_error()
+    assert error > 0
+
+    percentiles = (1, 10, 50, 90, 99)
+    estimates = sketch.quantile(percentiles)
+    exact = np.sort(values, axis=0)
+    for i, q in enumerate(percentiles):
+        for year in range(3):
+            rank = np.searchsorted(exact[:, year], estimates[i, year], side="right") / len(values)
+            assert abs(rank - q / 100) <= error + 1 / len(values)
@@ -0,0 +1,73 @@
+"""Tests for converting, loading and fingerprinting historical datasets"""
+import os
+
+import numpy as np
+import pytest
+
+from history import convert_csv, describe_history, history_fingerprint, load_history
+
+
+def write_csv(tmp_path, text, name="returns.csv"):
+    path = tmp_path / name
+    path.write_text(text)
+    return str(path)
+
+
+def test_convert_reads_fractions_and_percentages(tmp_path):
+    csv_path = write_csv(tmp_path, "Year,ROI,Inflation\n2000,0.07,2%\n\n2001,-12.5%,0.031\n2002,0.2,0.01\n")
+
+    npy_path = convert_csv(csv_path)
+    assert npy_path == str(tmp_path / "returns.npy")
+    assert np.allclose(np.load(npy_path), [[0.07, 0.02], [-0.125, 0.031], [0.2, 0.01]])
+
+    other = convert_csv(csv_path, str(tmp_path / "other.npy"))
+    assert other == str(tmp_path / "other.npy") and os.path.exists(other)
+
+
+@pytest.mark.parametrize("text, message", [
+    ("", "empty"),
+    ("year,inflation\n2000,0.02\n", "return"),
+    ("return,inflation\n0.07,0.02\n0.05\n", "line 3"),
+    ("return,inflation\n0.07,0.02\n0.05,abc\n", "line 3"),
+    ("return,inflation\n0.07,0.02\n", "two years"),
+    ("return,inflation\n0.07,0.02\nnan,0.01\n", "missing"),
+])
+def test_convert_rejects_invalid_csv(tmp_path, text, message):
+    with pytest.raises(ValueError, match=message):
+        convert_csv(write_csv(tmp_path, text))
+
+
+def test_load_is_read_only_and_follows_rewrites(tmp_path):
+    path = str(tmp_path / "history.npy")
+    np.save(path, np.full((10, 2), 0.03))
+
+    data = load_history(path)
+    assert isinstance(data, np.memmap) and not data.flags.writeable
+    assert load_history(path) is data
+
+    fingerprint = history_fingerprint(path)
+    assert history_fingerprint(path) == fingerprint
+
+    np.save(path, np.full((12, 2), 0.04))
+    assert history_fingerprint(path) != fingerprint
+    assert load_history(path).shape == (12, 2)
+
+
+def test_load_rejects_invalid_arrays(tmp_path):
+    path = str(tmp_path / "history.npy")
+    np.save(path, np.zeros((10, 3)))
+    with pytest.raises(ValueError, match="years x 2"):
+        load_history(path)
+
+
+def test_describe_matches_the_data(tmp_path):
+    data = np.column_stack([np.linspace(-0.2, 0.3, 40), np.linspace(0.0, 0.06, 40)])
+    path = str(tmp_path / "history.npy")
+    np.save(path, data)
+
+    stats = describe_history(path)
+    assert stats["years"] == 40
+    assert stats["average_roi"] == pytest.approx(data[:, 0].mean())
+    assert stats["roi_volatility"] == pytest.approx(data[:, 0].std())
+    assert stats["average_inflation"] == pytest.approx(data[:, 1].mean())
+    assert stats["inflation_volatility"] == pytest.approx(data[:, 1].std())
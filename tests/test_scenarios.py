@@ -0,0 +1,51 @@
+"""Tests for the SQLite scenario store"""
+import pickle
+
+from scenarios import ScenarioStore
+
+
+PARAMS = {"currentAge": 40, "intendedRetirementAge": 55}
+
+
+def write_pickle(directory, names):
+    with open(directory / "scenarios.pickle", 'wb') as f:
+        pickle.dump({name: {"params": PARAMS, "created": "2024-01-01T00:00:00"} for name in names}, f)
+
+
+def test_pickle_is_imported_once(tmp_path):
+    write_pickle(tmp_path, ["old"])
+
+    store = ScenarioStore(str(tmp_path))
+    assert [row["name"] for row in store.list()] == ["old"]
+    assert store.load("old") == PARAMS
+
+    store.delete("old")
+    assert ScenarioStore(str(tmp_path)).count() == 0
+
+
+def test_existing_database_is_not_overwritten_by_pickle(tmp_path):
+    store = ScenarioStore(str(tmp_path))
+    store.save("old", {"currentAge": 50})
+
+    # A database filled before the import marker existed keeps its own scenarios
+    store._execute("DELETE FROM meta")
+    write_pickle(tmp_path, ["old", "other"])
+    reopened = ScenarioStore(str(tmp_path))
+    assert reopened.load("old") == {"currentAge": 50}
+    assert not reopened.exists("other")
+
+
+def test_overwrite_keeps_tag_unless_given(tmp_path):
+    store = ScenarioStore(str(tmp_path))
+    store.save("plan", PARAMS, tag="early")
+    store.update_metrics("plan", "key", 0.9, 1.0, 0.5)
+
+    store.save("plan", dict(PARAMS, intendedRetirementAge=57))
+    row = store.list(with_params=True)[0]
+    assert row["tag"] == "early"
+    assert row["params"]["intendedRetirementAge"] == 57
+    assert row["metrics_key"] is None and row["success_probability"] is None
+
+    store.save("plan", PARAMS, tag="late")
+    assert store.list()[0]["tag"] == "late"
+    assert store.tags() == ["late"]
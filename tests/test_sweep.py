@@ -0,0 +1,64 @@
+"""Tests for the parameter sweep against the full simulation"""
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+from engine import SimulationParams, run_monte_carlo, sweep
+
+
+PROFILE = {
+    "currentAge": 40,
+    "legalRetirementAge": 67,
+    "fixedMonthlyPension": 1500.0,
+    "currentAssets": 400000.0,
+    "capitalGainsTaxRate": 0.2625,
+    "annualSavings": 25000.0,
+    "intendedRetirementAge": 55,
+    "averageROI": 0.06,
+    "averageInflation": 0.025,
+    "ROI_volatility": 0.15,
+    "inflation_volatility": 0.01,
+    "monthlyExpenses": {"living": 2500.0},
+    "annualExpenses": {"travel": 4000.0},
+    "simulationRuns": 2000,
+    "simulationEndAge": 90,
+    "seed": 11,
+}
+
+AGES = [50, 55, 60]
+ROIS = [0.04, 0.06]
+
+
+@pytest.mark.parametrize("extra", [{}, {"timeStep": "monthly", "simulationRuns": 800}, {"ROI_inflation_correlation": -0.5}])
+def test_cells_match_full_simulation(extra):
+    params = SimulationParams.from_dict(dict(PROFILE, **extra))
+    result = sweep(params, [("intendedRetirementAge", AGES), ("averageROI", ROIS)], percentiles=(10, 50))
+    assert result["success_probability"].shape == (len(AGES), len(ROIS))
+    assert result["axes"] == [("intendedRetirementAge", AGES), ("averageROI", ROIS)]
+
+    for i, age in enumerate(AGES):
+        for j, roi in enumerate(ROIS):
+            full = run_monte_carlo(replace(params, intended_retirement_age=age, average_roi=roi))
+            assert result["success_probability"][i, j] == full["success_probability"]
+
+            # Monthly runs record a year's lowest assets if they went below zero, not its closing assets
+            if params.steps_per_year == 1:
+                terminal = full["simulations"]["assets"][:, -1]
+                assert result["terminal_assets"]["median"][i, j] == pytest.approx(np.median(terminal), rel=1e-9)
+
+
+def test_blocks_do_not_change_the_result(monkeypatch):
+    params = SimulationParams.from_dict(PROFILE)
+    axes = [("annualSavings", [15000, 25000, 35000]), ("ROI_volatility", [0.1, 0.15, 0.2])]
+    whole = sweep(params, axes)
+
+    monkeypatch.setattr("engine.SWEEP_BLOCK_SIZE", 2 * params.simulation_runs)
+    blocked = sweep(params, axes)
+    assert np.array_equal(blocked["success_probability"], whole["success_probability"])
+
+
+def test_unsweepable_parameter_is_rejected():
+    params = SimulationParams.from_dict(PROFILE)
+    with pytest.raises(ValueError, match="simulationRuns"):
+        sweep(params, [("simulationRuns", [100, 200])])
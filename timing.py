@@ -0,0 +1,143 @@
+"""Per-stage timing of simulation jobs, with an optional cProfile dump per run.
+
+A StageTimer collects the wall time of named stages ("sim", "stats", "draw", ...)
+of one job. Spans nest: time spent in an inner span counts only towards the inner
+stage, so the stages of a job add up to its total. Code that doesn't know about
+the job (e.g. the statistics in engine.py) opens spans with span(), which records
+into whichever timer the current thread has activated and costs next to nothing
+when there is none.
+
+Finished jobs are written to the "retirecalc.timing" logger as one JSON object per
+line. Setting the RETIRECALC_PROFILE environment variable to a directory dumps a
+pstats file for every profiled run into it.
+"""
+import cProfile
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+
+DEFAULT_TIMING_LOG = os.path.expanduser("~/.retirecalc/timing.log")
+
+# Directory for per-run cProfile dumps, or None to not profile
+PROFILE_DIR = os.environ.get("RETIRECALC_PROFILE") or None
+
+logger = logging.getLogger("retirecalc.timing")
+
+_local = threading.local()
+
+
+class StageTimer:
+    """Exclusive wall time per named stage of one job, from any number of threads"""
+
+    def __init__(self, job):
+        self.job = job
+        self.stages = {}
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def add(self, stage, seconds):
+        with self._lock:
+            self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    @contextmanager
+    def span(self, stage):
+        """Time the body as stage, minus the time of spans nested in it"""
+        # Stages are listed in the order they start, not the order they finish
+        self.add(stage, 0.0)
+        stack = _span_stack()
+        nested = [0.0]
+        stack.append(nested)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            stack.pop()
+            if stack:
+                stack[-1][0] += elapsed
+            self.add(stage, elapsed - nested[0])
+
+    def summary(self):
+        """Stage times in the order the stages first ran ("sim 42 ms · stats 8 ms · draw 31 ms")"""
+        with self._lock:
+            return " · ".join(f"{stage} {seconds * 1000:.0f} ms" for stage, seconds in self.stages.items())
+
+    def log(self, **fields):
+        """Write the stage times and any extra fields to the timing log as one JSON line"""
+        with self._lock:
+            stages = {stage: round(seconds * 1000, 2) for stage, seconds in self.stages.items()}
+        record = {
+            "time": datetime.now().isoformat(timespec="milliseconds"),
+            "job": self.job,
+            "stages_ms": stages,
+            "elapsed_ms": round((time.perf_counter() - self.started) * 1000, 2),
+        }
+        record.update(fields)
+        logger.info(json.dumps(record, default=str))
+
+
+def _span_stack():
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+    return _local.stack
+
+
+@contextmanager
+def activate(timer):
+    """Make timer the target of span() in the current thread for the body"""
+    previous = getattr(_local, "timer", None)
+    _local.timer = timer
+    try:
+        yield timer
+    finally:
+        _local.timer = previous
+
+
+@contextmanager
+def span(stage):
+    """Time the body as stage of the current thread's active timer, if any"""
+    timer = getattr(_local, "timer", None)
+    if timer is None:
+        yield
+        return
+    with timer.span(stage):
+        yield
+
+
+@contextmanager
+def profile_run(name, directory=None):
+    """Profile the body with cProfile and dump the stats to <directory>/<name>-<time>.pstats
+
+    Does nothing unless a directory is given or RETIRECALC_PROFILE is set. Only the
+    calling thread is profiled.
+    """
+    directory = directory or PROFILE_DIR
+    if directory is None:
+        yield None
+        return
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{name}-{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}.pstats")
+        profiler.dump_stats(path)
+        logger.info(json.dumps({"time": datetime.now().isoformat(timespec="milliseconds"), "job": name, "profile": path}))
+
+
+def configure_log(path=DEFAULT_TIMING_LOG):
+    """Append timing records to path, one JSON object per line"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    handler = logging.FileHandler(path, encoding="utf-8")
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    return handler